@@ -1,4 +1,6 @@
 """Benchmark 元数据注册表，包含所有 benchmark 的能力标签、描述和适用场景。"""
+import json
+import hashlib
 from typing import List, Dict, Any
 from evalscope.constants import Tags
 
@@ -75,8 +77,8 @@ BENCHMARK_REGISTRY: Dict[str, BenchmarkInfo] = {
         ],
         metrics=["acc"],
     ),
-    "general_fc": BenchmarkInfo(
-        name="general_fc",
+    "function_call": BenchmarkInfo(
+        name="function_call",
         pretty_name="General Function Call",
         tags=[Tags.FUNCTION_CALLING],
         description="通用函数调用评测数据集，用于评估模型理解和执行函数调用的能力。",
@@ -96,6 +98,17 @@ def get_all_benchmarks() -> Dict[str, BenchmarkInfo]:
     return BENCHMARK_REGISTRY
 
 
+def get_registry_version() -> str:
+    """获取注册表版本，注册表内容（名称、标签、描述、适用场景、指标）变化时版本随之变化"""
+    content = json.dumps(
+        {name: vars(info) for name, info in BENCHMARK_REGISTRY.items()},
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
 def get_benchmark(name: str) -> BenchmarkInfo:
     """根据名称获取 benchmark 信息"""
     if name not in BENCHMARK_REGISTRY:
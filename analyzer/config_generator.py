@@ -27,6 +27,7 @@ class ConfigGenerator:
         use_llm_judge: bool = False,
         judge_model_name: str = None,
         work_dir: str = None,
+        harness_options: Dict[str, Any] = None,
     ) -> Dict[str, Any]:
         """
         为单个 benchmark 和 model 的组合生成评测配置
@@ -40,6 +41,7 @@ class ConfigGenerator:
             use_llm_judge: 是否使用 LLM judge
             judge_model_name: LLM judge 模型名称
             work_dir: 工作目录
+            harness_options: harness 扩展参数，字段名与 benchmark 命令行参数一致（如 no_dedup）
             
         Returns:
             评测配置字典
@@ -55,6 +57,8 @@ class ConfigGenerator:
                 self.use_llm_judge = use_llm_judge
                 self.judge_model_name = judge_model_name
                 self.work_dir = work_dir
+                for key, value in (harness_options or {}).items():
+                    setattr(self, key, value)
         
         args = Args()
         
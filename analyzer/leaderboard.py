@@ -0,0 +1,297 @@
+"""排行榜生成器，读取一个或多个工作目录下的评测报告，生成确定性的排行榜、subset 透视表和分数差值（Markdown / HTML / CSV）。"""
+import argparse
+import csv
+import glob
+import html
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer.score_matrix import build_score_matrix
+
+
+def find_reports(work_dirs: List[str]) -> List[Dict[str, Any]]:
+    """
+    查找工作目录下所有的评测报告（reports/{model}/{benchmark}.json）
+
+    Args:
+        work_dirs: 工作目录列表，可以是一次 analyzer 运行的目录、单个 benchmark 的输出目录或历史运行的上级目录
+
+    Returns:
+        报告记录列表，每个元素包含 run（所在工作目录）、path、mtime、model、benchmark 和 report
+    """
+    records = []
+    seen = set()
+    for work_dir in work_dirs:
+        pattern = os.path.join(work_dir, "**", "reports", "*", "*.json")
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            real_path = os.path.realpath(path)
+            if real_path in seen:
+                continue
+            seen.add(real_path)
+            with open(path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+            if "metrics" not in report:
+                continue
+            records.append({
+                "run": work_dir,
+                "path": path,
+                "mtime": os.path.getmtime(path),
+                "model": report.get("model_name") or os.path.basename(os.path.dirname(path)),
+                "benchmark": report.get("dataset_name") or os.path.splitext(os.path.basename(path))[0],
+                "report": report,
+            })
+    return records
+
+
+def _main_score(report: Dict[str, Any]) -> Optional[float]:
+    metrics = report.get("metrics") or []
+    return metrics[0].get("score") if metrics else None
+
+
+def build_leaderboard(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    根据报告记录生成排行榜数据
+
+    同一模型在同一 benchmark 上有多次运行时，使用最新的报告计算排行榜，并记录与上一次运行的差值。
+
+    Args:
+        records: find_reports 的返回值
+
+    Returns:
+        {"matrix": 评分矩阵, "leaderboard": [...], "history": [...], "scores": [...]}
+    """
+    runs: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+    for record in sorted(records, key=lambda item: item["mtime"]):
+        runs.setdefault(record["benchmark"], {}).setdefault(record["model"], []).append(record)
+
+    latest = {
+        benchmark: {model: items[-1]["report"] for model, items in model_runs.items()}
+        for benchmark, model_runs in runs.items()
+    }
+    matrix = build_score_matrix(latest)
+
+    leaderboard = []
+    for model in matrix["models"]:
+        scores = {
+            benchmark["name"]: benchmark["overall"][model]
+            for benchmark in matrix["benchmarks"] if benchmark["overall"].get(model) is not None
+        }
+        ranks = [benchmark["ranks"][model] for benchmark in matrix["benchmarks"] if model in benchmark["ranks"]]
+        leaderboard.append({
+            "model": model,
+            "mean_score": sum(scores.values()) / len(scores) if scores else None,
+            "mean_rank": sum(ranks) / len(ranks) if ranks else None,
+            "benchmarks": len(scores),
+            "scores": scores,
+        })
+    # 覆盖 benchmark 多的模型优先，其次按平均分数从高到低
+    leaderboard.sort(key=lambda item: (-item["benchmarks"], -(item["mean_score"] or 0.0), item["model"]))
+    for position, item in enumerate(leaderboard, start=1):
+        item["position"] = position
+
+    history = []
+    for benchmark, model_runs in runs.items():
+        for model, items in model_runs.items():
+            if len(items) < 2:
+                continue
+            previous, current = _main_score(items[-2]["report"]), _main_score(items[-1]["report"])
+            history.append({
+                "benchmark": benchmark,
+                "model": model,
+                "previous_run": items[-2]["run"],
+                "previous": previous,
+                "current_run": items[-1]["run"],
+                "current": current,
+                "delta": None if previous is None or current is None else current - previous,
+            })
+
+    scores = []
+    for record in records:
+        for metric in record["report"].get("metrics", []):
+            scores.append({
+                "run": record["run"], "model": record["model"], "benchmark": record["benchmark"],
+                "metric": metric["name"], "subset": "OVERALL", "score": metric.get("score"), "num": metric.get("num"),
+            })
+            for category in metric.get("categories", []):
+                for subset in category.get("subsets", []):
+                    scores.append({
+                        "run": record["run"], "model": record["model"], "benchmark": record["benchmark"],
+                        "metric": metric["name"], "subset": subset["name"], "score": subset.get("score"),
+                        "num": subset.get("num"),
+                    })
+
+    return {"matrix": matrix, "leaderboard": leaderboard, "history": history, "scores": scores}
+
+
+def _fmt(value: Optional[float], signed: bool = False) -> str:
+    if value is None:
+        return "-"
+    return f"{value:+.4f}" if signed else f"{value:.4f}"
+
+
+def _tables(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """将排行榜数据整理为 (标题, 表头, 行) 形式的表格列表，供各输出格式共用"""
+    matrix = data["matrix"]
+    benchmark_names = [benchmark["name"] for benchmark in matrix["benchmarks"]]
+    tables = [{
+        "title": "排行榜",
+        "header": ["名次", "模型", "平均分数", "平均排名", "benchmark 数"] + benchmark_names,
+        "rows": [
+            [str(item["position"]), item["model"], _fmt(item["mean_score"]),
+             "-" if item["mean_rank"] is None else f"{item['mean_rank']:.2f}", str(item["benchmarks"])]
+            + [_fmt(item["scores"].get(name)) for name in benchmark_names]
+            for item in data["leaderboard"]
+        ],
+    }]
+
+    models = matrix["models"]
+    for benchmark in matrix["benchmarks"]:
+        rows = [
+            ["整体"] + [_fmt(benchmark["overall"].get(model)) for model in models],
+            ["排名"] + [str(benchmark["ranks"].get(model, "-")) for model in models],
+            ["与最佳差值"] + [_fmt(benchmark["deltas"].get(model), signed=True) for model in models],
+        ]
+        rows += [[subset] + [_fmt(scores.get(model)) for model in models] for subset, scores in benchmark["subsets"].items()]
+        rows += [[metric] + [_fmt(scores.get(model)) for model in models]
+                 for metric, scores in benchmark["other_metrics"].items()]
+        tables.append({
+            "title": f"{benchmark['name']}（主指标 {benchmark['metric']}）",
+            "header": ["项目"] + models,
+            "rows": rows,
+        })
+
+    if data["history"]:
+        tables.append({
+            "title": "与上一次运行的差值",
+            "header": ["benchmark", "模型", "上一次", "本次", "差值", "上一次运行", "本次运行"],
+            "rows": [
+                [item["benchmark"], item["model"], _fmt(item["previous"]), _fmt(item["current"]),
+                 _fmt(item["delta"], signed=True), item["previous_run"], item["current_run"]]
+                for item in data["history"]
+            ],
+        })
+    return tables
+
+
+def render_markdown(data: Dict[str, Any]) -> str:
+    """渲染 Markdown 格式的排行榜"""
+    lines = ["# 模型排行榜", ""]
+    for table in _tables(data):
+        lines += [f"## {table['title']}", "", "| " + " | ".join(table["header"]) + " |",
+                  "|" + " --- |" * len(table["header"])]
+        lines += ["| " + " | ".join(row) + " |" for row in table["rows"]]
+        lines.append("")
+    return "\n".join(lines)
+
+
+def render_html(data: Dict[str, Any]) -> str:
+    """渲染 HTML 格式的排行榜"""
+    parts = [
+        "<!DOCTYPE html>",
+        "<html><head><meta charset=\"utf-8\"><title>模型排行榜</title>",
+        "<style>table{border-collapse:collapse;margin-bottom:24px}"
+        "th,td{border:1px solid #ccc;padding:4px 8px;text-align:right}"
+        "th:first-child,td:first-child{text-align:left}</style>",
+        "</head><body>",
+        "<h1>模型排行榜</h1>",
+    ]
+    for table in _tables(data):
+        parts.append(f"<h2>{html.escape(table['title'])}</h2>")
+        parts.append("<table><thead><tr>" + "".join(f"<th>{html.escape(cell)}</th>" for cell in table["header"])
+                     + "</tr></thead><tbody>")
+        for row in table["rows"]:
+            parts.append("<tr>" + "".join(f"<td>{html.escape(cell)}</td>" for cell in row) + "</tr>")
+        parts.append("</tbody></table>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def write_csv(data: Dict[str, Any], output_dir: str) -> List[str]:
+    """写入排行榜和所有分数（长表格式）的 CSV 文件"""
+    leaderboard_path = os.path.join(output_dir, "leaderboard.csv")
+    with open(leaderboard_path, "w", encoding="utf-8", newline="") as f:
+        table = _tables(data)[0]
+        writer = csv.writer(f)
+        writer.writerow(table["header"])
+        writer.writerows(table["rows"])
+
+    scores_path = os.path.join(output_dir, "scores.csv")
+    with open(scores_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["run", "model", "benchmark", "metric", "subset", "score", "num"])
+        writer.writeheader()
+        writer.writerows(data["scores"])
+    return [leaderboard_path, scores_path]
+
+
+def generate_leaderboard(work_dirs: List[str], output_dir: str, formats: List[str] = None) -> List[str]:
+    """
+    生成排行榜文件
+
+    Args:
+        work_dirs: 工作目录列表
+        output_dir: 输出目录
+        formats: 输出格式，可选 md、html、csv，默认全部
+
+    Returns:
+        生成的文件路径列表
+    """
+    formats = formats or ["md", "html", "csv"]
+    data = build_leaderboard(find_reports(work_dirs))
+    os.makedirs(output_dir, exist_ok=True)
+
+    paths = []
+    if "md" in formats:
+        paths.append(os.path.join(output_dir, "leaderboard.md"))
+        with open(paths[-1], "w", encoding="utf-8") as f:
+            f.write(render_markdown(data))
+    if "html" in formats:
+        paths.append(os.path.join(output_dir, "leaderboard.html"))
+        with open(paths[-1], "w", encoding="utf-8") as f:
+            f.write(render_html(data))
+    if "csv" in formats:
+        paths += write_csv(data, output_dir)
+    return paths
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="根据评测报告生成模型排行榜")
+    parser.add_argument(
+        "--work_dirs",
+        type=str,
+        nargs='+',
+        required=True,
+        help="工作目录列表（可以指定多次历史运行）"
+    )
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        default=None,
+        help="输出目录（默认：第一个工作目录）"
+    )
+    parser.add_argument(
+        "--formats",
+        type=str,
+        nargs='+',
+        default=["md", "html", "csv"],
+        choices=["md", "html", "csv"],
+        help="输出格式（默认：md html csv）"
+    )
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    paths = generate_leaderboard(args.work_dirs, args.output_dir or args.work_dirs[0], args.formats)
+    for path in paths:
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
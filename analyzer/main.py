@@ -4,7 +4,10 @@ import json
 import os
 import sys
 import logging
-from typing import Dict, Any, List
+import time
+import traceback
+from contextlib import nullcontext
+from typing import Callable, Dict, Any, List, Optional
 from datetime import datetime
 import glob
 
@@ -12,8 +15,11 @@ import glob
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from analyzer.requirement_agent import RequirementAnalyzer
+from analyzer.matcher import BenchmarkMatcher
 from analyzer.config_generator import ConfigGenerator
 from analyzer.summary_agent import SummaryAgent
+from analyzer.leaderboard import generate_leaderboard
+from analyzer.preflight import CircuitBreaker, run_matrix, run_preflight, save_statuses
 import config
 import benchmarks
 
@@ -32,12 +38,17 @@ def parse_args():
     parser = argparse.ArgumentParser(
         description="基于 AgentScope 的需求到 Benchmark 映射系统"
     )
-    parser.add_argument(
+    requirement_group = parser.add_mutually_exclusive_group(required=True)
+    requirement_group.add_argument(
         "--requirement",
         type=str,
-        required=True,
         help="用户需求描述"
     )
+    requirement_group.add_argument(
+        "--requirements_file",
+        type=str,
+        help="批量需求文件，每行一个需求（空行和 # 开头的行会被忽略）"
+    )
     parser.add_argument(
         "--models",
         type=str,
@@ -46,12 +57,23 @@ def parse_args():
         choices=list(config.LLM_SERVER_CONFIG.keys()),
         help="要评测的模型名称列表（可以指定多个）"
     )
-    # parser.add_argument(
-    #     "--top_k",
-    #     type=int,
-    #     default=5,
-    #     help="返回前 k 个最匹配的 benchmark（默认：5）"
-    # )
+    parser.add_argument(
+        "--local_match",
+        action="store_true",
+        help="使用本地索引匹配 benchmark，不调用 LLM 分析需求（LLM 分析失败时也会自动回退到本地匹配）"
+    )
+    parser.add_argument(
+        "--top_k",
+        type=int,
+        default=3,
+        help="本地匹配时返回前 k 个最匹配的 benchmark（默认：3）"
+    )
+    parser.add_argument(
+        "--analyze_concurrency",
+        type=int,
+        default=4,
+        help="批量需求并发分析数（默认：4）"
+    )
     parser.add_argument(
         "--batch_size",
         type=int,
@@ -88,6 +110,175 @@ def parse_args():
         default=current_time,
         help="工作目录"
     )
+    parser.add_argument(
+        "--no_dedup",
+        action="store_true",
+        help="关闭相同请求去重"
+    )
+    parser.add_argument(
+        "--dedup_cache_dir",
+        type=str,
+        default=None,
+        help="去重响应缓存目录，指定后可跨运行复用模型输出"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="增量评测，只评测新增或变更的样本"
+    )
+    parser.add_argument(
+        "--rescore_only",
+        "--rescore-only",
+        action="store_true",
+        help="离线重新评分：读取 --work_dir 中已有的预测结果重新评分，不调用被评测模型，也不做端点预检；完全离线运行还需指定 --local_match 和 --no_llm_summary"
+    )
+    parser.add_argument(
+        "--rescore_with_judge",
+        action="store_true",
+        help="离线重新评分时允许调用 judge 模型（默认与 --use_llm_judge 同时使用时报错）"
+    )
+    parser.add_argument(
+        "--rescore_workers",
+        type=int,
+        default=None,
+        help="重新评分的进程数，默认为 CPU 核数"
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="流式评测，每条预测结果产生后立即评分，推理和评分并行执行"
+    )
+    parser.add_argument(
+        "--stream_queue_size",
+        type=int,
+        default=None,
+        help="流式评测中推理与评分之间的队列容量，默认为 batch_size 的 4 倍"
+    )
+    parser.add_argument(
+        "--schedule",
+        type=str,
+        default=None,
+        choices=["fifo", "longest_first"],
+        help="请求调度策略，longest_first 按估算的 token 量从大到小发送；指定后记录推理时间线"
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="对 temperature 为 0 的请求开启对冲，耗时超过 p95 后发送重复请求，取先返回的结果"
+    )
+    parser.add_argument(
+        "--compact_artifacts",
+        action="store_true",
+        help="评审结果使用按块压缩的 zstd JSONL 格式保存，输入按内容哈希只存储一份"
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        nargs="?",
+        const="sampling",
+        default=None,
+        choices=["sampling", "deterministic"],
+        help="剖析每个评测单元的 CPU 热点，等待推理服务的时间单独统计，结果写入评测工作目录的 profile/；不带值时使用 sampling"
+    )
+    parser.add_argument(
+        "--track_memory",
+        action="store_true",
+        help="按数据集加载、推理、评分和报告生成分阶段记录进程 RSS 峰值和主要分配位置，写入报告的 harness.memory 字段"
+    )
+    parser.add_argument(
+        "--memory_budget",
+        "--memory-budget",
+        type=float,
+        default=None,
+        help="每个评测单元的进程内存预算（MB），RSS 超出时告警，并按 --memory_budget_action 处理"
+    )
+    parser.add_argument(
+        "--memory_budget_action",
+        type=str,
+        default="stream",
+        choices=["warn", "stream"],
+        help="内存超出预算后的处理方式：warn 只告警，stream 同时将之后的 subset 切换为流式评测（默认）"
+    )
+    parser.add_argument(
+        "--progress_interval",
+        type=float,
+        default=None,
+        help="每隔指定秒数在终端输出评测矩阵各单元的进度、req/s、tokens/s、错误率、当前得分和预计剩余时间"
+    )
+    parser.add_argument(
+        "--metrics_port",
+        type=int,
+        default=None,
+        help="在 127.0.0.1 的指定端口上以 Prometheus 文本格式提供 /metrics 评测指标接口，0 表示自动选择端口"
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="记录各阶段在每个样本和每个 subset 上的耗时，导出为 Chrome Trace / Perfetto 格式的 logs/trace_{benchmark}.json"
+    )
+    parser.add_argument(
+        "--sequential",
+        action="store_true",
+        help="序贯评测模式：按随机批次评测，模型排名确定后提前停止"
+    )
+    parser.add_argument(
+        "--sequential_batch_size",
+        type=int,
+        default=50,
+        help="序贯评测每批样本数（默认：50）"
+    )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="序贯评测排名确定所需的置信度（默认：0.95）"
+    )
+    parser.add_argument(
+        "--ci_width",
+        type=float,
+        default=None,
+        help="序贯评测目标置信区间宽度，所有模型的区间宽度低于该值时停止"
+    )
+    parser.add_argument(
+        "--min_samples",
+        type=int,
+        default=100,
+        help="序贯评测允许提前停止前至少评测的样本数（默认：100）"
+    )
+    parser.add_argument(
+        "--skip_preflight",
+        action="store_true",
+        help="跳过评测前的端点预检"
+    )
+    parser.add_argument(
+        "--preflight_timeout",
+        type=float,
+        default=30,
+        help="端点预检单个请求的超时时间（秒，默认：30）"
+    )
+    parser.add_argument(
+        "--max_model_failures",
+        type=int,
+        default=2,
+        help="同一模型失败的评测单元数达到该值后跳过该模型剩余的评测（默认：2）"
+    )
+    parser.add_argument(
+        "--failure_budget",
+        type=int,
+        default=None,
+        help="整个评测矩阵允许失败的评测单元数，超过后跳过所有剩余评测，默认不限制"
+    )
+    parser.add_argument(
+        "--no_llm_summary",
+        action="store_true",
+        help="只生成本地排行榜，不调用 SummaryAgent 生成总结报告"
+    )
+    parser.add_argument(
+        "--summary_token_budget",
+        type=int,
+        default=2000,
+        help="提供给总结 Agent 的评分矩阵 token 预算（默认：2000）"
+    )
     parser.add_argument(
         "--output",
         type=str,
@@ -98,23 +289,150 @@ def parse_args():
     return parser.parse_args()
 
 
-def analyze_requirement(requirement: str) -> Dict[str, Any]:
+def analyze_requirement(requirement: str, local_match: bool = False, top_k: int = 3) -> Dict[str, Any]:
     """
     分析用户需求
     
     Args:
         requirement: 用户需求描述
+        local_match: 是否直接使用本地索引匹配，不调用 LLM
+        top_k: 本地匹配时返回的 benchmark 数量
         
     Returns:
         分析结果
     """
+    if local_match:
+        return analyze_requirement_locally(requirement, top_k)
+    
     logger.info("开始分析用户需求...")
-    analyzer = RequirementAnalyzer()
-    result = analyzer.analyze(requirement)
+    try:
+        analyzer = RequirementAnalyzer()
+        result = analyzer.analyze(requirement)
+    except Exception as e:
+        logger.warning(f"LLM 需求分析失败: {e}，回退到本地匹配")
+        return analyze_requirement_locally(requirement, top_k)
     logger.info(f"需求分析完成，识别出能力标签: {result.get('capabilities', [])}")
     return result
 
 
+def analyze_requirement_locally(requirement: str, top_k: int = 3) -> Dict[str, Any]:
+    """
+    使用本地 TF-IDF 索引匹配 benchmark，不调用 LLM
+    
+    Args:
+        requirement: 用户需求描述
+        top_k: 返回前 k 个最匹配的 benchmark
+        
+    Returns:
+        分析结果，格式与 RequirementAnalyzer.analyze 一致
+    """
+    logger.info("使用本地索引匹配 benchmark...")
+    matcher = BenchmarkMatcher()
+    matches = matcher.match_requirement(requirement, top_k)
+    capabilities = []
+    for match in matches:
+        capabilities.extend(tag for tag in match["capabilities_covered"] if tag not in capabilities)
+    logger.info(f"本地匹配完成，找到 {len(matches)} 个推荐的 benchmark")
+    return {
+        "capabilities": capabilities,
+        "description": requirement,
+        "key_points": [requirement],
+        "recommended_benchmarks": [
+            {
+                "benchmark": match["benchmark_name"],
+                "reason": match["reason"],
+                "match_score": match["match_score"],
+            }
+            for match in matches
+        ],
+        "source": "benchmark_matcher",
+    }
+
+
+def load_requirements(requirements_file: str) -> List[str]:
+    """
+    读取批量需求文件
+    
+    Args:
+        requirements_file: 需求文件路径，每行一个需求
+        
+    Returns:
+        需求列表
+    """
+    with open(requirements_file, 'r', encoding='utf-8') as f:
+        requirements = [line.strip() for line in f]
+    return [line for line in requirements if line and not line.startswith("#")]
+
+
+def analyze_requirements(
+    requirements: List[str],
+    local_match: bool = False,
+    top_k: int = 3,
+    max_concurrency: int = 4
+) -> List[Dict[str, Any]]:
+    """
+    批量分析用户需求，在同一个事件循环中并发调用 LLM，单个需求分析失败时回退到本地匹配
+    
+    Args:
+        requirements: 需求描述列表
+        local_match: 是否直接使用本地索引匹配，不调用 LLM
+        top_k: 本地匹配时返回的 benchmark 数量
+        max_concurrency: 最大并发分析数
+        
+    Returns:
+        与 requirements 一一对应的分析结果
+    """
+    if local_match:
+        return [analyze_requirement_locally(requirement, top_k) for requirement in requirements]
+    
+    logger.info(f"开始批量分析 {len(requirements)} 个需求...")
+    try:
+        analyzer = RequirementAnalyzer()
+        results = analyzer.analyze_batch(requirements, max_concurrency)
+    except Exception as e:
+        logger.warning(f"LLM 需求分析失败: {e}，回退到本地匹配")
+        return [analyze_requirement_locally(requirement, top_k) for requirement in requirements]
+    
+    analyzed_results = []
+    for requirement, result in zip(requirements, results):
+        if isinstance(result, Exception):
+            logger.warning(f"需求 {requirement!r} 的 LLM 分析失败: {result}，回退到本地匹配")
+            result = analyze_requirement_locally(requirement, top_k)
+        analyzed_results.append(result)
+    return analyzed_results
+
+
+def build_recommended_benchmarks(analyzed_result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    将需求分析返回的 benchmark 推荐整理为推荐列表
+    
+    Args:
+        analyzed_result: 需求分析结果
+        
+    Returns:
+        推荐的 benchmark 列表
+    """
+    if "recommended_benchmarks" not in analyzed_result or not analyzed_result["recommended_benchmarks"]:
+        raise ValueError("需求分析未返回推荐的 benchmark，请检查需求描述或重试")
+    
+    # 使用 requirement_agent 直接返回的 benchmark 推荐
+    agent_benchmarks = analyzed_result["recommended_benchmarks"]
+    recommended_benchmarks = []
+    for bench_rec in agent_benchmarks:
+        recommended_benchmarks.append({
+            "benchmark_name": bench_rec["benchmark"],
+            "pretty_name": bench_rec["benchmark"],  # 可以从 registry 获取
+            "match_score": bench_rec.get("match_score", 1.0),  # agent 推荐的默认高分
+            "reason": bench_rec["reason"],
+            "capabilities_covered": analyzed_result.get("capabilities", []),
+            "source": analyzed_result.get("source", "requirement_agent")
+        })
+    
+    if not recommended_benchmarks:
+        raise ValueError("没有找到推荐的 benchmark")
+    return recommended_benchmarks
+
+
 # def match_benchmarks(
 #     analyzed_result: Dict[str, Any],
 #     top_k: int = 5
@@ -171,32 +489,11 @@ def generate_config(
     
     # 如果指定了模型列表，生成评测配置
     if model_names:
-        logger.info(f"为模型列表 {model_names} 生成评测配置...")
-        config_generator = ConfigGenerator()
-        
-        # 为每个 model 和每个 benchmark 的组合生成配置
-        evaluation_configs = []
-        for model_name in model_names:
-            for benchmark_info in recommended_benchmarks:
-                benchmark_name = benchmark_info["benchmark_name"]
-                
-                config_dict = config_generator.generate_single_config(
-                    benchmark_name=benchmark_name,
-                    model_name=model_name,
-                    batch_size=args.batch_size if args else 1,
-                    max_tokens=args.max_tokens if args else 2048,
-                    limit=args.limit if args else None,
-                    use_llm_judge=args.use_llm_judge if args else False,
-                    judge_model_name=args.judge_model_name if args else None,
-                    work_dir=args.work_dir if args else None,
-                )
-                evaluation_configs.append({
-                    "model": model_name,
-                    "benchmark": benchmark_name,
-                    "config": config_dict
-                })
-        
-        report["evaluation_configs"] = evaluation_configs
+        report["evaluation_configs"] = build_evaluation_configs(
+            model_names,
+            [benchmark_info["benchmark_name"] for benchmark_info in recommended_benchmarks],
+            args
+        )
         report["model_names"] = model_names
     else:
         report["evaluation_configs"] = []
@@ -205,6 +502,79 @@ def generate_config(
     return report
 
 
+def build_evaluation_configs(
+    model_names: List[str],
+    benchmark_names: List[str],
+    args: argparse.Namespace = None
+) -> List[Dict[str, Any]]:
+    """
+    为每个 model 和每个 benchmark 的组合生成评测配置
+    
+    Args:
+        model_names: 模型名称列表
+        benchmark_names: benchmark 名称列表
+        args: 命令行参数
+        
+    Returns:
+        评测配置列表，每个元素包含 model、benchmark 和 config
+    """
+    logger.info(f"为模型列表 {model_names} 生成评测配置...")
+    config_generator = ConfigGenerator()
+    
+    evaluation_configs = []
+    for model_name in model_names:
+        for benchmark_name in benchmark_names:
+            config_dict = config_generator.generate_single_config(
+                benchmark_name=benchmark_name,
+                model_name=model_name,
+                batch_size=args.batch_size if args else 1,
+                max_tokens=args.max_tokens if args else 2048,
+                limit=args.limit if args else None,
+                use_llm_judge=args.use_llm_judge if args else False,
+                judge_model_name=args.judge_model_name if args else None,
+                work_dir=args.work_dir if args else None,
+                harness_options=get_harness_options(args) if args else None,
+            )
+            evaluation_configs.append({
+                "model": model_name,
+                "benchmark": benchmark_name,
+                "config": config_dict
+            })
+    return evaluation_configs
+
+
+def get_harness_options(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    提取 harness 扩展参数
+    
+    Args:
+        args: 命令行参数
+        
+    Returns:
+        harness 扩展参数字典，字段名与 benchmark 命令行参数一致
+    """
+    return {
+        "no_dedup": args.no_dedup,
+        "dedup_cache_dir": args.dedup_cache_dir,
+        "incremental": args.incremental,
+        "rescore_only": args.rescore_only,
+        "rescore_workers": args.rescore_workers,
+        "rescore_with_judge": args.rescore_with_judge,
+        "streaming": args.streaming,
+        "stream_queue_size": args.stream_queue_size,
+        "compact_artifacts": args.compact_artifacts,
+        "schedule": args.schedule,
+        "hedge": args.hedge,
+        "trace": args.trace,
+        "profile": args.profile,
+        "track_memory": args.track_memory,
+        "memory_budget": args.memory_budget,
+        "memory_budget_action": args.memory_budget_action,
+        "progress_interval": args.progress_interval,
+        "metrics_port": args.metrics_port,
+    }
+
+
 def run_evaluation(config_dict: Dict[str, Any]):
     """
     执行评测
@@ -213,7 +583,7 @@ def run_evaluation(config_dict: Dict[str, Any]):
         config_dict: 评测配置字典
     """
 
-    from evalscope.run import run_task
+    from harness.runner import run_task
     
     logger.info("开始执行评测...")
     run_task(config_dict)
@@ -224,30 +594,21 @@ def run_evaluation(config_dict: Dict[str, Any]):
 def main():
     """主函数"""
     args = parse_args()
+    if args.rescore_only and args.use_llm_judge and not args.rescore_with_judge:
+        logger.error("离线重新评分不调用任何模型，使用 --use_llm_judge 时需同时指定 --rescore_with_judge")
+        sys.exit(1)
+    if args.rescore_only and not args.local_match:
+        logger.warning("--rescore_only 只跳过被评测模型的调用，需求分析仍会调用 LLM；完全离线运行请同时指定 --local_match")
+    
+    if args.requirements_file:
+        run_batch(args)
+        return
     
     # 1. 分析需求
-    analyzed_result = analyze_requirement(args.requirement)
+    analyzed_result = analyze_requirement(args.requirement, args.local_match, args.top_k)
     
     # 2. 获取推荐的 benchmark（使用 requirement_agent 返回的）
-    if "recommended_benchmarks" not in analyzed_result or not analyzed_result["recommended_benchmarks"]:
-        raise ValueError("需求分析未返回推荐的 benchmark，请检查需求描述或重试")
-    
-    # 使用 requirement_agent 直接返回的 benchmark 推荐
-    agent_benchmarks = analyzed_result["recommended_benchmarks"]
-    recommended_benchmarks = []
-    for bench_rec in agent_benchmarks:
-        recommended_benchmarks.append({
-            "benchmark_name": bench_rec["benchmark"],
-            "pretty_name": bench_rec["benchmark"],  # 可以从 registry 获取
-            "match_score": 1.0,  # agent 推荐的默认高分
-            "reason": bench_rec["reason"],
-            "capabilities_covered": analyzed_result.get("capabilities", []),
-            "source": "requirement_agent"
-        })
-    
-    if not recommended_benchmarks:
-        raise ValueError("没有找到推荐的 benchmark")
-    
+    recommended_benchmarks = build_recommended_benchmarks(analyzed_result)
     
     # 3. 生成报告
     model_names = args.models if args.models else []
@@ -260,48 +621,293 @@ def main():
     )
     
     # 4. 输出报告
+    save_config(config, args.output)
+    
+    # 5. 执行评测（循环执行所有 model 和 benchmark 的组合）
+    run_evaluations(config["evaluation_configs"], args)
+    
+    # 6. 生成排行榜（本地确定性计算）
+    write_leaderboard(args.work_dir)
+    
+    # 7. 生成评估总结报告
+    if not args.no_llm_summary:
+        generate_summary_report(
+            args.requirement, model_names, recommended_benchmarks, args.work_dir, args.work_dir,
+            args.summary_token_budget
+        )
+    
+    # # 生成 Markdown 报告
+    # summary_agent.write_markdown_report(
+    #     requirement=args.requirement,
+    #     summary_data=summary_data,
+    #     model_names=model_names,
+    #     benchmark_names=[b["benchmark_name"] for b in recommended_benchmarks],
+    #     work_dir=args.work_dir
+    # )
+
+
+def run_batch(args: argparse.Namespace):
+    """
+    批量需求模式
+    
+    并发分析所有需求后合并推荐的 benchmark，每个 model × benchmark 组合只评测一次，
+    评测结果供所有需要该 benchmark 的需求共用；每个需求的总结报告保存在 work_dir/requirements/{序号}/ 下
+    
+    Args:
+        args: 命令行参数
+    """
+    requirements = load_requirements(args.requirements_file)
+    if not requirements:
+        raise ValueError(f"需求文件为空: {args.requirements_file}")
+    
+    # 1. 并发分析所有需求
+    analyzed_results = analyze_requirements(requirements, args.local_match, args.top_k, args.analyze_concurrency)
+    
+    # 2. 合并所有需求推荐的 benchmark
+    requirement_items = []
+    benchmark_names: List[str] = []
+    for requirement, analyzed_result in zip(requirements, analyzed_results):
+        recommended_benchmarks = build_recommended_benchmarks(analyzed_result)
+        requirement_items.append({
+            "requirement": requirement,
+            "analyzed_capabilities": analyzed_result.get("capabilities", []),
+            "analyzed_description": analyzed_result.get("description", ""),
+            "key_points": analyzed_result.get("key_points", []),
+            "recommended_benchmarks": recommended_benchmarks,
+        })
+        for benchmark_info in recommended_benchmarks:
+            if benchmark_info["benchmark_name"] not in benchmark_names:
+                benchmark_names.append(benchmark_info["benchmark_name"])
+    logger.info(f"{len(requirements)} 个需求共需评测 {len(benchmark_names)} 个 benchmark: {benchmark_names}")
+    
+    # 3. 生成报告
+    model_names = args.models if args.models else []
+    config = {
+        "requirements": requirement_items,
+        "benchmarks": benchmark_names,
+        "evaluation_configs": build_evaluation_configs(model_names, benchmark_names, args) if model_names else [],
+        "model_names": model_names,
+    }
+    
+    # 4. 输出报告
+    save_config(config, args.output)
+    
+    # 5. 执行评测，每个 model × benchmark 组合只执行一次
+    run_evaluations(config["evaluation_configs"], args)
+    
+    # 6. 生成排行榜（本地确定性计算）
+    write_leaderboard(args.work_dir)
+    if args.no_llm_summary:
+        return
+    
+    # 7. 为每个需求生成评估总结报告
+    for index, item in enumerate(requirement_items, start=1):
+        summary_dir = os.path.join(args.work_dir, "requirements", f"{index:03d}")
+        os.makedirs(summary_dir, exist_ok=True)
+        with open(os.path.join(summary_dir, "requirement.txt"), 'w', encoding='utf-8') as f:
+            f.write(item["requirement"] + "\n")
+        generate_summary_report(
+            item["requirement"], model_names, item["recommended_benchmarks"], args.work_dir, summary_dir,
+            args.summary_token_budget
+        )
+
+
+def save_config(config: Dict[str, Any], output: str = None):
+    """
+    输出配置文件
+    
+    Args:
+        config: 配置字典
+        output: 输出路径，为 None 时输出到标准输出
+    """
     config_json = json.dumps(config, ensure_ascii=False, indent=2)
     
-    if args.output:
-        with open(args.output, 'w', encoding='utf-8') as f:
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
             f.write(config_json)
-        logger.info(f"报告已保存到: {args.output}")
+        logger.info(f"报告已保存到: {output}")
     else:
         print(config_json)
+
+
+def run_evaluations(evaluation_configs: List[Dict[str, Any]], args: argparse.Namespace):
+    """
+    执行所有 model 和 benchmark 组合的评测
     
-    # 5. 执行评测（循环执行所有 model 和 benchmark 的组合）
-    for config_item in config["evaluation_configs"]:
-        model_name = config_item.get("model")
-        benchmark_name = config_item.get("benchmark")
-        
-        config_dict = config_item.get("config")
-        
-        run_evaluation(config_dict)
-        logger.info(f"Model {model_name} 和 Benchmark {benchmark_name} 评测完成")
+    评测前并发预检所有模型端点（结果保存到 work_dir/preflight.json），预检失败的模型直接跳过；
+    离线重新评分（--rescore_only）不调用被评测模型，不做预检；
+    每个评测单元失败只影响自身，同一模型失败过多时熔断，各单元状态保存到 work_dir/matrix_status.json；
+    指定 --progress_interval 或 --metrics_port 时，整个矩阵的实时进度输出到终端或 /metrics 接口
+    
+    Args:
+        evaluation_configs: 评测配置列表
+        args: 命令行参数
+    """
+    from harness.progress import BOARD, LiveProgress
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    breaker = CircuitBreaker(args.max_model_failures, args.failure_budget)
+    live = args.progress_interval or args.metrics_port is not None
+    if live:
+        for config_item in evaluation_configs:
+            BOARD.cell(config_item["model"], config_item["benchmark"])
+    
+    # 1. 并发预检所有模型端点，预检失败的模型不参与评测
+    if not args.skip_preflight and not args.rescore_only:
+        model_names = list(dict.fromkeys(config_item["model"] for config_item in evaluation_configs))
+        probes = run_preflight(model_names, args.preflight_timeout, os.path.join(args.work_dir, "preflight.json"))
+        for model_name, probe in probes.items():
+            if not probe["ok"]:
+                breaker.trip(model_name, f"端点预检失败: {probe['error']}")
+    
+    # 2. 逐个执行评测单元，单元失败不影响其他单元
+    def on_status(status: Dict[str, Any]):
+        if live and status["status"] != "ok":
+            BOARD.cell(status["model"], status["benchmark"]).finish(status["status"])
+
+    if args.sequential:
+        with LiveProgress(args.progress_interval, args.metrics_port) if live else nullcontext():
+            run_sequential_evaluation(
+                evaluation_configs, args, breaker, os.path.join(args.work_dir, "matrix_status.json"), on_status
+            )
+        return
+
+    with LiveProgress(args.progress_interval, args.metrics_port) if live else nullcontext():
+        statuses = run_matrix(
+            evaluation_configs, run_evaluation, breaker, os.path.join(args.work_dir, "matrix_status.json"), on_status
+        )
+    counts = {state: sum(status["status"] == state for status in statuses) for state in ("ok", "failed", "skipped")}
+    logger.info(f"评测矩阵完成: 成功 {counts['ok']}，失败 {counts['failed']}，跳过 {counts['skipped']}")
+
+
+def write_leaderboard(work_dir: str):
+    """
+    根据工作目录中的评测报告生成排行榜（leaderboard.md / leaderboard.html / leaderboard.csv / scores.csv）
+    
+    Args:
+        work_dir: 评测工作目录
+    """
+    paths = generate_leaderboard([work_dir], work_dir)
+    logger.info(f"排行榜已保存到: {', '.join(paths)}")
+
+
+def generate_summary_report(
+    requirement: str,
+    model_names: List[str],
+    recommended_benchmarks: List[Dict[str, Any]],
+    work_dir: str,
+    summary_dir: str,
+    token_budget: int = 2000
+):
+    """
+    生成评估总结报告
     
-    # 6. 生成评估总结报告
+    Args:
+        requirement: 用户需求
+        model_names: 模型名称列表
+        recommended_benchmarks: 该需求推荐的 benchmark 列表
+        work_dir: 评测工作目录
+        summary_dir: 总结报告 report.md 的保存目录
+        token_budget: 提供给总结 Agent 的评分矩阵 token 预算
+    """
     logger.info("开始生成评估总结报告...")
-    evaluation_reports = collect_evaluation_reports(args.work_dir, model_names, recommended_benchmarks)
+    evaluation_reports = collect_evaluation_reports(work_dir, model_names, recommended_benchmarks)
     
     if evaluation_reports:
-        summary_agent = SummaryAgent()
+        summary_agent = SummaryAgent(token_budget=token_budget)
         summary_agent.generate_summary(
-            requirement=args.requirement,
+            requirement=requirement,
             evaluation_reports=evaluation_reports,
-            work_dir=args.work_dir
+            work_dir=summary_dir
         )
+
+
+def run_sequential_evaluation(
+    evaluation_configs: List[Dict[str, Any]],
+    args: argparse.Namespace,
+    breaker: CircuitBreaker = None,
+    status_path: str = None,
+    on_status: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    以序贯模式执行评测，每个 benchmark 上的模型排名确定后提前停止
+    
+    与普通评测矩阵相同的故障隔离：某个模型失败只将其移出该 benchmark 的对比，整个 benchmark 的对比失败
+    也不影响其他 benchmark；失败按 (model, benchmark) 计入熔断器，熔断的模型在之后的 benchmark 中跳过，
+    各单元状态保存到 status_path
+    
+    Args:
+        evaluation_configs: 所有 model 和 benchmark 组合的评测配置
+        args: 命令行参数
+        breaker: 熔断器，为 None 时按命令行参数新建
+        status_path: 单元状态的保存路径（如 work_dir/matrix_status.json），为 None 时不保存
+        on_status: 每个单元结束（包括跳过）时的回调
         
-       
-        # # 生成 Markdown 报告
-        # summary_agent.write_markdown_report(
-        #     requirement=args.requirement,
-        #     summary_data=summary_data,
-        #     model_names=model_names,
-        #     benchmark_names=[b["benchmark_name"] for b in recommended_benchmarks],
-        #     work_dir=args.work_dir
-        # )
-        
+    Returns:
+        序贯评测结果，格式为 {benchmark_name: result}，同时保存到 work_dir/sequential.json
+    """
+    from harness.sequential import SequentialComparison
+    
+    configs_by_benchmark: Dict[str, Dict[str, Any]] = {}
+    for config_item in evaluation_configs:
+        configs_by_benchmark.setdefault(config_item["benchmark"], {})[config_item["model"]] = config_item["config"]
+    
+    if breaker is None:
+        breaker = CircuitBreaker(args.max_model_failures, args.failure_budget)
+    results, statuses = {}, []
+    for benchmark_name, model_configs in configs_by_benchmark.items():
+        healthy_configs = {}
+        for model_name, model_config in model_configs.items():
+            reason = breaker.skip_reason(model_name)
+            if reason:
+                logger.warning(f"跳过 Model {model_name} 和 Benchmark {benchmark_name}: {reason}")
+                status = {
+                    "model": model_name, "benchmark": benchmark_name, "status": "skipped", "error": reason, "seconds": 0.0
+                }
+                statuses.append(status)
+                if on_status:
+                    on_status(status)
+            else:
+                healthy_configs[model_name] = model_config
         
+        if healthy_configs:
+            logger.info(f"开始序贯评测 Benchmark {benchmark_name}，模型: {list(healthy_configs.keys())}")
+            start = time.perf_counter()
+            try:
+                comparison = SequentialComparison(
+                    benchmark_name=benchmark_name,
+                    model_configs=healthy_configs,
+                    batch_size=args.sequential_batch_size,
+                    confidence=args.confidence,
+                    ci_width=args.ci_width,
+                    min_samples=args.min_samples,
+                )
+                results[benchmark_name] = comparison.run()
+                failures = results[benchmark_name]["failures"]
+            except Exception as e:
+                logger.error(f"Benchmark {benchmark_name} 序贯评测失败: {e}\n{traceback.format_exc()}")
+                failures = {model_name: f"{type(e).__name__}: {e}" for model_name in healthy_configs}
+            seconds = round(time.perf_counter() - start, 3)
+            for model_name in healthy_configs:
+                status = {"model": model_name, "benchmark": benchmark_name, "status": "ok", "error": None, "seconds": seconds}
+                if model_name in failures:
+                    breaker.record_failure(model_name)
+                    status.update(status="failed", error=failures[model_name])
+                else:
+                    breaker.record_success(model_name)
+                statuses.append(status)
+                if on_status:
+                    on_status(status)
+        if status_path:
+            save_statuses(statuses, status_path)
+    
+    counts = {state: sum(status["status"] == state for status in statuses) for state in ("ok", "failed", "skipped")}
+    logger.info(f"序贯评测矩阵完成: 成功 {counts['ok']}，失败 {counts['failed']}，跳过 {counts['skipped']}")
+    output_path = os.path.join(args.work_dir, "sequential.json")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    logger.info(f"序贯评测结果已保存到: {output_path}")
+    return results
 
 
 def collect_evaluation_reports(
@@ -337,10 +943,16 @@ def collect_evaluation_reports(
             cleaned_model_name = model_name.replace('/', '-')
             
             report_path = os.path.join(work_dir, benchmark_name, f"{cleaned_model_name}_{params}", "reports")
-            report_file = glob.glob(os.path.join(report_path, "*", "*.json"), recursive=True)[0]
-            with open(report_file, 'r', encoding='utf-8') as f:
+            report_files = glob.glob(os.path.join(report_path, "*", "*.json"), recursive=True)
+            if not report_files:
+                logger.warning(f"未找到 Model {model_name} 在 Benchmark {benchmark_name} 上的评测报告，总结中将缺少该结果")
+                continue
+            with open(report_files[0], 'r', encoding='utf-8') as f:
                 report_data = json.load(f)
             evaluation_reports[benchmark_name][model_name] = report_data
+        
+        if not evaluation_reports[benchmark_name]:
+            del evaluation_reports[benchmark_name]
 
     return evaluation_reports
 
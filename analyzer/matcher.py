@@ -1,13 +1,183 @@
 """需求匹配引擎，将需求分析结果与 benchmark 能力标签匹配，生成推荐理由。"""
-from typing import List, Dict, Any
-from .benchmark_registry import get_all_benchmarks, BenchmarkInfo
+import os
+import re
+import json
+import math
+from typing import List, Dict, Any, Optional
+from evalscope.constants import Tags
+from .benchmark_registry import get_all_benchmarks, get_registry_version, BenchmarkInfo
+import config
+
+
+# 英文单词和数字
+_WORD_PATTERN = re.compile(r"[a-z0-9_]+")
+# 中日韩字符连续片段
+_CJK_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+")
+
+# 需求描述中的关键词到能力标签的映射，用于不调用 LLM 时推断能力标签
+CAPABILITY_KEYWORDS = {
+    Tags.REASONING: ["推理", "多步", "reasoning"],
+    Tags.LONG_CONTEXT: ["长上下文", "长文本", "长文档", "long context"],
+    Tags.CODING: ["代码", "编程", "sql", "数据库", "code", "coding"],
+    Tags.KNOWLEDGE: ["知识", "事实", "knowledge"],
+    Tags.QA: ["问答", "回答问题", "qa"],
+    Tags.FUNCTION_CALLING: ["函数调用", "工具", "api", "agent", "function call", "tool"],
+    Tags.RETRIEVAL: ["检索", "rag", "retrieval"],
+    Tags.HALLUCINATION: ["幻觉", "hallucination"],
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    分词：英文按单词切分，中日韩文本按字符二元组切分（单字片段保留单字）
+
+    Args:
+        text: 待分词文本
+
+    Returns:
+        词项列表
+    """
+    text = text.lower()
+    tokens = _WORD_PATTERN.findall(text)
+    for segment in _CJK_PATTERN.findall(text):
+        if len(segment) == 1:
+            tokens.append(segment)
+        else:
+            tokens.extend(segment[i:i + 2] for i in range(len(segment) - 1))
+    return tokens
+
+
+def _keyword_pattern(keywords: List[str]) -> re.Pattern:
+    """中日韩关键词按子串匹配；英文关键词按整词匹配（允许复数 s），避免 decode 命中 code、rapid 命中 api"""
+    alternatives = []
+    for keyword in keywords:
+        if _CJK_PATTERN.search(keyword):
+            alternatives.append(re.escape(keyword))
+        else:
+            alternatives.append(rf"(?<![a-z0-9_]){re.escape(keyword)}s?(?![a-z0-9_])")
+    return re.compile("|".join(alternatives))
+
+
+_CAPABILITY_PATTERNS = {tag: _keyword_pattern(keywords) for tag, keywords in CAPABILITY_KEYWORDS.items()}
+
+
+def infer_capabilities(text: str) -> List[str]:
+    """根据关键词从需求描述中推断能力标签"""
+    text = text.lower()
+    return [tag for tag, pattern in _CAPABILITY_PATTERNS.items() if pattern.search(text)]
+
+
+def normalize_tag(tag: str) -> str:
+    """统一能力标签写法，使 LLM 输出的 LONG_CONTEXT 与注册表中的 LongContext 等价"""
+    return tag.lower().replace("_", "").replace("/", "")
+
+
+def matched_capabilities(benchmark: BenchmarkInfo, capabilities: List[str]) -> List[str]:
+    """返回 benchmark 覆盖的能力标签"""
+    benchmark_tags = {normalize_tag(tag) for tag in benchmark.tags}
+    return [tag for tag in capabilities if normalize_tag(tag) in benchmark_tags]
+
+
+def _benchmark_text(benchmark: BenchmarkInfo) -> str:
+    return " ".join([benchmark.name, benchmark.pretty_name, benchmark.description] + list(benchmark.use_cases))
+
+
+class BenchmarkIndex:
+    """
+    Benchmark 描述和适用场景的 TF-IDF 倒排索引
+
+    每个 benchmark 的文本表示为 L2 归一化的稀疏向量，倒排索引记录每个词项出现在哪些 benchmark 中及其权重，
+    查询时只遍历查询词项的倒排列表。索引按注册表版本缓存到磁盘，注册表变化时自动重建。
+    """
+
+    def __init__(self, benchmarks: Dict[str, BenchmarkInfo], cache_path: Optional[str] = None):
+        """
+        Args:
+            benchmarks: benchmark 注册表
+            cache_path: 索引缓存文件路径，为 None 时不缓存
+        """
+        self.registry_version = get_registry_version()
+        self.idf: Dict[str, float] = {}
+        self.postings: Dict[str, List[List[Any]]] = {}
+        if not self._load(cache_path):
+            self._build(benchmarks)
+            self._save(cache_path)
+
+    def _build(self, benchmarks: Dict[str, BenchmarkInfo]) -> None:
+        term_counts = {name: {} for name in benchmarks}
+        document_freq: Dict[str, int] = {}
+        for name, info in benchmarks.items():
+            counts = term_counts[name]
+            for token in tokenize(_benchmark_text(info)):
+                counts[token] = counts.get(token, 0) + 1
+            for token in counts:
+                document_freq[token] = document_freq.get(token, 0) + 1
+
+        num_docs = len(benchmarks)
+        self.idf = {token: math.log((1 + num_docs) / (1 + df)) + 1 for token, df in document_freq.items()}
+        self.postings = {}
+        for name, counts in term_counts.items():
+            vector = {token: (1 + math.log(count)) * self.idf[token] for token, count in counts.items()}
+            norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+            for token, weight in vector.items():
+                self.postings.setdefault(token, []).append([name, weight / norm])
+
+    def _load(self, cache_path: Optional[str]) -> bool:
+        if not cache_path or not os.path.exists(cache_path):
+            return False
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("registry_version") != self.registry_version:
+            return False
+        self.idf = data["idf"]
+        self.postings = data["postings"]
+        return True
+
+    def _save(self, cache_path: Optional[str]) -> None:
+        if not cache_path:
+            return
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"registry_version": self.registry_version, "idf": self.idf, "postings": self.postings},
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, cache_path)
+
+    def vectorize(self, text: str) -> Dict[str, float]:
+        """将查询文本转换为 L2 归一化的 TF-IDF 向量，只保留索引中出现过的词项"""
+        counts: Dict[str, int] = {}
+        for token in tokenize(text):
+            if token in self.idf:
+                counts[token] = counts.get(token, 0) + 1
+        vector = {token: (1 + math.log(count)) * self.idf[token] for token, count in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        return {token: weight / norm for token, weight in vector.items()}
+
+    def similarities(self, query_vector: Dict[str, float]) -> Dict[str, float]:
+        """计算查询向量与所有 benchmark 的余弦相似度，未出现的 benchmark 相似度为 0"""
+        scores: Dict[str, float] = {}
+        for token, query_weight in query_vector.items():
+            for name, weight in self.postings.get(token, []):
+                scores[name] = scores.get(name, 0.0) + query_weight * weight
+        return scores
 
 
 class BenchmarkMatcher:
     """Benchmark 匹配器"""
     
-    def __init__(self):
+    def __init__(self, cache_path: Optional[str] = os.path.join(config.CACHE_DIR, "benchmark_index.json")):
+        """
+        Args:
+            cache_path: benchmark 文本索引的缓存文件路径，为 None 时不缓存
+        """
         self.benchmarks = get_all_benchmarks()
+        self.index = BenchmarkIndex(self.benchmarks, cache_path)
     
     def match(
         self,
@@ -27,12 +197,13 @@ class BenchmarkMatcher:
             匹配结果列表，每个结果包含 benchmark_name, match_score, reason, capabilities_covered
         """
         scores = []
+        similarities = self.index.similarities(self.index.vectorize(analyzed_description))
         
         for benchmark_name, benchmark_info in self.benchmarks.items():
             score = self._calculate_match_score(
                 benchmark_info,
                 analyzed_capabilities,
-                analyzed_description
+                similarities.get(benchmark_name, 0.0)
             )
             
             if score > 0:  # 只返回有匹配的
@@ -43,10 +214,7 @@ class BenchmarkMatcher:
                 )
                 
                 # 找出匹配的能力标签
-                matched_tags = [
-                    tag for tag in analyzed_capabilities
-                    if tag in benchmark_info.tags
-                ]
+                matched_tags = matched_capabilities(benchmark_info, analyzed_capabilities)
                 
                 scores.append({
                     "benchmark_name": benchmark_name,
@@ -68,7 +236,7 @@ class BenchmarkMatcher:
         self,
         benchmark: BenchmarkInfo,
         analyzed_capabilities: List[str],
-        analyzed_description: str
+        description_similarity: float
     ) -> float:
         """
         计算匹配分数
@@ -76,38 +244,37 @@ class BenchmarkMatcher:
         Args:
             benchmark: Benchmark 信息
             analyzed_capabilities: 分析得到的能力标签
-            analyzed_description: 分析得到的需求描述
+            description_similarity: 需求描述与 benchmark 描述、适用场景的余弦相似度
             
         Returns:
             匹配分数 (0-1)
         """
+        # 没有能力标签时只按描述相似度匹配
         if not analyzed_capabilities:
-            return 0.0
+            return round(description_similarity, 3)
         
         # 计算标签匹配度
-        matched_tags = [tag for tag in analyzed_capabilities if tag in benchmark.tags]
-        tag_score = len(matched_tags) / len(analyzed_capabilities) if analyzed_capabilities else 0.0
-        
-        # 计算描述匹配度（简单的关键词匹配）
-        description_score = 0.0
-        if analyzed_description:
-            # 从 benchmark 的描述和使用场景中提取关键词
-            benchmark_text = (
-                benchmark.description + " " +
-                " ".join(benchmark.use_cases)
-            ).lower()
-            
-            # 简单的关键词匹配
-            description_lower = analyzed_description.lower()
-            common_words = set(benchmark_text.split()) & set(description_lower.split())
-            if len(common_words) > 0:
-                description_score = min(len(common_words) / 10.0, 0.3)  # 最多贡献 0.3 分
+        matched_tags = matched_capabilities(benchmark, analyzed_capabilities)
+        tag_score = len(matched_tags) / len(analyzed_capabilities)
         
         # 综合分数：标签匹配度占 70%，描述匹配度占 30%
-        total_score = tag_score * 0.7 + description_score * 0.3
+        total_score = tag_score * 0.7 + description_similarity * 0.3
         
         return round(total_score, 3)
     
+    def match_requirement(self, requirement: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        不调用 LLM，直接根据需求原文匹配 benchmark，能力标签通过关键词推断
+        
+        Args:
+            requirement: 用户需求描述
+            top_k: 返回前 k 个最匹配的 benchmark
+            
+        Returns:
+            匹配结果列表，格式同 match
+        """
+        return self.match(infer_capabilities(requirement), requirement, top_k)
+    
     def _generate_reason(
         self,
         benchmark: BenchmarkInfo,
@@ -125,7 +292,7 @@ class BenchmarkMatcher:
         Returns:
             推荐理由文本
         """
-        matched_tags = [tag for tag in analyzed_capabilities if tag in benchmark.tags]
+        matched_tags = matched_capabilities(benchmark, analyzed_capabilities)
         
         reason_parts = []
         
@@ -142,7 +309,8 @@ class BenchmarkMatcher:
                 "HALLUCINATION": "幻觉检测能力",
                 "YES_NO": "是/否判断能力",
             }
-            matched_names = [tag_names.get(tag, tag) for tag in matched_tags]
+            tag_names = {normalize_tag(tag): name for tag, name in tag_names.items()}
+            matched_names = [tag_names.get(normalize_tag(tag), tag) for tag in matched_tags]
             reason_parts.append(
                 f"该需求涉及 {', '.join(matched_names)}，"
                 f"而 {benchmark.pretty_name} 专门评测这些能力。"
@@ -0,0 +1,202 @@
+"""端点预检和评测矩阵的故障隔离，评测开始前并发探测每个模型端点，评测过程中按模型熔断，单个端点故障不影响其他模型的评测。"""
+import json
+import os
+import sys
+import time
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def probe_endpoint(model_name: str, timeout: float = 30.0) -> Dict[str, Any]:
+    """
+    探测单个模型端点
+
+    先请求 /models 检查鉴权和模型 id 是否在列表中（部分服务不支持该接口，此时记为 None），
+    再发送 max_tokens 为 1 的对话请求，确认端点、鉴权和模型 id 均可用，并记录延迟。
+
+    Args:
+        model_name: LLM_SERVER_CONFIG 中的模型名称
+        timeout: 单个请求的超时时间（秒）
+
+    Returns:
+        {"model", "ok", "latency", "model_listed", "error"}
+    """
+    from openai import APIStatusError, AuthenticationError, OpenAI
+
+    result = {"model": model_name, "ok": False, "latency": None, "model_listed": None, "error": None}
+    model_config = config.LLM_SERVER_CONFIG.get(model_name)
+    if not model_config:
+        result["error"] = "模型未在 LLM_SERVER_CONFIG 中配置"
+        return result
+    if not model_config.get("url"):
+        result["error"] = "未配置 url"
+        return result
+    if not model_config.get("api_key"):
+        result["error"] = "未配置 api_key"
+        return result
+
+    base_url = model_config["url"].rstrip("/").removesuffix("/chat/completions")
+    client = OpenAI(api_key=model_config["api_key"], base_url=base_url, timeout=timeout, max_retries=0)
+    try:
+        model_ids = {item.id for item in client.models.list()}
+        result["model_listed"] = model_config["model"] in model_ids
+    except AuthenticationError as e:
+        result["error"] = f"鉴权失败: {e}"
+        return result
+    except Exception:
+        pass
+
+    start = time.perf_counter()
+    try:
+        client.chat.completions.create(
+            model=model_config["model"],
+            messages=[{"role": "user", "content": "ping"}],
+            max_tokens=1,
+            temperature=0,
+        )
+        result["ok"] = True
+    except AuthenticationError as e:
+        result["error"] = f"鉴权失败: {e}"
+    except APIStatusError as e:
+        result["error"] = f"HTTP {e.status_code}: {e.message}"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["latency"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def run_preflight(model_names: List[str], timeout: float = 30.0, output_path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    并发探测所有模型端点
+
+    Args:
+        model_names: 模型名称列表
+        timeout: 单个请求的超时时间（秒）
+        output_path: 探测结果的保存路径（如 work_dir/preflight.json），为 None 时不保存
+
+    Returns:
+        探测结果字典，格式为 {model_name: probe_endpoint 的返回值}
+    """
+    if not model_names:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(model_names)) as executor:
+        probes = list(executor.map(lambda name: probe_endpoint(name, timeout), model_names))
+    results = {probe["model"]: probe for probe in probes}
+
+    for probe in probes:
+        if probe["ok"]:
+            listed = "" if probe["model_listed"] is not False else "（/models 列表中未找到该模型 id）"
+            logger.info(f"端点预检通过: {probe['model']}，延迟 {probe['latency']}s{listed}")
+        else:
+            logger.error(f"端点预检失败: {probe['model']}，{probe['error']}")
+
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return results
+
+
+class CircuitBreaker:
+    """
+    评测矩阵的熔断器
+
+    同一模型失败的评测单元（model × benchmark）达到 max_model_failures 后熔断，跳过该模型剩余的单元；
+    整个矩阵失败的单元数超过 failure_budget 后跳过所有剩余单元。
+
+    Args:
+        max_model_failures: 单个模型允许失败的单元数
+        failure_budget: 整个矩阵允许失败的单元数，为 None 时不限制
+    """
+
+    def __init__(self, max_model_failures: int = 2, failure_budget: Optional[int] = None):
+        self.max_model_failures = max_model_failures
+        self.failure_budget = failure_budget
+        self.model_failures: Dict[str, int] = {}
+        self.open_reasons: Dict[str, str] = {}
+        self.total_failures = 0
+
+    def trip(self, model_name: str, reason: str) -> None:
+        """直接熔断某个模型（如预检失败）"""
+        self.open_reasons[model_name] = reason
+
+    def skip_reason(self, model_name: str) -> Optional[str]:
+        """该模型的单元应被跳过时返回原因，否则返回 None"""
+        if self.failure_budget is not None and self.total_failures > self.failure_budget:
+            return f"失败的评测单元数超过预算 {self.failure_budget}"
+        return self.open_reasons.get(model_name)
+
+    def record_failure(self, model_name: str) -> None:
+        self.total_failures += 1
+        self.model_failures[model_name] = self.model_failures.get(model_name, 0) + 1
+        if self.model_failures[model_name] >= self.max_model_failures:
+            self.open_reasons[model_name] = f"连续失败 {self.model_failures[model_name]} 个评测单元，已熔断"
+
+    def record_success(self, model_name: str) -> None:
+        self.model_failures[model_name] = 0
+
+
+def run_matrix(
+    evaluation_configs: List[Dict[str, Any]],
+    run_cell: Callable[[Dict[str, Any]], Any],
+    breaker: CircuitBreaker,
+    status_path: Optional[str] = None,
+    on_status: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    依次执行评测矩阵中的每个单元，单元之间相互隔离
+
+    单元抛出的异常只记录为该单元失败，不会中断其他单元；熔断的模型的剩余单元直接跳过。
+
+    Args:
+        evaluation_configs: 评测配置列表，每个元素包含 model、benchmark 和 config
+        run_cell: 执行单个评测单元的函数，参数为 config
+        breaker: 熔断器
+        status_path: 单元状态的保存路径（如 work_dir/matrix_status.json），每个单元结束后更新
+        on_status: 每个单元结束或被跳过后的回调，参数为该单元的状态
+
+    Returns:
+        单元状态列表，每个元素包含 model、benchmark、status（ok / failed / skipped）、error 和 seconds
+    """
+    statuses = []
+    for config_item in evaluation_configs:
+        model_name, benchmark_name = config_item.get("model"), config_item.get("benchmark")
+        status = {"model": model_name, "benchmark": benchmark_name, "status": "ok", "error": None, "seconds": 0.0}
+        reason = breaker.skip_reason(model_name)
+        if reason:
+            status.update(status="skipped", error=reason)
+            logger.warning(f"跳过 Model {model_name} 和 Benchmark {benchmark_name}: {reason}")
+        else:
+            start = time.perf_counter()
+            try:
+                run_cell(config_item.get("config"))
+                breaker.record_success(model_name)
+                logger.info(f"Model {model_name} 和 Benchmark {benchmark_name} 评测完成")
+            except Exception as e:
+                breaker.record_failure(model_name)
+                status.update(status="failed", error=f"{type(e).__name__}: {e}")
+                logger.error(
+                    f"Model {model_name} 和 Benchmark {benchmark_name} 评测失败: {e}\n{traceback.format_exc()}"
+                )
+            status["seconds"] = round(time.perf_counter() - start, 3)
+        statuses.append(status)
+        if on_status is not None:
+            on_status(status)
+
+        if status_path:
+            save_statuses(statuses, status_path)
+    return statuses
+
+
+def save_statuses(statuses: List[Dict[str, Any]], status_path: str) -> None:
+    """保存评测单元状态（如 work_dir/matrix_status.json）"""
+    with open(status_path, 'w', encoding='utf-8') as f:
+        json.dump(statuses, f, ensure_ascii=False, indent=2)
@@ -1,8 +1,11 @@
 """使用 AgentScope 和 DeepSeek API 分析用户需求，提取关键能力点。"""
 import os
+import re
 import json
 import asyncio
-from typing import List, Dict, Any
+import unicodedata
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
 import sys
 from enum import Enum
 
@@ -15,10 +18,96 @@ from agentscope.model import OpenAIChatModel
 from agentscope.formatter import DeepSeekChatFormatter, OpenAIChatFormatter
 from agentscope.memory import InMemoryMemory
 from agentscope.tool import Toolkit
-from analyzer.benchmark_registry import get_all_benchmarks
+from analyzer.benchmark_registry import get_all_benchmarks, get_registry_version
 import config
 
 
+def normalize_requirement(requirement: str) -> str:
+    """规范化需求文本（全半角统一、去除首尾空白、合并连续空白、英文小写），用作缓存键"""
+    text = unicodedata.normalize("NFKC", requirement).strip().lower()
+    return re.sub(r"\s+", " ", text)
+
+
+@lru_cache(maxsize=None)
+def build_system_prompt(registry_version: str) -> str:
+    """构建系统提示词，按注册表版本缓存"""
+    # 获取所有可用的 benchmark 信息
+    benchmarks = get_all_benchmarks()
+    
+    # 构建 benchmark 信息字符串
+    benchmark_info_lines = []
+    for name, info in benchmarks.items():
+        tags_str = ", ".join(info.tags)
+        benchmark_info_lines.append(
+            f"- {name} ({info.pretty_name}): {info.description}\n"
+            f"  能力标签: {tags_str}\n"
+            f"  适用场景: {', '.join(info.use_cases[:2])}"
+        )
+    
+    benchmark_info = "\n".join(benchmark_info_lines)
+    
+    return f"""你是一个专业的 AI 模型能力评估专家。你的任务是分析用户的需求，识别出需要评测的模型基础能力，并从可用的 benchmark 中选择最合适的进行评测。
+
+可用的能力标签包括：
+- REASONING: 推理能力
+- LONG_CONTEXT: 长上下文处理能力
+- CODING: 代码生成能力
+- KNOWLEDGE: 知识理解能力
+- QA: 问答能力
+- FUNCTION_CALLING: 函数调用能力
+- RETRIEVAL: 检索能力
+- HALLUCINATION: 幻觉检测能力
+
+可用的 Benchmark 列表（必须从以下列表中选择）：
+{benchmark_info}
+
+请仔细分析用户需求，提取出关键的能力标签和需求描述，并从上述 benchmark 列表中选择最合适的 benchmark（可以选多个），并为每个选择的 benchmark 提供详细的选择理由。
+
+输出格式要求：
+- capabilities: 能力标签列表
+- description: 需求描述
+- key_points: 关键需求点列表
+- recommended_benchmarks: benchmark 推荐列表，每个包含 benchmark 名称和选择理由"""
+
+
+class AnalysisCache:
+    """
+    需求分析结果缓存
+
+    以 "注册表版本:规范化需求文本" 为键保存到 JSON 文件，注册表变化后旧结果自动失效
+    """
+    
+    def __init__(self, cache_path: Optional[str] = None):
+        self.cache_path = cache_path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+    
+    @staticmethod
+    def key(requirement: str) -> str:
+        return f"{get_registry_version()}:{normalize_requirement(requirement)}"
+    
+    def get(self, requirement: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(self.key(requirement))
+    
+    def put(self, requirement: str, result: Dict[str, Any]) -> None:
+        self.entries[self.key(requirement)] = result
+        self.save()
+    
+    def save(self) -> None:
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.cache_path)
+
+
 class BenchmarkRecommendation(BaseModel):
     """Benchmark 推荐的结构化输出模型"""
     
@@ -55,13 +144,19 @@ class RequirementAnalysisResult(BaseModel):
 class RequirementAnalyzer:
     """需求分析器，使用 AgentScope 分析用户需求"""
     
-    def __init__(self, api_key: str = None, base_url: str = None):
+    def __init__(
+        self,
+        api_key: str = None,
+        base_url: str = None,
+        cache_path: Optional[str] = os.path.join(config.CACHE_DIR, "requirement_analysis.json"),
+    ):
         """
         初始化需求分析器
         
         Args:
             api_key: DeepSeek API key，如果为 None 则从环境变量或 config 读取
             base_url: DeepSeek API base URL，如果为 None 则从 config 读取
+            cache_path: 分析结果缓存文件路径，为 None 时不缓存
         """
         # 从 config 获取 DeepSeek 配置
         deepseek_config = config.LLM_SERVER_CONFIG.get('deepseek-chat', {})
@@ -78,11 +173,18 @@ class RequirementAnalyzer:
             stream=False,
         )
         
+        self.cache = AnalysisCache(cache_path)
+    
+    def _create_agent(self) -> ReActAgent:
+        """
+        创建 ReActAgent
+        
+        每次分析使用独立的 agent 和 memory，避免并发分析时对话历史互相干扰；模型客户端和系统提示词复用
+        """
         # 创建空的工具包（ReActAgent 需要，但我们不需要工具）
         toolkit = Toolkit()
         
-        # 创建 ReActAgent
-        self.agent = ReActAgent(
+        return ReActAgent(
             name="RequirementAnalyzer",
             sys_prompt=self._get_system_prompt(),
             model=self.model,
@@ -93,47 +195,77 @@ class RequirementAnalyzer:
     
     def _get_system_prompt(self) -> str:
         """获取系统提示词"""
-        # 获取所有可用的 benchmark 信息
-        benchmarks = get_all_benchmarks()
+        return build_system_prompt(get_registry_version())
+    
+    async def analyze_async(self, requirement: str) -> Dict[str, Any]:
+        """
+        异步分析用户需求，命中缓存时直接返回缓存结果
         
-        # 构建 benchmark 信息字符串
-        benchmark_info_lines = []
-        for name, info in benchmarks.items():
-            tags_str = ", ".join(info.tags)
-            benchmark_info_lines.append(
-                f"- {name} ({info.pretty_name}): {info.description}\n"
-                f"  能力标签: {tags_str}\n"
-                f"  适用场景: {', '.join(info.use_cases[:2])}"
-            )
+        Args:
+            requirement: 用户需求描述
+            
+        Returns:
+            包含能力标签、描述、关键点和推荐 benchmark 的字典
+        """
+        cached = self.cache.get(requirement)
+        if cached is not None:
+            return cached
+        result = await self._analyze_uncached(requirement)
+        self.cache.put(requirement, result)
+        return result
+    
+    async def analyze_batch_async(
+        self,
+        requirements: List[str],
+        max_concurrency: int = 4
+    ) -> List[Dict[str, Any]]:
+        """
+        在同一个事件循环中并发分析多个需求
         
-        benchmark_info = "\n".join(benchmark_info_lines)
+        规范化后相同的需求只分析一次；单个需求分析失败时对应位置返回异常对象，由调用方决定如何处理
         
-        return f"""你是一个专业的 AI 模型能力评估专家。你的任务是分析用户的需求，识别出需要评测的模型基础能力，并从可用的 benchmark 中选择最合适的进行评测。
-
-可用的能力标签包括：
-- REASONING: 推理能力
-- LONG_CONTEXT: 长上下文处理能力
-- CODING: 代码生成能力
-- KNOWLEDGE: 知识理解能力
-- QA: 问答能力
-- FUNCTION_CALLING: 函数调用能力
-- RETRIEVAL: 检索能力
-- HALLUCINATION: 幻觉检测能力
-
-可用的 Benchmark 列表（必须从以下列表中选择）：
-{benchmark_info}
-
-请仔细分析用户需求，提取出关键的能力标签和需求描述，并从上述 benchmark 列表中选择最合适的 benchmark（可以选多个），并为每个选择的 benchmark 提供详细的选择理由。
-
-输出格式要求：
-- capabilities: 能力标签列表
-- description: 需求描述
-- key_points: 关键需求点列表
-- recommended_benchmarks: benchmark 推荐列表，每个包含 benchmark 名称和选择理由"""
+        Args:
+            requirements: 需求描述列表
+            max_concurrency: 最大并发分析数
+            
+        Returns:
+            与 requirements 一一对应的分析结果或异常
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        tasks: Dict[str, asyncio.Task] = {}
+        
+        async def run(requirement: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.analyze_async(requirement)
+        
+        for requirement in requirements:
+            key = normalize_requirement(requirement)
+            if key not in tasks:
+                tasks[key] = asyncio.ensure_future(run(requirement))
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        
+        results = []
+        for requirement in requirements:
+            task = tasks[normalize_requirement(requirement)]
+            results.append(task.exception() or task.result())
+        return results
     
-    async def analyze_async(self, requirement: str) -> Dict[str, Any]:
+    def analyze_batch(self, requirements: List[str], max_concurrency: int = 4) -> List[Dict[str, Any]]:
+        """
+        同步批量分析需求（包装异步方法）
+        
+        Args:
+            requirements: 需求描述列表
+            max_concurrency: 最大并发分析数
+            
+        Returns:
+            与 requirements 一一对应的分析结果或异常
+        """
+        return asyncio.run(self.analyze_batch_async(requirements, max_concurrency))
+    
+    async def _analyze_uncached(self, requirement: str) -> Dict[str, Any]:
         """
-        异步分析用户需求
+        调用 LLM 分析用户需求
         
         Args:
             requirement: 用户需求描述
@@ -147,7 +279,8 @@ class RequirementAnalyzer:
         user_msg = Msg(name="user", role="user", content=f"请分析以下需求：{requirement}")
         
         # 使用 ReActAgent 生成结构化输出
-        response = await self.agent(user_msg, structured_model=RequirementAnalysisResult)
+        agent = self._create_agent()
+        response = await agent(user_msg, structured_model=RequirementAnalysisResult)
 
         # 从 metadata 中提取结构化输出
         if hasattr(response, 'metadata') and response.metadata:
@@ -0,0 +1,129 @@
+"""评分矩阵，将评测报告压缩为 模型 × benchmark × subset 的紧凑表格，在固定 token 预算内提供给总结 Agent。"""
+from typing import Any, Dict, List, Optional
+
+from harness.tokens import estimate_tokens
+
+
+def _rank(scores: Dict[str, Optional[float]]) -> Dict[str, int]:
+    """按分数从高到低排名，分数相同的模型名次相同"""
+    ordered = sorted((score for score in scores.values() if score is not None), reverse=True)
+    return {model: ordered.index(score) + 1 for model, score in scores.items() if score is not None}
+
+
+def build_score_matrix(evaluation_reports: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    将评测报告整理为评分矩阵
+
+    每个 benchmark 以第一个指标为主指标，记录各模型的整体分数、各 subset 分数、排名以及与最佳模型的差值；
+    其余指标只记录整体分数。
+
+    Args:
+        evaluation_reports: 评测报告字典，格式为 {benchmark_name: {model_name: report_data}}
+
+    Returns:
+        {"models": [...], "benchmarks": [{"name", "metric", "num", "overall", "ranks", "deltas", "subsets", "other_metrics"}]}
+    """
+    models: List[str] = []
+    benchmarks = []
+    for benchmark_name, model_reports in evaluation_reports.items():
+        overall: Dict[str, Optional[float]] = {}
+        subsets: Dict[str, Dict[str, Optional[float]]] = {}
+        other_metrics: Dict[str, Dict[str, Optional[float]]] = {}
+        main_metric, num = None, 0
+        for model_name, report in model_reports.items():
+            if model_name not in models:
+                models.append(model_name)
+            metrics = report.get("metrics") or []
+            if not metrics:
+                continue
+            main_metric = main_metric or metrics[0]["name"]
+            num = max(num, metrics[0].get("num", 0))
+            overall[model_name] = metrics[0].get("score")
+            for category in metrics[0].get("categories", []):
+                for subset in category.get("subsets", []):
+                    subsets.setdefault(subset["name"], {})[model_name] = subset.get("score")
+            for metric in metrics[1:]:
+                other_metrics.setdefault(metric["name"], {})[model_name] = metric.get("score")
+
+        best = max((score for score in overall.values() if score is not None), default=None)
+        benchmarks.append({
+            "name": benchmark_name,
+            "metric": main_metric,
+            "num": num,
+            "overall": overall,
+            "ranks": _rank(overall),
+            "deltas": {
+                model: round(score - best, 4) for model, score in overall.items() if score is not None and best is not None
+            },
+            "subsets": subsets,
+            "other_metrics": other_metrics,
+        })
+    return {"models": models, "benchmarks": benchmarks}
+
+
+def _format_score(score: Optional[float]) -> str:
+    return "-" if score is None else f"{score:.4f}"
+
+
+def render_markdown(matrix: Dict[str, Any], include_subsets: bool = True, include_other_metrics: bool = True) -> str:
+    """
+    将评分矩阵渲染为 Markdown 表格
+
+    Args:
+        matrix: build_score_matrix 的返回值
+        include_subsets: 是否包含各 subset 的分数
+        include_other_metrics: 是否包含主指标以外的指标
+
+    Returns:
+        Markdown 文本
+    """
+    models = matrix["models"]
+    header = "| 项目 | " + " | ".join(models) + " |"
+    separator = "|" + " --- |" * (len(models) + 1)
+    sections = []
+    for benchmark in matrix["benchmarks"]:
+        lines = [f"### {benchmark['name']}（主指标 {benchmark['metric']}，{benchmark['num']} 个样本）", "", header, separator]
+        lines.append("| 整体 | " + " | ".join(_format_score(benchmark["overall"].get(m)) for m in models) + " |")
+        lines.append("| 排名 | " + " | ".join(str(benchmark["ranks"].get(m, "-")) for m in models) + " |")
+        lines.append("| 与最佳差值 | " + " | ".join(_format_score(benchmark["deltas"].get(m)) for m in models) + " |")
+        if include_subsets and len(benchmark["subsets"]) > 1:
+            for subset, scores in benchmark["subsets"].items():
+                lines.append(f"| {subset} | " + " | ".join(_format_score(scores.get(m)) for m in models) + " |")
+        if include_other_metrics:
+            for metric, scores in benchmark["other_metrics"].items():
+                lines.append(f"| {metric} | " + " | ".join(_format_score(scores.get(m)) for m in models) + " |")
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections)
+
+
+def render_compact(matrix: Dict[str, Any], token_budget: int = 2000) -> str:
+    """
+    在 token 预算内渲染评分矩阵
+
+    依次省略主指标以外的指标和各 subset 的分数，直到估算的 token 数不超过预算；
+    仍然超出时按行截断，并注明省略的行数。
+
+    Args:
+        matrix: build_score_matrix 的返回值
+        token_budget: token 预算
+
+    Returns:
+        Markdown 文本
+    """
+    for include_subsets, include_other_metrics in ((True, True), (True, False), (False, False)):
+        text = render_markdown(matrix, include_subsets, include_other_metrics)
+        if estimate_tokens(text) <= token_budget:
+            return text
+
+    lines = text.split("\n")
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        kept.append(line)
+        used += cost
+    omitted = len(lines) - len(kept)
+    if omitted:
+        kept.append(f"（超出 token 预算，省略 {omitted} 行）")
+    return "\n".join(kept)
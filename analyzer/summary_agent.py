@@ -1,6 +1,5 @@
 """评估总结 Agent，用于生成模型对比报告。"""
 import os
-import json
 import asyncio
 from typing import List, Dict, Any
 import sys
@@ -9,12 +8,13 @@ from agentscope.agent import ReActAgent
 from agentscope.model import OpenAIChatModel
 from agentscope.formatter import DeepSeekChatFormatter
 from agentscope.memory import InMemoryMemory
-from agentscope.tool import Toolkit, view_text_file, write_text_file
+from agentscope.tool import Toolkit
 from agentscope.message import Msg
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from analyzer.score_matrix import build_score_matrix, render_compact, render_markdown
 import config
 
 class ModelScore(BaseModel):
@@ -51,14 +51,16 @@ class SummaryReport(BaseModel):
 class SummaryAgent:
     """评估总结 Agent"""
     
-    def __init__(self, api_key: str = None, base_url: str = None):
+    def __init__(self, api_key: str = None, base_url: str = None, token_budget: int = 2000):
         """
         初始化总结 Agent
         
         Args:
             api_key: DeepSeek API key
             base_url: DeepSeek API base URL
+            token_budget: 提供给模型的评分矩阵的 token 预算
         """
+        self.token_budget = token_budget
         # 从 config 获取 DeepSeek 配置
         deepseek_config = config.LLM_SERVER_CONFIG.get('deepseek-chat', {})
         
@@ -74,10 +76,8 @@ class SummaryAgent:
             stream=False,
         )
         
-        # 创建空的工具包
+        # 创建空的工具包，报告由本地直接写入，不需要文件工具
         toolkit = Toolkit()
-        toolkit.register_tool_function(view_text_file)
-        toolkit.register_tool_function(write_text_file)
         
         # 创建 ReActAgent
         self.agent = ReActAgent(
@@ -93,6 +93,8 @@ class SummaryAgent:
         """获取系统提示词"""
         return """你是一个专业的 AI 模型评估专家。你的任务是分析评测报告，对模型能力进行总结、对比，并根据用户需求对模型进行打分排序。
 
+评测数据以评分矩阵的形式给出：每个 benchmark 一张表，列为模型，行为主指标的整体分数、排名、与最佳模型的差值、各 subset 分数以及其他指标。
+
 你需要：
 1. 按照 benchmark 对每个模型的能力进行总结
 2. 对比不同模型在各个 benchmark 上的表现
@@ -101,10 +103,11 @@ class SummaryAgent:
 5. 给出针对用户需求的推荐理由
 
 输出格式要求：
-- benchmark_summaries: 按 benchmark 分组的总结列表
-- model_comparison: 模型对比分析
-- model_scores: 模型评分排序列表
-- overall_summary: 整体总结和建议"""
+直接输出 Markdown 正文（不需要重复评分矩阵），包含以下二级标题：
+- ## 各 Benchmark 能力总结
+- ## 模型对比分析
+- ## 模型评分排序（综合评分 0-100、排名、优势、劣势、推荐理由）
+- ## 整体总结和建议"""
     
     async def generate_summary_async(
         self,
@@ -118,37 +121,56 @@ class SummaryAgent:
         Args:
             requirement: 用户原始需求
             evaluation_reports: 评测报告字典，格式为 {benchmark_name: {model_name: report_data}}
+            work_dir: 报告保存目录，报告写入 work_dir/report.md
             
         Returns:
-            总结报告字典
+            总结报告字典，包含评分矩阵、模型输出的分析文本和报告路径
         """
+        # 本地预聚合：将完整报告压缩为固定 token 预算内的评分矩阵
+        score_matrix = build_score_matrix(evaluation_reports)
+        compact_matrix = render_compact(score_matrix, self.token_budget)
         
-        
-        # 构建分析提示
-        work_dir_path = os.path.join(work_dir, "report.md")
-        with open(work_dir_path, 'w', encoding='utf-8') as f:
-            f.write('')
-            
-        reports_json = json.dumps(evaluation_reports, ensure_ascii=False, indent=2)
-        prompt = f"""请分析以下评测报告，生成模型对比总结报告。
+        prompt = f"""请分析以下评测结果，生成模型对比总结报告。
 
 用户需求：{requirement}
 
-评测报告数据：
-{reports_json}
+评分矩阵：
+{compact_matrix}
 
 请按照以下要求进行分析：
 1. 按 benchmark 总结每个模型的表现
 2. 对比不同模型的能力
 3. 根据用户需求对模型打分排序
-4. 给出推荐理由
-5. 将分析结果写到{work_dir_path}文件中"""
+4. 给出推荐理由"""
         
         # 创建用户消息
         user_msg = Msg(name="user", role="user", content=prompt)
         
-        # 使用 ReActAgent 生成结构化输出
         response = await self.agent(user_msg)
+        analysis = response.get_text_content() or ""
+        
+        # 报告由本地直接写入：确定性的评分矩阵 + 模型生成的分析
+        report_path = os.path.join(work_dir, "report.md")
+        report_lines = [
+            "# 模型评估总结报告",
+            "",
+            f"**用户需求**：{requirement}",
+            "",
+            "## 评分矩阵",
+            "",
+            render_markdown(score_matrix),
+            "",
+            analysis.strip(),
+            "",
+        ]
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(report_lines))
+        
+        return {
+            "score_matrix": score_matrix,
+            "analysis": analysis,
+            "report_path": report_path,
+        }
         
         # # 从 metadata 中提取结构化输出
         # if hasattr(response, 'metadata') and response.metadata:
@@ -193,11 +215,12 @@ class SummaryAgent:
         Args:
             requirement: 用户原始需求
             evaluation_reports: 评测报告字典
+            work_dir: 报告保存目录
             
         Returns:
             总结报告字典
         """
-        asyncio.run(self.generate_summary_async(requirement, evaluation_reports, work_dir))
+        return asyncio.run(self.generate_summary_async(requirement, evaluation_reports, work_dir))
     
     # async def write_markdown_report_async(
     #     self,
@@ -5,4 +5,8 @@ if 'FRAMES' not in BENCHMARK_REGISTRY:
 if 'text2sql' not in BENCHMARK_REGISTRY:
     import benchmarks.text2sql.text2sql_adapter
 if 'halu_eval' not in BENCHMARK_REGISTRY:
-    import benchmarks.halu_eval.halu_eval_adapter
\ No newline at end of file
+    import benchmarks.halu_eval.halu_eval_adapter
+if 'function_call' not in BENCHMARK_REGISTRY:
+    import benchmarks.function_call.function_call_adapter
+# general_qa replaces the EvalScope adapter of the same name, so it is always imported
+import benchmarks.general_qa.general_qa_adapter
\ No newline at end of file
@@ -0,0 +1,234 @@
+import re
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from harness.tokens import estimate_tokens
+
+_LATIN_WORD_PATTERN = re.compile(r'[a-z0-9]+')
+_CJK_RUN_PATTERN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff]+')
+
+TRUNCATION_MARKER = '……'
+
+# Per-model-family token estimates: context window (tokens), tokens per CJK character and
+# characters per token for everything else. The default profile over-estimates on purpose so
+# that an unknown model is never sent more than the budget.
+MODEL_PROFILES: List[Dict[str, Any]] = [
+    {'pattern': r'deepseek', 'context_window': 131072, 'cjk_tokens': 0.7, 'chars_per_token': 3.5},
+    {'pattern': r'qwen', 'context_window': 262144, 'cjk_tokens': 0.75, 'chars_per_token': 3.5},
+]
+DEFAULT_PROFILE: Dict[str, Any] = {'context_window': None, 'cjk_tokens': 1.0, 'chars_per_token': 3.0}
+
+# Tokens kept free for the chat template and role markers
+TEMPLATE_RESERVE = 256
+
+
+def model_profile(model_id: Optional[str]) -> Dict[str, Any]:
+    """Return the token estimate profile of the model family matching ``model_id``."""
+    if model_id:
+        for profile in MODEL_PROFILES:
+            if re.search(profile['pattern'], model_id, flags=re.IGNORECASE):
+                return profile
+    return DEFAULT_PROFILE
+
+
+@lru_cache(maxsize=None)
+def _load_tokenizer(path: str):
+    from tokenizers import Tokenizer
+
+    return Tokenizer.from_file(path)
+
+
+class TokenCounter:
+    """
+    Local token counter for one model.
+
+    Uses a Hugging Face ``tokenizer.json`` when one is given, otherwise a character-class
+    estimate calibrated for the model family. Neither needs network access.
+    """
+
+    def __init__(self, model_id: Optional[str] = None, tokenizer_path: Optional[str] = None):
+        self.profile = model_profile(model_id)
+        self.tokenizer = _load_tokenizer(tokenizer_path) if tokenizer_path else None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+        return estimate_tokens(text, self.profile['cjk_tokens'], self.profile['chars_per_token'])
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Return the longest prefix of ``text`` (plus a marker) that fits in ``max_tokens``."""
+        if self.count(text) <= max_tokens:
+            return text
+        budget = max_tokens - self.count(TRUNCATION_MARKER)
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.count(text[:mid]) <= budget:
+                low = mid
+            else:
+                high = mid - 1
+        return text[:low].rstrip() + TRUNCATION_MARKER if low else ''
+
+
+def _terms(text: str) -> set:
+    """Lower-cased Latin words plus CJK character bigrams."""
+    text = text.lower()
+    terms = {word for word in _LATIN_WORD_PATTERN.findall(text) if len(word) > 1}
+    for run in _CJK_RUN_PATTERN.findall(text):
+        terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def relevance(question: str, title: str, text: str) -> float:
+    """Share of question terms found in the article; hits in the title count twice."""
+    question_terms = _terms(question)
+    if not question_terms:
+        return 0.0
+    title_terms, text_terms = _terms(title), _terms(text)
+    hits = sum(
+        2.0 if term in title_terms else 1.0
+        for term in question_terms if term in title_terms or term in text_terms
+    )
+    return hits / (2.0 * len(question_terms))
+
+
+@dataclass
+class PackingConfig:
+    """
+    Context packing options, set through the FRAMES ``extra_params``.
+
+    Args:
+        context_budget: prompt token budget; ``None`` derives it from the model context window
+            minus ``max_tokens``, and disables packing when the window is unknown
+        max_article_tokens: per-article cap applied before packing
+        strategy: ``relevance`` packs question-relevant articles first, ``original`` keeps dataset order
+        min_article_tokens: an article that would be cut below this size is dropped instead
+        tokenizer: local ``tokenizer.json`` used for exact counts
+    """
+
+    context_budget: Optional[int] = None
+    max_article_tokens: Optional[int] = None
+    strategy: str = 'relevance'
+    min_article_tokens: int = 64
+    tokenizer: Optional[str] = None
+
+
+@dataclass
+class PackingResult:
+    context: str
+    budget: Optional[int]
+    prompt_tokens: int
+    articles: int
+    kept: int
+    truncated: int
+    dropped: int
+    original_tokens: int
+    dropped_tokens: int
+    dropped_titles: List[str] = field(default_factory=list)
+
+    def to_metadata(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def resolve_budget(config: PackingConfig, counter: TokenCounter, max_tokens: Optional[int]) -> Optional[int]:
+    """Prompt budget from the config, or from the model context window when not set."""
+    if config.context_budget:
+        return config.context_budget
+    context_window = counter.profile['context_window']
+    if not context_window:
+        return None
+    return context_window - (max_tokens or 0) - TEMPLATE_RESERVE
+
+
+def format_article(title: str, text: str) -> str:
+    return f'{title}\n{text}'
+
+
+def pack_context(
+    articles: Sequence[Tuple[str, str]],
+    question: str,
+    template: str,
+    counter: TokenCounter,
+    config: PackingConfig,
+    budget: Optional[int],
+) -> PackingResult:
+    """
+    Pack wiki articles into the prompt template within the token budget.
+
+    Articles are capped to ``max_article_tokens``, then admitted in priority order (question
+    relevance or dataset order, ties broken by dataset order). An article that does not fit is
+    cut to the remaining budget, or dropped when less than ``min_article_tokens`` would remain.
+    Admitted articles are rendered in dataset order, so the result only depends on the inputs.
+
+    Args:
+        articles: ``(title, text)`` pairs in dataset order
+        question: the question, used for relevance and the fixed part of the prompt
+        template: prompt template with ``{context}`` and ``{question}`` placeholders
+        counter: token counter of the evaluated model
+        config: packing options
+        budget: prompt token budget, ``None`` keeps every article untouched
+
+    Returns:
+        The packed context and how much of it was truncated or dropped
+    """
+    rendered = [format_article(title, text) for title, text in articles]
+    original_tokens = sum(counter.count(article) for article in rendered)
+    fixed_tokens = counter.count(template.format(context='', question=question))
+
+    if budget is None and not config.max_article_tokens:
+        context = '\n'.join(rendered)
+        return PackingResult(
+            context=context, budget=None, prompt_tokens=fixed_tokens + original_tokens, articles=len(articles),
+            kept=len(articles), truncated=0, dropped=0, original_tokens=original_tokens, dropped_tokens=0,
+        )
+
+    texts = [text for _, text in articles]
+    truncated = set()
+    if config.max_article_tokens:
+        for i, (title, text) in enumerate(articles):
+            capped = counter.truncate(text, config.max_article_tokens)
+            if capped != text:
+                texts[i] = capped
+                truncated.add(i)
+
+    order = list(range(len(articles)))
+    if config.strategy == 'relevance':
+        scores = [relevance(question, title, text) for title, text in articles]
+        order.sort(key=lambda i: (-scores[i], i))
+
+    # Articles are joined by newlines; count each separator with the article it follows
+    remaining = None if budget is None else budget - fixed_tokens
+    kept: Dict[int, str] = {}
+    for i in order:
+        title = articles[i][0]
+        article = format_article(title, texts[i])
+        cost = counter.count(article) + 1
+        if remaining is None or cost <= remaining:
+            kept[i] = article
+            remaining = None if remaining is None else remaining - cost
+            continue
+        text_budget = remaining - counter.count(title) - 2
+        if text_budget >= config.min_article_tokens:
+            text = counter.truncate(texts[i], text_budget)
+            if text:
+                kept[i] = format_article(title, text)
+                truncated.add(i)
+                remaining -= counter.count(kept[i]) + 1
+
+    context = '\n'.join(kept[i] for i in sorted(kept))
+    dropped = [i for i in range(len(articles)) if i not in kept]
+    return PackingResult(
+        context=context,
+        budget=budget,
+        prompt_tokens=fixed_tokens + counter.count(context),
+        articles=len(articles),
+        kept=len(kept),
+        truncated=len(truncated & set(kept)),
+        dropped=len(dropped),
+        original_tokens=original_tokens,
+        dropped_tokens=max(0, original_tokens - counter.count(context)),
+        dropped_titles=[articles[i][0] for i in dropped],
+    )
@@ -0,0 +1,387 @@
+"""
+Tiered answer-equivalence checks for FRAMES.
+
+Cheap deterministic checks run before the LLM judge, from the strictest to the most lenient:
+normalized exact match, numeric / unit / date canonicalization, Chinese numeral to Arabic
+conversion, and containment of the reference in a short answer. A check either settles the sample
+(correct or incorrect) or passes it on; only samples no check can settle go to the judge.
+"""
+import math
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .utils import normalize_answer
+
+EXACT = 'exact'
+NUMERIC = 'numeric'
+CHINESE_NUMERAL = 'chinese_numeral'
+CONTAINMENT = 'containment'
+LLM_JUDGE = 'llm_judge'
+TIERS = (EXACT, NUMERIC, CHINESE_NUMERAL, CONTAINMENT, LLM_JUDGE)
+
+# Extra tokens a prediction may carry around the reference and still pass the containment check
+CONTAINMENT_SLACK = 6
+# Longer predictions are not searched for a single embedded quantity
+MAX_QUANTITY_ANSWER_TOKENS = 12
+
+_NEGATIONS = {'not', 'no', 'never', 'neither', 'nor', 'none', 'isnt', 'wasnt', '不', '没', '无', '非', '未'}
+# Capitalized words that can open a sentence before a name without being part of it
+_FUNCTION_WORDS = {
+    'in', 'on', 'at', 'by', 'from', 'to', 'of', 'for', 'with', 'near', 'it', 'its', 'he', 'she', 'they', 'this',
+    'that', 'is', 'was', 'yes', 'answer', 'probably', 'maybe', 'perhaps', 'likely', 'definitely',
+}
+# Words that bound or approximate a number rather than state it ("more than 35", "before 1990", "约 10 年");
+# a short answer carrying one is left to the judge
+_QUALIFIERS = {
+    'about', 'around', 'approximately', 'approx', 'roughly', 'nearly', 'almost', 'circa', 'ca', 'some',
+    'over', 'under', 'above', 'below', 'beyond', 'exceeding', 'more', 'less', 'fewer', 'greater', 'than',
+    'least', 'most', 'up', 'within', 'before', 'after', 'since', 'until', 'till', 'prior', 'later', 'earlier',
+}
+_CJK_QUALIFIERS = (
+    '超过', '多于', '以上', '至少', '不到', '不足', '少于', '以下', '以内', '最多', '最少', '大约', '约', '左右',
+    '上下', '将近', '接近', '差不多', '以前', '以后', '之前', '之后', '余',
+)
+
+# Unit aliases mapped to (dimension, factor to the dimension's base unit). Single-letter symbols are kept
+# apart in _SPACED_UNITS: glued to a number they are more often a suffix ("1990s") than a unit
+_UNITS: Dict[str, Tuple[str, float]] = {}
+for _aliases, _dimension, _factor in [
+    (('%', 'percent', 'per cent'), 'percent', 1),
+    (('km', 'kilometer', 'kilometers', 'kilometre', 'kilometres', '公里', '千米'), 'length', 1000),
+    (('meter', 'meters', 'metre', 'metres', '米'), 'length', 1),
+    (('cm', 'centimeter', 'centimeters', 'centimetre', 'centimetres', '厘米'), 'length', 0.01),
+    (('mm', 'millimeter', 'millimeters', 'millimetre', 'millimetres', '毫米'), 'length', 0.001),
+    (('mi', 'mile', 'miles', '英里'), 'length', 1609.344),
+    (('ft', 'foot', 'feet', '英尺'), 'length', 0.3048),
+    (('kg', 'kilogram', 'kilograms', '公斤', '千克'), 'mass', 1000),
+    (('gram', 'grams', '克'), 'mass', 1),
+    (('ton', 'tons', 'tonne', 'tonnes', '吨'), 'mass', 1e6),
+    (('year', 'years', 'yr', 'yrs', '年', '岁'), 'years', 1),
+    (('month', 'months', '个月'), 'months', 1),
+    (('day', 'days', '天'), 'days', 1),
+    (('hour', 'hours', '小时'), 'seconds', 3600),
+    (('minute', 'minutes', 'min', 'mins', '分钟'), 'seconds', 60),
+    (('second', 'seconds', 'sec', '秒'), 'seconds', 1),
+    (('usd', 'dollar', 'dollars', '美元'), 'usd', 1),
+    (('eur', 'euro', 'euros', '欧元'), 'eur', 1),
+    (('gbp', 'pound', 'pounds', '英镑'), 'gbp', 1),
+    (('cny', 'rmb', 'yuan', '元', '人民币'), 'cny', 1),
+    (('people', 'persons', 'times', '人', '个', '次', '位', '名'), 'count', 1),
+]:
+    for _alias in _aliases:
+        _UNITS[_alias] = (_dimension, _factor)
+_SPACED_UNITS = {'m': ('length', 1), 'g': ('mass', 1), 'h': ('seconds', 3600), 's': ('seconds', 1)}
+_CURRENCY_SYMBOLS = {'$': 'usd', '€': 'eur', '£': 'gbp', '¥': 'cny', '￥': 'cny'}
+
+_MULTIPLIERS = {
+    'thousand': 1e3, 'million': 1e6, 'billion': 1e9, 'bn': 1e9, 'trillion': 1e12,
+    '千': 1e3, '万': 1e4, '百万': 1e6, '千万': 1e7, '亿': 1e8, '万亿': 1e12,
+}
+
+
+def _alternation(words: Iterable[str]) -> str:
+    return '|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+_NUMBER_PATTERN = re.compile(
+    r'(?<![\w.])(?P<prefix>[$€£¥￥])?\s*(?P<number>(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?)'
+    rf'(?:\s*(?P<mult>{_alternation(_MULTIPLIERS)}))?'
+    rf'(?:\s*(?P<unit>{_alternation(_UNITS)})|\s+(?P<spaced_unit>{_alternation(_SPACED_UNITS)}))?(?![a-z\d])'
+)
+
+_MONTHS = {
+    name: index + 1
+    for index, names in enumerate([
+        ('january', 'jan'), ('february', 'feb'), ('march', 'mar'), ('april', 'apr'), ('may', ), ('june', 'jun'),
+        ('july', 'jul'), ('august', 'aug'), ('september', 'sep', 'sept'), ('october', 'oct'),
+        ('november', 'nov'), ('december', 'dec')
+    ])
+    for name in names
+}
+_MONTH = rf'(?P<month_name>{_alternation(_MONTHS)})\.?'
+_DAY = r'(?P<day>\d{1,2})(?:st|nd|rd|th)?'
+_DATE_PATTERNS = [
+    re.compile(r'(?<!\d)(?P<year>\d{4})[-/.](?P<month>\d{1,2})[-/.](?P<day>\d{1,2})(?!\d)'),
+    re.compile(r'(?<!\d)(?P<year>\d{4})\s*年\s*(?P<month>\d{1,2})\s*月(?:\s*(?P<day>\d{1,2})\s*[日号])?'),
+    re.compile(rf'\b{_MONTH}\s+{_DAY},?\s+(?P<year>\d{{4}})\b'),
+    re.compile(rf'\b{_DAY}\s+(?:of\s+)?{_MONTH},?\s+(?P<year>\d{{4}})\b'),
+    re.compile(rf'\b{_MONTH},?\s+(?P<year>\d{{4}})\b'),
+]
+
+_CN_DIGITS = {'零': 0, '〇': 0, '一': 1, '二': 2, '两': 2, '三': 3, '四': 4, '五': 5, '六': 6, '七': 7, '八': 8, '九': 9}
+_CN_UNITS = {'十': 10, '百': 100, '千': 1000}
+_CN_NUMERAL = '[零〇一二两三四五六七八九十百千万亿]+(?:点[零〇一二两三四五六七八九]+)?'
+_CN_NUMERAL_PATTERN = re.compile(_CN_NUMERAL)
+_CN_PERCENT_PATTERN = re.compile(f'百分之({_CN_NUMERAL})')
+
+_TOKEN_PATTERN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff]|[^\s\u3400-\u4dbf\u4e00-\u9fff]+')
+_SENTENCE_END = re.compile(r'[.!?;:,。！？；：，]$')
+_FILLER_PATTERN = re.compile(r'[\s,.;:!?\'"()\[\]，。；：！？、（）“”‘’]+')
+
+
+@dataclass(frozen=True)
+class Number:
+    """A number with an optional unit; ``resolution`` is the rounding step of the written form."""
+
+    value: float
+    dimension: Optional[str] = None
+    factor: float = 1.0
+    resolution: float = 1.0
+
+    def __str__(self) -> str:
+        return f'{self.value:g}' + (f' {self.dimension}' if self.dimension else '')
+
+
+@dataclass(frozen=True)
+class Date:
+    year: int
+    month: int
+    day: Optional[int] = None
+
+    def __str__(self) -> str:
+        return f'{self.year:04d}-{self.month:02d}' + (f'-{self.day:02d}' if self.day else '')
+
+
+Quantity = Union[Number, Date]
+
+
+@dataclass
+class Verdict:
+    """Outcome of the cascade for one sample; ``correct`` is None when only the judge can decide."""
+
+    tier: str
+    correct: Optional[bool]
+    detail: str = ''
+
+    @property
+    def decided(self) -> bool:
+        return self.correct is not None
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text)
+
+
+def _chinese_to_number(run: str) -> str:
+    integer, _, fraction = run.partition('点')
+    if all(char in _CN_DIGITS for char in integer):
+        # Digit-by-digit form such as 二〇二三
+        value = int(''.join(str(_CN_DIGITS[char]) for char in integer))
+    else:
+        total = section = number = 0
+        for char in integer:
+            if char in _CN_DIGITS:
+                number = _CN_DIGITS[char]
+            elif char in _CN_UNITS:
+                section += (number or 1) * _CN_UNITS[char]
+                number = 0
+            elif char == '万':
+                total += (section + number) * 10**4
+                section = number = 0
+            elif char == '亿':
+                total = (total + section + number) * 10**8
+                section = number = 0
+        value = total + section + number
+    if fraction:
+        return f"{value}.{''.join(str(_CN_DIGITS[char]) for char in fraction)}"
+    return str(value)
+
+
+def _convert_run(match: re.Match) -> str:
+    run = match.group(0)
+    # Runs without a digit or 十, such as 千万 in 千万不要, are words rather than numbers
+    if not any(char in _CN_DIGITS or char == '十' for char in run.partition('点')[0]):
+        return run
+    return _chinese_to_number(run)
+
+
+def convert_chinese_numerals(text: str) -> str:
+    """Rewrite Chinese numerals as Arabic numbers, e.g. 三万五千 -> 35000 and 百分之十二 -> 12%."""
+    text = _CN_PERCENT_PATTERN.sub(lambda match: _chinese_to_number(match.group(1)) + '%', text)
+    return _CN_NUMERAL_PATTERN.sub(_convert_run, text)
+
+
+def find_quantities(text: str) -> List[Tuple[Tuple[int, int], Quantity]]:
+    """All dates and numbers in ``text`` with their spans; dates win where the two overlap."""
+    text = text.lower()
+    found = []
+    for pattern in _DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            if any(start < match.end() and match.start() < end for (start, end), _ in found):
+                continue
+            groups = match.groupdict()
+            month = _MONTHS[groups['month_name']] if groups.get('month_name') else int(groups['month'])
+            day = int(groups['day']) if groups.get('day') else None
+            if 1 <= month <= 12 and (day is None or 1 <= day <= 31):
+                found.append((match.span(), Date(int(groups['year']), month, day)))
+
+    masked = list(text)
+    for (start, end), _ in found:
+        masked[start:end] = ' ' * (end - start)
+    for match in _NUMBER_PATTERN.finditer(''.join(masked)):
+        number = match.group('number').replace(',', '')
+        decimals = len(number.partition('.')[2])
+        multiplier = _MULTIPLIERS[match.group('mult')] if match.group('mult') else 1.0
+        if match.group('unit'):
+            dimension, factor = _UNITS[match.group('unit')]
+        elif match.group('spaced_unit'):
+            dimension, factor = _SPACED_UNITS[match.group('spaced_unit')]
+        else:
+            dimension, factor = None, 1.0
+        if match.group('prefix'):
+            dimension, factor = _CURRENCY_SYMBOLS[match.group('prefix')], 1.0
+        found.append((
+            match.span(),
+            Number(float(number) * multiplier, dimension, factor, 10**-decimals * multiplier),
+        ))
+    return sorted(found, key=lambda item: item[0])
+
+
+def parse_quantity(text: str) -> Optional[Quantity]:
+    """The quantity ``text`` consists of, or None when it is not a single date / number (plus punctuation)."""
+    quantities = find_quantities(text)
+    if len(quantities) != 1:
+        return None
+    (start, end), quantity = quantities[0]
+    if _FILLER_PATTERN.sub('', text[:start] + text[end:]):
+        return None
+    return quantity
+
+
+def compare_quantities(reference: Quantity, prediction: Quantity) -> Optional[bool]:
+    """
+    True when the quantities are equal, False when they clearly differ, None when it is unclear
+    (different kinds or dimensions, or values equal up to the rounding of the written form).
+
+    Numbers are only compared when both carry the same dimension or both carry none: a bare number
+    against a percentage or a unit ("0.5" vs "50%") is left to the judge rather than marked wrong.
+    """
+    if isinstance(reference, Date) and isinstance(prediction, Date):
+        if (reference.year, reference.month) != (prediction.year, prediction.month):
+            return False
+        if reference.day == prediction.day:
+            return True
+        return None if reference.day is None or prediction.day is None else False
+    if not (isinstance(reference, Number) and isinstance(prediction, Number)):
+        return None
+    if reference.dimension != prediction.dimension:
+        return None
+    if reference.dimension:
+        ref_value, pred_value = reference.value * reference.factor, prediction.value * prediction.factor
+        tolerance = max(reference.resolution * reference.factor, prediction.resolution * prediction.factor) / 2
+    else:
+        ref_value, pred_value = reference.value, prediction.value
+        tolerance = max(reference.resolution, prediction.resolution) / 2
+    if math.isclose(ref_value, pred_value, rel_tol=1e-9, abs_tol=1e-12):
+        return True
+    return None if abs(ref_value - pred_value) <= tolerance * (1 + 1e-9) else False
+
+
+def _quantity_verdict(prediction: str, reference: str) -> Optional[Tuple[bool, str]]:
+    ref = parse_quantity(reference)
+    if ref is None:
+        return None
+    pred = parse_quantity(prediction)
+    if pred is not None:
+        result = compare_quantities(ref, pred)
+        return None if result is None else (result, f'{pred} vs {ref}')
+    # A short answer with exactly one quantity of the same kind, e.g. "It was 35 years"; negated or
+    # qualified quantities ("not 5", "more than 35", "before 1990") say something else and go to the judge
+    tokens = _tokens(normalize_answer(prediction))
+    if len(tokens) > MAX_QUANTITY_ANSWER_TOKENS:
+        return None
+    if _has_negation(tokens, _tokens(normalize_answer(reference))) or _is_qualified(prediction, tokens):
+        return None
+    candidates = [quantity for _, quantity in find_quantities(prediction) if type(quantity) is type(ref)]
+    if len(candidates) == 1 and compare_quantities(ref, candidates[0]) is True:
+        return True, f'{candidates[0]} vs {ref}'
+    return None
+
+
+def _has_negation(pred_tokens: List[str], ref_tokens: List[str]) -> bool:
+    """The prediction negates something the reference does not."""
+    return any(token in _NEGATIONS for token in pred_tokens) and not any(token in _NEGATIONS for token in ref_tokens)
+
+
+def _is_qualified(prediction: str, tokens: List[str]) -> bool:
+    return any(token in _QUALIFIERS for token in tokens) or any(word in prediction for word in _CJK_QUALIFIERS)
+
+
+def _cased_tokens(text: str) -> List[Tuple[str, str]]:
+    """(normalized, original) pairs of the tokens of ``text`` that survive ``normalize_answer``."""
+    pairs = []
+    for token in _tokens(text):
+        normalized = normalize_answer(token)
+        if normalized:
+            pairs.append((normalized, token))
+    return pairs
+
+
+def _is_name_part(token: str) -> bool:
+    return token[:1].isupper()
+
+
+def _contains_reference(prediction: str, reference: str) -> bool:
+    ref_pairs, pred_pairs = _cased_tokens(reference), _cased_tokens(prediction)
+    ref_tokens = [normalized for normalized, _ in ref_pairs]
+    pred_tokens = [normalized for normalized, _ in pred_pairs]
+    if len(''.join(ref_tokens)) < 2 or len(pred_tokens) > len(ref_tokens) + CONTAINMENT_SLACK:
+        return False
+    if _has_negation(pred_tokens, ref_tokens):
+        return False
+    n = len(ref_tokens)
+    for i in range(len(pred_tokens) - n + 1):
+        if pred_tokens[i:i + n] != ref_tokens:
+            continue
+        # A capitalized reference continued by another capitalized word in the same sentence is part of a
+        # longer name ("George Washington" in "George Washington Carver"), which may be a different entity.
+        # Capitalized function words opening a sentence ("In Paris") do not count
+        before, after = pred_pairs[i - 1][1] if i else '', pred_pairs[i + n][1] if i + n < len(pred_pairs) else ''
+        if (_is_name_part(ref_pairs[0][1]) and _is_name_part(before) and not _SENTENCE_END.search(before)
+                and pred_pairs[i - 1][0] not in _FUNCTION_WORDS):
+            continue
+        if (_is_name_part(ref_pairs[-1][1]) and _is_name_part(after)
+                and not _SENTENCE_END.search(pred_pairs[i + n - 1][1])):
+            continue
+        return True
+    return False
+
+
+def check_equivalence(prediction: str, reference: str) -> Verdict:
+    """
+    Run the deterministic tiers in order and return the first one that settles the sample.
+
+    Returns:
+        A settled ``Verdict``, or one with tier ``llm_judge`` and ``correct=None`` to defer to the judge
+    """
+    pred, gold = normalize_answer(prediction), normalize_answer(reference)
+    if pred == gold:
+        return Verdict(EXACT, True)
+    if not pred:
+        return Verdict(EXACT, False, 'empty answer')
+
+    result = _quantity_verdict(prediction, reference)
+    if result is not None:
+        return Verdict(NUMERIC, *result)
+
+    converted_pred, converted_gold = convert_chinese_numerals(prediction), convert_chinese_numerals(reference)
+    if (converted_pred, converted_gold) != (prediction, reference):
+        if normalize_answer(converted_pred) == normalize_answer(converted_gold):
+            return Verdict(CHINESE_NUMERAL, True, f'{converted_pred} vs {converted_gold}')
+        result = _quantity_verdict(converted_pred, converted_gold)
+        if result is not None:
+            return Verdict(CHINESE_NUMERAL, *result)
+
+    if parse_quantity(reference) is None and _contains_reference(prediction, reference):
+        return Verdict(CONTAINMENT, True, 'reference contained in a short answer')
+    return Verdict(LLM_JUDGE, None)
+
+
+def summarize_tiers(tiers: Iterable[Optional[str]]) -> Dict[str, int]:
+    """Number of samples settled at each tier, in cascade order."""
+    counts = {tier: 0 for tier in TIERS}
+    for tier in tiers:
+        if tier in counts:
+            counts[tier] += 1
+    return counts
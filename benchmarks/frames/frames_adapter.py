@@ -1,17 +1,24 @@
-import os
 import re
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from evalscope.api.benchmark import BenchmarkMeta, DefaultDataAdapter
 from evalscope.api.dataset import DatasetDict, LocalDataLoader, Sample
 from evalscope.api.evaluator import TaskState
-from evalscope.api.metric import Score
+from evalscope.api.metric import AggScore, SampleScore, Score
 from evalscope.api.registry import register_benchmark
 from evalscope.constants import Tags
 from evalscope.utils.logger import get_logger
 
+from harness.artifacts import write_report_side_file
+from harness.semantic import SEMANTIC_EXTRA_PARAMS, SemanticSimilarityMixin
+
+from .context_packer import PackingConfig, TokenCounter, pack_context, resolve_budget
+from .equivalence import LLM_JUDGE, check_equivalence, summarize_tiers
+
 logger = get_logger()
 
+ANSWER_TIERS_DIR = 'answer_tiers'
+
 # TEMPLATE_0SHOT_EN = """Please read the following text and answer the question below.
 
 # <text>
@@ -44,9 +51,47 @@ TEMPLATE_0SHOT_ZH = """请阅读以下文本并回答问题。
         subset_list=['frames_en', 'frames_zh'],
         metric_list=['acc'],
         prompt_template=TEMPLATE_0SHOT_ZH,
+        extra_params={
+            'context_budget': {
+                'type': 'int | null',
+                'description':
+                'Prompt token budget for the wiki context; if null, derived from the model context window minus max_tokens.',  # noqa: E501
+                'value': None
+            },
+            'max_article_tokens': {
+                'type': 'int | null',
+                'description': 'Per-article token cap applied before packing.',
+                'value': None
+            },
+            'packing_strategy': {
+                'type': 'str',
+                'description': 'Order in which articles are admitted into the budget.',
+                'value': 'relevance',
+                'choices': ['relevance', 'original']
+            },
+            'min_article_tokens': {
+                'type': 'int',
+                'description': 'Articles that would be cut below this many tokens are dropped instead.',
+                'value': 64
+            },
+            'tokenizer': {
+                'type': 'str | null',
+                'description': 'Local tokenizer.json of the evaluated model for exact token counts.',
+                'value': None
+            },
+            'answer_cascade': {
+                'type': 'bool',
+                'description': 'With the LLM judge, settle answers by deterministic checks first and only judge the rest.',
+                'value': True
+            },
+            **SEMANTIC_EXTRA_PARAMS,
+        },
     )
 )
-class FramesAdapter(DefaultDataAdapter):
+class FramesAdapter(SemanticSimilarityMixin, DefaultDataAdapter):
+
+    # Bump when the scoring logic changes so incremental runs re-evaluate every sample
+    ADAPTER_VERSION = '3'
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -60,7 +105,20 @@ class FramesAdapter(DefaultDataAdapter):
             'model_id' in self._task_config.judge_model_args:
             self._use_llm_judge = True
             logger.info("LLM judge is enabled for FRAMES evaluation")
-        
+
+        self.packing_config = PackingConfig(
+            context_budget=self.extra_params.get('context_budget'),
+            max_article_tokens=self.extra_params.get('max_article_tokens'),
+            strategy=self.extra_params.get('packing_strategy', 'relevance'),
+            min_article_tokens=self.extra_params.get('min_article_tokens', 64),
+            tokenizer=self.extra_params.get('tokenizer'),
+        )
+        self.token_counter = TokenCounter(self._task_config.model_id, self.packing_config.tokenizer)
+        max_tokens = getattr(self._task_config.generation_config, 'max_tokens', None)
+        self.context_budget = resolve_budget(self.packing_config, self.token_counter, max_tokens)
+
+        self.answer_cascade = self.extra_params.get('answer_cascade', True)
+
     def load_from_disk(self, **kwargs):
         return super().load_from_disk(use_local_loader=True)
 
@@ -74,12 +132,27 @@ class FramesAdapter(DefaultDataAdapter):
         Returns:
             Sample: Sample object with input, target, and metadata.
         """
-        context = '\n'.join([f"{i['title']}\n{i['text']}" for i in record['wiki_items']])
         question = record['Prompt']
+        packed = pack_context(
+            [(item['title'], item['text']) for item in record['wiki_items']],
+            question,
+            self.prompt_template,
+            self.token_counter,
+            self.packing_config,
+            self.context_budget,
+        )
+        if packed.dropped or packed.truncated:
+            logger.debug(
+                f'FRAMES context packed to {packed.prompt_tokens}/{packed.budget} tokens: '
+                f'{packed.truncated} truncated, {packed.dropped} dropped'
+            )
+        packing = packed.to_metadata()
+        context = packing.pop('context')
 
         return Sample(
             input=question, target=record['Answer'], metadata={
                 'context': context,
+                'context_packing': packing,
                 # 'wiki_items': record['wiki_items']
             }
         )
@@ -139,6 +212,7 @@ class FramesAdapter(DefaultDataAdapter):
 
         score.value = {'acc': accuracy}
         score.main_score_name = 'acc'
+        self.add_semantic_similarity(score, filtered_prediction, reference)
 
         return score
 
@@ -151,6 +225,9 @@ class FramesAdapter(DefaultDataAdapter):
     ) -> Score:
         """
         Use LLM judge to evaluate the prediction against the reference.
+
+        With ``answer_cascade`` on, deterministic equivalence checks run first and the judge is only
+        called for samples none of them can settle; the settling tier is recorded in the score metadata.
         """
         from .utils import GENERAL_ORM_PROMPT, ORM_USER_TEMPLATE
 
@@ -159,6 +236,18 @@ class FramesAdapter(DefaultDataAdapter):
             prediction=original_prediction,
         )
 
+        if self.answer_cascade:
+            verdict = check_equivalence(filtered_prediction, reference)
+            if verdict.decided:
+                score.value = {'acc': float(verdict.correct)}
+                self.add_semantic_similarity(score, filtered_prediction, reference)
+                score.explanation = f'Settled by the {verdict.tier} check' + (
+                    f': {verdict.detail}' if verdict.detail else ''
+                )
+                score.metadata = {'source': 'rule_cascade', 'equivalence_tier': verdict.tier}
+                score.main_score_name = 'acc'
+                return score
+
         question = task_state.input_text
 
         # Get grading response
@@ -172,11 +261,45 @@ class FramesAdapter(DefaultDataAdapter):
             accuracy = 0.0
 
         score.value = {'acc': accuracy}
+        self.add_semantic_similarity(score, filtered_prediction, reference)
         score.explanation = f'LLM judge: {orm_response}'
         score.metadata = {
             'source': 'llm_judge',
             'judge_strategy': self.judge_strategy,
-            'model': self.llm_judge.model_id
+            'model': self.llm_judge.model_id,
+            'equivalence_tier': LLM_JUDGE,
         }
         score.main_score_name = 'acc'
         return score
+
+    def aggregate_scores(self, sample_scores: List[SampleScore]) -> List[AggScore]:
+        """
+        Mean scores plus ``judge_rate``, the share of samples sent to the LLM judge.
+
+        The per-tier counts of the answer cascade are attached to the ``judge_rate`` aggregate.
+        """
+        agg_scores = super().aggregate_scores(sample_scores)
+        tiers = [(ss.score.metadata or {}).get('equivalence_tier') for ss in sample_scores]
+        if any(tier is not None for tier in tiers):
+            counts = summarize_tiers(tiers)
+            agg_scores.append(AggScore(
+                metric_name='judge_rate',
+                score=counts[LLM_JUDGE] / len(sample_scores),
+                num=len(sample_scores),
+                metadata={'tiers': counts},
+            ))
+        return agg_scores
+
+    def generate_report(self, scores: Dict[str, List[AggScore]], model_name: str, output_dir: str, **kwargs):
+        report = super().generate_report(scores, model_name, output_dir, **kwargs)
+        tables = {
+            subset: agg.metadata['tiers']
+            for subset, agg_scores in scores.items()
+            for agg in agg_scores
+            if agg.metric_name == 'judge_rate' and agg.metadata
+        }
+        if tables:
+            write_report_side_file(output_dir, ANSWER_TIERS_DIR, self.name, tables)
+            for subset, counts in tables.items():
+                logger.info(f'FRAMES answer tiers for {subset}: {counts}')
+        return report
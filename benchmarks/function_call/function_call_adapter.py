@@ -0,0 +1,136 @@
+from typing import Any, Dict, List
+
+from evalscope.api.benchmark import BenchmarkMeta
+from evalscope.api.dataset import Sample
+from evalscope.api.evaluator import TaskState
+from evalscope.api.metric import AggScore, SampleScore, Score
+from evalscope.api.registry import register_benchmark
+from evalscope.benchmarks.general_fc.general_fc_adapter import GeneralFCAdapter
+from evalscope.constants import Tags
+from evalscope.report import Report
+from evalscope.utils.logger import get_logger
+
+from harness.artifacts import write_report_side_file
+
+from .tool_schema import SCHEMA_CACHE, expected_tools, per_tool_metrics
+
+logger = get_logger()
+
+TOOL_METRICS_DIR = 'tool_metrics'
+
+
+@register_benchmark(
+    BenchmarkMeta(
+        name='function_call',
+        pretty_name='Function-Call',
+        description='Function calling evaluation with cached JSON-schema validation and per-tool precision / recall.',
+        tags=[Tags.FUNCTION_CALLING, Tags.CUSTOM, Tags.AGENT],
+        dataset_id='function_call_dataset',
+        metric_list=[
+            'count_finish_reason_tool_call',
+            'count_successful_tool_call',
+            'schema_accuracy',
+            'tool_call_f1',
+            'tool_precision',
+            'tool_recall',
+        ],
+        aggregation='f1',
+        eval_split='test',
+    )
+)
+class FunctionCallAdapter(GeneralFCAdapter):
+    """
+    General function-call adapter whose tool calls are checked against compiled, cached validators.
+
+    Records may carry an optional ``expected_tools`` list of tool names; it is used for per-tool recall.
+    """
+
+    # Bump when the scoring logic changes so incremental runs re-evaluate every sample
+    ADAPTER_VERSION = '1'
+
+    def record_to_sample(self, record: Dict[str, Any]) -> Sample:
+        sample = super().record_to_sample(record)
+        sample.metadata['expected_tools'] = expected_tools(
+            sample.metadata['tools'], sample.metadata['should_call_tool'], record.get('expected_tools')
+        )
+        return sample
+
+    def match_score(self, original_prediction, filtered_prediction, reference, task_state: TaskState) -> Score:
+        score = Score(
+            prediction=original_prediction,
+            extracted_prediction=filtered_prediction,
+        )
+
+        model_output = task_state.output
+        should_call_tool = task_state.metadata.get('should_call_tool', False)
+        score.metadata = {
+            'should_call_tool': should_call_tool,
+            'expected_tools': task_state.metadata.get('expected_tools'),
+            'tool_calls': [],
+        }
+        if model_output.error:
+            score.value = {
+                'finish_reason_tool_call': 0,
+                'successful_tool_call': 0,
+                'should_call_tool': int(should_call_tool),
+            }
+            score.metadata['error_reason'] = f'Model inference error: {model_output.error}'
+            return score
+
+        is_call_tool = model_output.stop_reason == 'tool_calls'
+        checks = SCHEMA_CACHE.validate_calls(model_output.message.tool_calls or [], task_state.metadata['tools'])
+        invalid = next((check for check in checks if not check.valid), None)
+        score.value = {
+            'finish_reason_tool_call': int(is_call_tool),
+            'successful_tool_call': int(is_call_tool and invalid is None),
+            'should_call_tool': int(should_call_tool),
+        }
+        score.metadata['tool_calls'] = [check.to_dict() for check in checks]
+        score.metadata['error_reason'] = (
+            f"Schema validation failed for tool '{invalid.name}': {invalid.error}" if invalid else ''
+        )
+        return score
+
+    def aggregate_scores(self, sample_scores: List[SampleScore]) -> List[AggScore]:
+        """
+        General function-call metrics plus macro-averaged per-tool precision and recall.
+
+        The per-tool table is attached to the ``tool_precision`` aggregate and written next to the report.
+        """
+        agg_scores = super().aggregate_scores(sample_scores)
+        per_tool = per_tool_metrics([
+            {
+                'calls': (ss.score.metadata or {}).get('tool_calls'),
+                'expected': (ss.score.metadata or {}).get('expected_tools'),
+                'should_call_tool': (ss.score.value or {}).get('should_call_tool'),
+            }
+            for ss in sample_scores
+        ])
+        precisions = [row['precision'] for row in per_tool.values() if row['precision'] is not None]
+        recalls = [row['recall'] for row in per_tool.values() if row['recall'] is not None]
+        agg_scores.append(AggScore(
+            metric_name='tool_precision',
+            score=sum(precisions) / len(precisions) if precisions else 0.0,
+            num=len(sample_scores),
+            metadata={'per_tool': per_tool, 'schema_cache': SCHEMA_CACHE.stats()},
+        ))
+        agg_scores.append(AggScore(
+            metric_name='tool_recall',
+            score=sum(recalls) / len(recalls) if recalls else 0.0,
+            num=len(sample_scores),
+            metadata={},
+        ))
+        return agg_scores
+
+    def generate_report(self, scores: Dict[str, List[AggScore]], model_name: str, output_dir: str, **kwargs) -> Report:
+        report = super().generate_report(scores, model_name, output_dir, **kwargs)
+        tables = {
+            subset: agg.metadata
+            for subset, agg_scores in scores.items()
+            for agg in agg_scores
+            if agg.metric_name == 'tool_precision' and agg.metadata
+        }
+        if tables:
+            path = write_report_side_file(output_dir, TOOL_METRICS_DIR, self.name, tables)
+            logger.info(f'Per-tool metrics saved to {path}')
+        return report
@@ -1,18 +1,20 @@
 import sys
 import os
 import logging
-from evalscope.run import run_task
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from utils import parse_args, get_task_config
+from harness.runner import run_task
+
+import benchmarks.function_call.function_call_adapter
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
-# python benchmarks/general_fc/main.py --model Qwen/Qwen3-Next-80B-A3B-Instruct-FP8
+# python benchmarks/function_call/main.py --model Qwen/Qwen3-Next-80B-A3B-Instruct-FP8
 def main():
-    args = parse_args(benchmark_name="general_fc")
+    args = parse_args(benchmark_name="function_call")
     task_config = get_task_config(args)
 
     logger.info(f"开始评测任务: model={args.model}, dataset={args.dataset}")
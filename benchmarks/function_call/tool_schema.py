@@ -0,0 +1,177 @@
+import hashlib
+import json
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from jsonschema.exceptions import SchemaError
+from jsonschema.validators import validator_for
+
+# Error types reported for a single tool call, from the cheapest check to the most expensive
+UNKNOWN_TOOL = 'unknown_tool'
+INVALID_JSON = 'invalid_json'
+INVALID_SCHEMA = 'invalid_schema'
+MISSING_REQUIRED = 'missing_required'
+WRONG_TYPE = 'wrong_type'
+SCHEMA_MISMATCH = 'schema_mismatch'
+
+_ERROR_TYPES = {'required': MISSING_REQUIRED, 'type': WRONG_TYPE}
+
+
+def definition_hash(definition: Any) -> str:
+    """Stable hash of a JSON tool definition or schema, independent of key order."""
+    payload = json.dumps(definition, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+@dataclass
+class CallCheck:
+    """Validation result of one tool call."""
+
+    name: str
+    valid: bool
+    error_type: Optional[str] = None
+    error: str = ''
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class SchemaCache:
+    """
+    Compiled JSON-schema validators keyed by schema hash.
+
+    Function-call datasets repeat the same tool definitions across many records, so each distinct
+    parameter schema is checked and compiled once. Only the schemas of tools the model actually
+    called are hashed, so a request offering thousands of tools costs one name lookup per call.
+    """
+
+    def __init__(self):
+        self._validators: Dict[str, Any] = {}
+        self._schema_errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _compile(self, key: str, schema: Dict[str, Any]) -> None:
+        cls = validator_for(schema)
+        try:
+            cls.check_schema(schema)
+        except SchemaError as e:
+            self._schema_errors[key] = e.message
+            return
+        self._validators[key] = cls(schema)
+
+    def check(self, schema: Dict[str, Any], name: str, arguments: Any) -> CallCheck:
+        """Validate parsed arguments against a schema, compiling it on first use."""
+        key = definition_hash(schema)
+        if key in self._validators or key in self._schema_errors:
+            self.hits += 1
+        else:
+            with self._lock:
+                if key not in self._validators and key not in self._schema_errors:
+                    self.misses += 1
+                    self._compile(key, schema)
+        if key in self._schema_errors:
+            return CallCheck(name, False, INVALID_SCHEMA, self._schema_errors[key])
+        validator = self._validators[key]
+        if validator.is_valid(arguments):
+            return CallCheck(name, True)
+        error = min(validator.iter_errors(arguments), key=lambda e: len(e.path))
+        return CallCheck(name, False, _ERROR_TYPES.get(error.validator, SCHEMA_MISMATCH), error.message)
+
+    def validate_calls(self, calls: Sequence[Any], tools: Sequence[Dict[str, Any]]) -> List[CallCheck]:
+        """
+        Validate a batch of tool calls against the tools offered in the request.
+
+        Args:
+            calls: ``ToolCall`` objects or ``{'name', 'arguments'}`` dicts; arguments may be a JSON string
+            tools: OpenAI-style tool definitions
+
+        Returns:
+            One ``CallCheck`` per call, checking the tool name, JSON arguments, required fields and types
+        """
+        if not calls:
+            return []
+        functions = (tool.get('function', tool) for tool in tools)
+        schemas = {function['name']: function.get('parameters') or {'type': 'object'} for function in functions}
+        checks = []
+        for call in calls:
+            function = getattr(call, 'function', call)
+            name = function['name'] if isinstance(function, dict) else function.name
+            arguments = function['arguments'] if isinstance(function, dict) else function.arguments
+            if name not in schemas:
+                checks.append(CallCheck(name, False, UNKNOWN_TOOL, f"No schema found for tool '{name}'"))
+                continue
+            if isinstance(arguments, str):
+                try:
+                    arguments = json.loads(arguments) if arguments.strip() else {}
+                except json.JSONDecodeError as e:
+                    checks.append(CallCheck(name, False, INVALID_JSON, f'JSON parse failed: {e}'))
+                    continue
+            checks.append(self.check(schemas[name], name, arguments))
+        return checks
+
+    def stats(self) -> Dict[str, int]:
+        return {'schemas': len(self._validators) + len(self._schema_errors), 'hits': self.hits, 'misses': self.misses}
+
+
+# Shared by every adapter instance in the process, including rescoring workers
+SCHEMA_CACHE = SchemaCache()
+
+
+def expected_tools(record_tools: Sequence[Dict[str, Any]], should_call_tool: bool,
+                   expected: Optional[Sequence[str]]) -> Optional[List[str]]:
+    """
+    Tools the model is expected to call, used for per-tool recall.
+
+    An explicit ``expected_tools`` list wins; otherwise a sample that should not call a tool expects
+    none, and a sample offering exactly one tool expects that tool. Returns ``None`` when unknown.
+    """
+    if expected is not None:
+        return list(expected)
+    if not should_call_tool:
+        return []
+    if len(record_tools) == 1:
+        function = record_tools[0].get('function', record_tools[0])
+        return [function['name']]
+    return None
+
+
+def per_tool_metrics(samples: Sequence[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-tool precision and recall.
+
+    Each sample is ``{'calls': [CallCheck dicts], 'expected': list | None, 'should_call_tool': bool}``.
+    A tool counts as predicted in a sample when the model called it, and as correct when every call to
+    it is schema-valid and it was expected (or, with unknown expectations, a tool call was wanted).
+    Recall only uses samples whose expected tools are known.
+    """
+    table: Dict[str, Dict[str, int]] = {}
+
+    def row(name: str) -> Dict[str, int]:
+        return table.setdefault(name, {'predicted': 0, 'correct': 0, 'expected': 0, 'recalled': 0, 'invalid': 0})
+
+    for sample in samples:
+        expected = sample.get('expected')
+        called: Dict[str, bool] = {}
+        for call in sample.get('calls') or []:
+            called[call['name']] = called.get(call['name'], True) and call['valid']
+        for name, valid in called.items():
+            entry = row(name)
+            entry['predicted'] += 1
+            entry['invalid'] += int(not valid)
+            wanted = name in expected if expected is not None else bool(sample.get('should_call_tool'))
+            entry['correct'] += int(valid and wanted)
+        for name in expected or []:
+            entry = row(name)
+            entry['expected'] += 1
+            entry['recalled'] += int(called.get(name, False))
+
+    metrics = {}
+    for name in sorted(table):
+        entry = table[name]
+        precision = entry['correct'] / entry['predicted'] if entry['predicted'] else None
+        recall = entry['recalled'] / entry['expected'] if entry['expected'] else None
+        metrics[name] = dict(entry, precision=precision, recall=recall)
+    return metrics
@@ -0,0 +1,73 @@
+from typing import Dict, List, Tuple
+
+from evalscope.api.benchmark import BenchmarkMeta
+from evalscope.api.evaluator import TaskState
+from evalscope.api.metric import Score
+from evalscope.api.registry import BENCHMARK_REGISTRY, register_benchmark
+from evalscope.benchmarks.general_qa.general_qa_adapter import PROMPT_TEMPLATE, GeneralQAAdapter
+from evalscope.constants import Tags
+from evalscope.utils.logger import get_logger
+
+from harness.semantic import SEMANTIC_EXTRA_PARAMS, SemanticSimilarityMixin
+
+from .ngram_metrics import score_pair, score_pairs
+
+logger = get_logger()
+
+# Replace the EvalScope adapter registered under the same name, so existing configs and result paths keep working
+BENCHMARK_REGISTRY.pop('general_qa', None)
+
+
+@register_benchmark(
+    BenchmarkMeta(
+        name='general_qa',
+        pretty_name='General-QA',
+        description='A general question answering dataset for custom evaluation, '
+        'scored with cached CJK-aware BLEU and ROUGE.',
+        tags=[Tags.QA, Tags.CUSTOM],
+        dataset_id='general_qa',
+        metric_list=['BLEU', 'Rouge'],
+        few_shot_num=0,
+        train_split=None,
+        eval_split='test',
+        prompt_template=PROMPT_TEMPLATE,
+        extra_params=dict(SEMANTIC_EXTRA_PARAMS),
+    )
+)
+class CachedGeneralQAAdapter(SemanticSimilarityMixin, GeneralQAAdapter):
+    """General QA adapter whose BLEU / ROUGE come from the cached n-gram engine in ``ngram_metrics``."""
+
+    # Bump when the scoring logic changes so incremental runs re-evaluate every sample
+    ADAPTER_VERSION = '1'
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._ngram_scores: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def prepare_reviews(self, task_states: List[TaskState]) -> None:
+        """Score the whole subset with ``score_pairs`` before the per-sample ``match_score`` calls read the results."""
+        super().prepare_reviews(task_states)
+        pairs = self.review_pairs(task_states)
+        if pairs:
+            predictions, references = zip(*pairs)
+            self._ngram_scores = dict(zip(pairs, score_pairs(predictions, references, self.metric_list)))
+
+    def match_score(
+        self, original_prediction: str, filtered_prediction: str, reference: str, task_state: TaskState
+    ) -> Score:
+        score = Score(
+            extracted_prediction=filtered_prediction,
+            prediction=original_prediction,
+        )
+        try:
+            value = self._ngram_scores.get((filtered_prediction, reference))
+            if value is None:
+                value = score_pair(filtered_prediction, reference, self.metric_list)
+            score.value.update(value)
+            self.add_semantic_similarity(score, filtered_prediction, reference)
+        except Exception as e:
+            logger.error(f'Error calculating metrics {self.metric_list}: {e}')
+            return None
+
+        score.main_score_name = 'Rouge-L-R'
+        return score
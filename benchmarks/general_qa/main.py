@@ -2,10 +2,12 @@ import argparse
 import sys
 import os
 import logging
-from evalscope.run import run_task
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from utils import parse_args, get_task_config
+from harness.runner import run_task
+
+import benchmarks.general_qa.general_qa_adapter
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -0,0 +1,216 @@
+"""
+CJK-aware BLEU-1..4 and ROUGE-1/2/L for short QA answers.
+
+The numbers match the EvalScope general_qa metrics (``bleu_ngram_one_sample``, i.e. NLTK
+``sentence_bleu`` with one-hot weights and no smoothing, and ``compute_rouge_score_one_sample_zh``,
+i.e. ``rouge_chinese``), including their edge cases. Segmentation and n-gram statistics of every
+distinct text are computed once and cached, clipping uses Counter intersection, ROUGE-L uses a
+bit-parallel LCS, and large batches are spread over a process pool.
+"""
+import math
+import multiprocessing
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+BLEU_ORDERS = (1, 2, 3, 4)
+ROUGE_ORDERS = (1, 2)
+ROUGE_KEYS = ('1', '2', 'L')
+
+# Distinct texts kept in the segmentation cache; QA answers are short, so this is a few hundred MB at most
+CACHE_SIZE = 1 << 18
+# Below this many pairs a process pool costs more than it saves
+PARALLEL_THRESHOLD = 5000
+
+# Sentence splitting of rouge_chinese.Rouge.cut_sent
+_SENTENCE_PATTERNS = [
+    (re.compile('([。！？\\?])([^”’])'), r'\1\n\2'),
+    (re.compile('(\\.{6})([^”’])'), r'\1\n\2'),
+    (re.compile('(\\…{2})([^”’])'), r'\1\n\2'),
+    (re.compile('([。！？\\?][”’])([^，。！？\\?])'), r'\1\n\2'),
+]
+
+
+def has_chinese(text: str) -> bool:
+    return any('一' <= char <= '龥' for char in text)
+
+
+@lru_cache(maxsize=1)
+def _word_tokenizer():
+    """NLTK ``word_tokenize`` when the punkt model is installed, otherwise its word tokenizer alone."""
+    from nltk import word_tokenize
+    from nltk.tokenize import NLTKWordTokenizer
+
+    try:
+        word_tokenize('a. b.')
+        return word_tokenize
+    except LookupError:
+        return NLTKWordTokenizer().tokenize
+
+
+def _cut(text: str) -> List[str]:
+    import jieba
+
+    return jieba.lcut(text)
+
+
+def _rouge_words(text: str) -> List[str]:
+    """Word sequence rouge_chinese scores, after the jieba pre-segmentation EvalScope applies."""
+    if has_chinese(text):
+        text = ' '.join(_cut(text))
+    for pattern, repl in _SENTENCE_PATTERNS:
+        text = pattern.sub(repl, text)
+    sentences = [' '.join(sentence.split()) for sentence in text.rstrip().split('\n') if len(sentence) > 0]
+    return [word for sentence in sentences for word in sentence.split(' ')]
+
+
+def _ngrams(tokens: Sequence[str], n: int) -> List[Tuple[str, ...]]:
+    return [tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+
+
+@dataclass(frozen=True)
+class TextStats:
+    """Segmentation and n-gram statistics of one text, shared by every pair it appears in."""
+
+    text: str
+    bleu_length: int
+    bleu_counts: Tuple[Counter, ...]
+    rouge_words: Tuple[str, ...]
+    rouge_sets: Tuple[frozenset, ...]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def text_stats(text: str) -> TextStats:
+    tokens = _cut(text) if has_chinese(text) else _word_tokenizer()(text)
+    words = _rouge_words(text) if text else []
+    return TextStats(
+        text=text,
+        bleu_length=len(tokens),
+        bleu_counts=tuple(Counter(_ngrams(tokens, n)) for n in BLEU_ORDERS),
+        rouge_words=tuple(words),
+        rouge_sets=tuple(frozenset(_ngrams(words, n)) for n in ROUGE_ORDERS),
+    )
+
+
+def lcs_length(a: Sequence[str], b: Sequence[str]) -> int:
+    """Length of the longest common subsequence, bit-parallel over ``a`` (Hyyrö 2004)."""
+    if not a or not b:
+        return 0
+    masks: Dict[str, int] = {}
+    for i, token in enumerate(a):
+        masks[token] = masks.get(token, 0) | (1 << i)
+    full = (1 << len(a)) - 1
+    row = full
+    for token in b:
+        matches = row & masks.get(token, 0)
+        row = ((row + matches) | (row - matches)) & full
+    return len(a) - bin(row).count('1')
+
+
+def bleu_scores(hyp: TextStats, ref: TextStats) -> Dict[str, float]:
+    """BLEU-1..4 of one hypothesis against one reference, as ``sentence_bleu`` computes them."""
+    numerators, denominators = [], []
+    for hyp_counts, ref_counts in zip(hyp.bleu_counts, ref.bleu_counts):
+        numerators.append(sum((hyp_counts & ref_counts).values()))
+        denominators.append(max(1, sum(hyp_counts.values())))
+    if numerators[0] == 0:
+        return {f'bleu-{n}': 0 for n in BLEU_ORDERS}
+
+    if hyp.bleu_length > ref.bleu_length:
+        penalty = 1
+    elif hyp.bleu_length == 0:
+        penalty = 0
+    else:
+        penalty = math.exp(1 - ref.bleu_length / hyp.bleu_length)
+    # Zero precisions are replaced by the smallest float, as NLTK's default smoothing does
+    precisions = [
+        numerator / denominator if numerator else sys.float_info.min
+        for numerator, denominator in zip(numerators, denominators)
+    ]
+    return {
+        f'bleu-{n}': penalty * math.exp(math.fsum([math.log(precisions[n - 1])]))
+        for n in BLEU_ORDERS
+    }
+
+
+def _f1(precision: float, recall: float) -> float:
+    return 2.0 * ((precision * recall) / (precision + recall + 1e-8))
+
+
+def rouge_scores(hyp: TextStats, ref: TextStats) -> Dict[str, float]:
+    """ROUGE-1/2/L recall, precision and F of one pair; empty when either side is empty, as in EvalScope."""
+    if not hyp.text or not ref.text or not hyp.rouge_words or not ref.rouge_words:
+        return {}
+    result = {}
+    for n, hyp_set, ref_set in zip(ROUGE_ORDERS, hyp.rouge_sets, ref.rouge_sets):
+        overlap = len(hyp_set & ref_set)
+        precision = overlap / len(hyp_set) if hyp_set else 0.0
+        recall = overlap / len(ref_set) if ref_set else 0.0
+        result[f'Rouge-{n}-R'] = recall
+        result[f'Rouge-{n}-P'] = precision
+        result[f'Rouge-{n}-F'] = _f1(precision, recall)
+    lcs = lcs_length(ref.rouge_words, hyp.rouge_words)
+    recall, precision = lcs / len(ref.rouge_words), lcs / len(hyp.rouge_words)
+    result['Rouge-L-R'] = recall
+    result['Rouge-L-P'] = precision
+    result['Rouge-L-F'] = _f1(precision, recall)
+    return result
+
+
+def score_pair(prediction: str, reference: str, metrics: Sequence[str] = ('BLEU', 'Rouge')) -> Dict[str, float]:
+    """Scores of one pair for the configured EvalScope metric names (``BLEU``, ``Rouge``)."""
+    hyp, ref = text_stats(prediction), text_stats(reference)
+    value = {}
+    for metric in metrics:
+        if metric == 'Rouge':
+            value.update(rouge_scores(hyp, ref))
+        elif metric == 'BLEU':
+            value.update(bleu_scores(hyp, ref))
+    return value
+
+
+def _score_chunk(args: Tuple[List[Tuple[str, str]], Tuple[str, ...]]) -> List[Dict[str, float]]:
+    pairs, metrics = args
+    return [score_pair(prediction, reference, metrics) for prediction, reference in pairs]
+
+
+def score_pairs(
+    predictions: Sequence[str],
+    references: Sequence[str],
+    metrics: Sequence[str] = ('BLEU', 'Rouge'),
+    num_workers: Optional[int] = None,
+) -> List[Dict[str, float]]:
+    """
+    Score a batch of prediction / reference pairs.
+
+    Identical texts are segmented once. Batches of at least ``PARALLEL_THRESHOLD`` pairs are split
+    into chunks scored by a process pool; results keep the input order. Workers are started with
+    ``forkserver`` (``spawn`` where unavailable) rather than forked, since the caller usually runs
+    evaluator threads, and each worker builds its own segmentation cache.
+
+    Args:
+        predictions: model answers
+        references: reference answers, one per prediction
+        metrics: EvalScope metric names to compute
+        num_workers: process count, defaults to the CPU count; 1 scores in this process
+
+    Returns:
+        One score dict per pair
+    """
+    assert len(predictions) == len(references), 'predictions and references must have the same length'
+    pairs = list(zip(predictions, references))
+    metrics = tuple(metrics)
+    num_workers = num_workers or multiprocessing.cpu_count()
+    if num_workers <= 1 or len(pairs) < PARALLEL_THRESHOLD:
+        return _score_chunk((pairs, metrics))
+
+    chunk_size = -(-len(pairs) // (num_workers * 4))
+    chunks = [(pairs[i:i + chunk_size], metrics) for i in range(0, len(pairs), chunk_size)]
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=context) as executor:
+        return [score for chunk in executor.map(_score_chunk, chunks) for score in chunk]
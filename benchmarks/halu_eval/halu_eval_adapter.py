@@ -41,6 +41,9 @@ logger = get_logger()
 )
 class HaluEvalAdapter(DefaultDataAdapter):
 
+    # Bump when the scoring logic changes so incremental runs re-evaluate every sample
+    ADAPTER_VERSION = '1'
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.add_overall_metric = False
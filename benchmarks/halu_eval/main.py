@@ -6,11 +6,10 @@ import logging
 # 注意：需要 datasets==3.6.0，datasets 4.x 版本不兼容
 import datasets
 
-from evalscope.run import run_task
-
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from utils import parse_args, get_task_config
+from harness.runner import run_task
 
 import benchmarks.halu_eval.halu_eval_adapter
 
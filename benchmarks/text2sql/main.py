@@ -1,11 +1,11 @@
 import os
 import sys
 import logging
-from evalscope.run import run_task
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from utils import parse_args, get_task_config
+from harness.runner import run_task
 
 import benchmarks.text2sql.text2sql_adapter
 
@@ -0,0 +1,286 @@
+"""
+Schema catalog and relevant-table pruning for text2sql prompts.
+
+Schema entries (``CREATE TABLE`` statements or free-text field notes) are parsed once per distinct
+entry and shared across records. Before a prompt is rendered, tables are ranked by lexical overlap
+between the question and each table's name, column names and comments, and only the top-k are kept.
+"""
+import hashlib
+import math
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+_CREATE_PATTERN = re.compile(
+    r'create\s+(?:temporary\s+)?table\s+(?:if\s+not\s+exists\s+)?(?P<name>[\w."`\[\]]+)\s*\(', re.IGNORECASE
+)
+_COMMENT_PATTERN = re.compile(r"comment\s*=?\s*'((?:''|[^'])*)'", re.IGNORECASE)
+_LINE_COMMENT_PATTERN = re.compile(r'--\s*(.*)')
+_REFERENCES_PATTERN = re.compile(r'references\s+([\w."`\[\]]+)', re.IGNORECASE)
+_CONSTRAINT_WORDS = {'primary', 'foreign', 'constraint', 'unique', 'index', 'key', 'check', 'fulltext'}
+_LATIN_WORD_PATTERN = re.compile(r'[a-z0-9]+')
+_CJK_RUN_PATTERN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff]+')
+_CAMEL_PATTERN = re.compile(r'(?<=[a-z0-9])(?=[A-Z])')
+_STRING_LITERAL_PATTERN = re.compile(r"'(?:''|[^'])*'")
+_IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_$]*')
+
+# Weight of a term match in the table name, column names and comments
+NAME_WEIGHT = 3.0
+COLUMN_WEIGHT = 1.5
+COMMENT_WEIGHT = 1.0
+
+# Common Chinese business terms and the identifier words they usually map to, so Chinese questions
+# can match English schemas without comments
+TERM_GLOSSARY: Dict[str, Tuple[str, ...]] = {
+    '用户': ('user', 'account'), '账户': ('account', ), '账号': ('account', ), '客户': ('customer', 'client'),
+    '订单': ('order', ), '商品': ('product', 'item', 'goods'), '产品': ('product', ), '价格': ('price', ),
+    '金额': ('amount', 'total'), '数量': ('quantity', 'count'), '库存': ('stock', 'inventory'),
+    '员工': ('employee', 'staff'), '部门': ('department', 'dept'), '工资': ('salary', ), '薪资': ('salary', ),
+    '学生': ('student', ), '课程': ('course', ), '成绩': ('score', 'grade'), '老师': ('teacher', ),
+    '教师': ('teacher', ), '城市': ('city', ), '国家': ('country', ), '地址': ('address', ),
+    '邮箱': ('email', ), '电话': ('phone', ), '手机': ('phone', 'mobile'), '年龄': ('age', ),
+    '性别': ('gender', 'sex'), '姓名': ('name', ), '名称': ('name', ), '用户名': ('username', ),
+    '日期': ('date', ), '时间': ('time', 'date'), '注册': ('registration', 'signup', 'register'),
+    '登录': ('login', ), '状态': ('status', ), '类别': ('category', ), '分类': ('category', ),
+    '评论': ('comment', 'review'), '评分': ('rating', 'score'), '支付': ('payment', 'pay'),
+    '供应商': ('supplier', 'vendor'), '销售': ('sale', 'sales'), '会话': ('session', ), '日志': ('log', ),
+    '项目': ('project', ), '任务': ('task', ), '文章': ('article', 'post'), '标签': ('tag', ),
+}
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def _identifier_terms(identifier: str) -> Set[str]:
+    """Words of a snake_case / camelCase identifier, stemmed, plus the whole identifier."""
+    words = _LATIN_WORD_PATTERN.findall(_CAMEL_PATTERN.sub('_', identifier).lower())
+    terms = {_stem(word) for word in words if len(word) > 1}
+    terms.add(identifier.lower())
+    return terms
+
+
+def _text_terms(text: str) -> Set[str]:
+    """Stemmed Latin words and CJK character bigrams; CJK glossary terms add their English words."""
+    lowered = text.lower()
+    terms = {_stem(word) for word in _LATIN_WORD_PATTERN.findall(lowered) if len(word) > 1}
+    for run in _CJK_RUN_PATTERN.findall(lowered):
+        terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    for term, words in TERM_GLOSSARY.items():
+        if term in text:
+            terms.update(words)
+    return terms
+
+
+def _unquote(identifier: str) -> str:
+    return identifier.strip('"`[]').split('.')[-1].strip('"`[]')
+
+
+def _split_columns(body: str) -> List[str]:
+    parts, depth, current = [], 0, []
+    for char in body:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        if char == ',' and depth == 0:
+            parts.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append(''.join(current))
+    return parts
+
+
+@dataclass
+class TableSchema:
+    """One schema entry: a parsed ``CREATE TABLE`` statement, or a free-text note when ``name`` is None."""
+
+    text: str
+    name: Optional[str] = None
+    columns: List[Tuple[str, str]] = field(default_factory=list)
+    comment: str = ''
+    references: List[str] = field(default_factory=list)
+    name_terms: Set[str] = field(default_factory=set)
+    column_terms: Set[str] = field(default_factory=set)
+    comment_terms: Set[str] = field(default_factory=set)
+
+    @classmethod
+    def parse(cls, text: str) -> 'TableSchema':
+        match = _CREATE_PATTERN.search(text)
+        if not match:
+            return cls(text=text, comment_terms=_text_terms(text))
+        name = _unquote(match.group('name'))
+        depth, end = 1, len(text)
+        for i in range(match.end(), len(text)):
+            depth += {'(': 1, ')': -1}.get(text[i], 0)
+            if depth == 0:
+                end = i
+                break
+        columns = []
+        for line in _split_columns(text[match.end():end]):
+            definition = line.strip()
+            if not definition:
+                continue
+            first = definition.split()[0]
+            if first.lower() in _CONSTRAINT_WORDS:
+                continue
+            comment = _COMMENT_PATTERN.search(definition) or _LINE_COMMENT_PATTERN.search(definition)
+            columns.append((_unquote(first), comment.group(1).strip() if comment else ''))
+        trailing = _COMMENT_PATTERN.search(text[end:]) or _LINE_COMMENT_PATTERN.search(text[:match.start()])
+        table = cls(
+            text=text,
+            name=name,
+            columns=columns,
+            comment=trailing.group(1).strip() if trailing else '',
+            references=[_unquote(ref) for ref in _REFERENCES_PATTERN.findall(text)],
+        )
+        table.name_terms = _identifier_terms(name)
+        for column, comment in columns:
+            table.column_terms |= _identifier_terms(column)
+            table.comment_terms |= _text_terms(comment)
+        table.comment_terms |= _text_terms(table.comment)
+        return table
+
+
+@dataclass
+class PruningResult:
+    schema: str
+    tables_total: int
+    tables_kept: int
+    kept_tables: List[str]
+    gold_tables: List[str]
+    recall: float
+    chars_before: int
+    chars_after: int
+    top_columns: Dict[str, List[str]] = field(default_factory=dict)
+
+    def to_metadata(self) -> Dict[str, Any]:
+        metadata = asdict(self)
+        metadata.pop('schema')
+        return metadata
+
+
+class SchemaCatalog:
+    """
+    Deduplicated schema entries shared by every record of a dataset.
+
+    Production schemas repeat the same hundreds of tables across records; each distinct entry is
+    parsed and indexed once, keyed by its text hash.
+    """
+
+    def __init__(self):
+        self._tables: Dict[str, TableSchema] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+    def resolve(self, entries: Sequence[str]) -> List[TableSchema]:
+        tables = []
+        for entry in entries:
+            key = hashlib.sha1(entry.encode('utf-8')).hexdigest()
+            table = self._tables.get(key)
+            if table is None:
+                with self._lock:
+                    table = self._tables.setdefault(key, TableSchema.parse(entry))
+            tables.append(table)
+        return tables
+
+
+def rank_tables(question: str, tables: Sequence[TableSchema]) -> List[Tuple[float, TableSchema, List[str]]]:
+    """
+    Rank the tables of one schema by relevance to the question.
+
+    Each question term found in a table scores its IDF over the schema's tables, weighted by where
+    it matched (table name > column name > comment). Ties keep schema order.
+
+    Returns:
+        ``(score, table, matched columns)`` for every table, most relevant first
+    """
+    question_terms = _text_terms(question)
+    named = [table for table in tables if table.name]
+    document_frequency: Dict[str, int] = {}
+    for table in named:
+        for term in table.name_terms | table.column_terms | table.comment_terms:
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+
+    ranked = []
+    for index, table in enumerate(named):
+        score = 0.0
+        for term in question_terms:
+            df = document_frequency.get(term)
+            if not df:
+                continue
+            idf = math.log(1 + len(named) / df)
+            weight = max(
+                NAME_WEIGHT if term in table.name_terms else 0.0,
+                COLUMN_WEIGHT if term in table.column_terms else 0.0,
+                COMMENT_WEIGHT if term in table.comment_terms else 0.0,
+            )
+            score += idf * weight
+        matched = [
+            column for column, comment in table.columns
+            if question_terms & (_identifier_terms(column) | _text_terms(comment))
+        ]
+        ranked.append((score, index, table, matched))
+    ranked.sort(key=lambda item: (-item[0], item[1]))
+    return [(score, table, matched) for score, _, table, matched in ranked]
+
+
+def sql_tables(sql: str, table_names: Sequence[str]) -> List[str]:
+    """Tables of the schema that the SQL (or a schema note) refers to; string literals are ignored."""
+    words = {word.lower() for word in _IDENTIFIER_PATTERN.findall(_STRING_LITERAL_PATTERN.sub(' ', sql))}
+    return [name for name in table_names if name.lower() in words]
+
+
+def prune_schema(
+    question: str,
+    tables: Sequence[TableSchema],
+    top_k: Optional[int],
+    ground_truth: Optional[str] = None,
+) -> PruningResult:
+    """
+    Keep the ``top_k`` most relevant tables, rendered in schema order.
+
+    Free-text notes are kept when they mention a kept table or no table at all. With ``top_k`` unset
+    or not smaller than the table count the schema is unchanged. When the ground-truth SQL is given,
+    the recall of the tables it uses is recorded.
+    """
+    named = [table for table in tables if table.name]
+    ranked = rank_tables(question, tables)
+    if top_k is not None and top_k < len(named):
+        kept = {id(table) for _, table, _ in ranked[:top_k]}
+    else:
+        kept = {id(table) for table in named}
+    kept_names = [table.name for table in named if id(table) in kept]
+
+    rendered = []
+    for table in tables:
+        if table.name:
+            if id(table) in kept:
+                rendered.append(table.text)
+        else:
+            mentioned = sql_tables(table.text, [named_table.name for named_table in named])
+            if not mentioned or any(name in kept_names for name in mentioned):
+                rendered.append(table.text)
+
+    gold = sql_tables(ground_truth, [table.name for table in named]) if ground_truth else []
+    recall = sum(1 for name in gold if name in kept_names) / len(gold) if gold else 1.0
+    schema = '\n'.join(rendered)
+    return PruningResult(
+        schema=schema,
+        tables_total=len(named),
+        tables_kept=len(kept_names),
+        kept_tables=kept_names,
+        gold_tables=gold,
+        recall=recall,
+        chars_before=len('\n'.join(table.text for table in tables)),
+        chars_after=len(schema),
+        top_columns={table.name: matched for _, table, matched in ranked if id(table) in kept and matched},
+    )
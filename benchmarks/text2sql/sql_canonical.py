@@ -0,0 +1,522 @@
+"""
+Canonical SQL structures and structural similarity for text2sql.
+
+SQL is lexed with sqlparse and parsed into a clause structure with:
+
+- alias resolution: table aliases are replaced by table names (qualifiers are dropped when the
+  query reads a single table), select aliases used in ORDER BY / HAVING and ORDER BY positions
+  are replaced by the selected expression
+- commutative ordering: AND / OR operands, ``=`` / ``<>`` operands, IN lists, GROUP BY keys and
+  FROM tables are sorted, ``5 < age`` becomes ``age > 5``, and inner-join ON conditions are
+  merged into WHERE so ``a JOIN b ON ...`` equals ``a, b WHERE ...``
+- normalized literals and identifiers: case, quoting and number formatting are unified
+
+Reference structures are stored in an on-disk cache keyed by SQL hash, so each ground-truth
+query is parsed once across models and runs.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from sqlparse import lexer, tokens as T
+
+# Bump when the canonical form changes so cached structures are rebuilt
+CANONICAL_VERSION = '2'
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'sql_canonical.jsonl')
+
+_CLAUSES = {'SELECT', 'FROM', 'WHERE', 'GROUP BY', 'HAVING', 'ORDER BY', 'LIMIT', 'OFFSET', 'ON', 'USING'}
+_SET_OPERATORS = {'UNION', 'UNION ALL', 'INTERSECT', 'EXCEPT', 'MINUS'}
+_JOIN_PATTERN = re.compile(r'^(?:NATURAL )?(?:(?P<side>LEFT|RIGHT|FULL)(?: OUTER)? |INNER |CROSS )?JOIN$')
+_FLIPPED = {'<': '>', '>': '<', '<=': '>=', '>=': '<=', '=': '=', '<>': '<>'}
+_SCALAR_KEYS = {'distinct', 'limit', 'offset'}
+_ORDERED_KEYS = {'order_by'}
+_ITEM_TOKEN_PATTERN = re.compile(r"'(?:''|[^'])*'|[\w.]+|[^\s\w]")
+
+
+@dataclass(frozen=True)
+class Tok:
+    kind: str  # kw, name, str, num, op, punct
+    text: str
+
+
+@dataclass
+class Group:
+    """Parenthesized token list."""
+
+    items: List[Union[Tok, 'Group']]
+
+
+Item = Union[Tok, Group]
+
+
+def _normalize_number(value: str) -> str:
+    try:
+        number = Decimal(value).normalize()
+    except InvalidOperation:
+        return value
+    return format(number, 'f')
+
+
+def _lex(sql: str) -> List[Tok]:
+    toks = []
+    for ttype, value in lexer.tokenize(sql):
+        if ttype in T.Whitespace or ttype in T.Comment or ttype is T.Newline:
+            continue
+        if ttype in T.Keyword:
+            toks.append(Tok('kw', ' '.join(value.upper().split())))
+        elif ttype in T.Literal.String.Single:
+            toks.append(Tok('str', value))
+        elif ttype in T.Literal.Number:
+            toks.append(Tok('num', _normalize_number(value)))
+        elif ttype in T.Name or ttype in T.Literal.String.Symbol:
+            toks.append(Tok('name', value.strip('"`[]').lower()))
+        elif ttype in T.Operator.Comparison:
+            toks.append(Tok('op', {'!=': '<>', '==': '='}.get(value, value)))
+        elif ttype in T.Punctuation and value in '(),.;':
+            toks.append(Tok('punct', value))
+        else:
+            toks.append(Tok('op', value.lower()))
+    while toks and toks[-1] == Tok('punct', ';'):
+        toks.pop()
+    return toks
+
+
+def _nest(toks: Sequence[Tok]) -> List[Item]:
+    """Turn parentheses into nested groups; unbalanced closing parentheses are dropped."""
+    stack: List[List[Item]] = [[]]
+    for tok in toks:
+        if tok == Tok('punct', '('):
+            stack.append([])
+        elif tok == Tok('punct', ')'):
+            if len(stack) > 1:
+                items = stack.pop()
+                stack[-1].append(Group(items))
+        else:
+            stack[-1].append(tok)
+    while len(stack) > 1:
+        items = stack.pop()
+        stack[-1].append(Group(items))
+    return stack[0]
+
+
+def _is(item: Item, kind: str, *texts: str) -> bool:
+    return isinstance(item, Tok) and item.kind == kind and (not texts or item.text in texts)
+
+
+def _split(items: Sequence[Item], kind: str, *texts: str) -> List[List[Item]]:
+    parts: List[List[Item]] = [[]]
+    for item in items:
+        if _is(item, kind, *texts):
+            parts.append([])
+        else:
+            parts[-1].append(item)
+    return parts
+
+
+def _is_subquery(group: Group) -> bool:
+    return bool(group.items) and _is(group.items[0], 'kw', 'SELECT', 'WITH')
+
+
+def _is_literal(text: str) -> bool:
+    return text.startswith("'") or bool(re.match(r'^-?\d', text)) or text == 'null'
+
+
+class _Scope:
+    """Table and select aliases visible in one query block."""
+
+    def __init__(self, parent: Optional['_Scope'] = None):
+        self.parent = parent
+        self.tables: Dict[str, str] = {}
+        self.select_aliases: Dict[str, str] = {}
+        self.select_items: List[str] = []
+        self.single_table = False
+
+    def table(self, qualifier: str) -> Tuple[str, '_Scope']:
+        scope = self
+        while scope is not None:
+            if qualifier in scope.tables:
+                return scope.tables[qualifier], scope
+            scope = scope.parent
+        return qualifier, self
+
+    def column(self, qualifier: str, name: str) -> str:
+        table, scope = self.table(qualifier)
+        if scope.single_table and scope is self:
+            return name
+        return f'{table}.{name}'
+
+
+def _render(items: Sequence[Item], scope: _Scope, use_select_aliases: bool = False) -> str:
+    pieces: List[str] = []
+    i = 0
+    while i < len(items):
+        item = items[i]
+        if isinstance(item, Group):
+            if _is_subquery(item):
+                text = f'({canonical_string(_parse_query(item.items, scope))})'
+            elif i > 0 and _is(items[i - 1], 'kw', 'IN', 'NOT IN'):
+                text = '(' + ', '.join(sorted(_render(part, scope) for part in _split(item.items, 'punct', ','))) + ')'
+            else:
+                text = '(' + ', '.join(_render(part, scope) for part in _split(item.items, 'punct', ',')) + ')'
+            if pieces and i > 0 and _is(items[i - 1], 'name'):
+                pieces[-1] += text  # function call
+            else:
+                pieces.append(text)
+        elif item.kind == 'name' and i + 2 < len(items) and _is(items[i + 1], 'punct', '.') and isinstance(
+                items[i + 2], Tok):
+            # Qualified reference: table.column or schema.table.column
+            parts = [item.text]
+            while i + 2 < len(items) and _is(items[i + 1], 'punct', '.') and isinstance(items[i + 2], Tok):
+                parts.append(items[i + 2].text)
+                i += 2
+            pieces.append(scope.column('.'.join(parts[:-1]), parts[-1]))
+        elif item.kind in ('name', 'kw') and use_select_aliases and len(items) == 1 \
+                and item.text.lower() in scope.select_aliases:
+            # Aliases that happen to be keywords (count, quarter ...) are lexed as keywords
+            pieces.append(scope.select_aliases[item.text.lower()])
+        elif item.kind == 'num' and use_select_aliases and len(items) == 1 and item.text.isdigit() \
+                and 0 < int(item.text) <= len(scope.select_items):
+            pieces.append(scope.select_items[int(item.text) - 1])
+        else:
+            pieces.append(item.text if item.kind in ('str', 'num') else item.text.lower())
+        i += 1
+    return ' '.join(pieces)
+
+
+def _conjuncts(items: Sequence[Item]) -> List[List[Item]]:
+    """Split on top-level AND, keeping the AND of ``BETWEEN x AND y``."""
+    parts: List[List[Item]] = [[]]
+    in_between = False
+    for item in items:
+        if _is(item, 'kw', 'BETWEEN', 'NOT BETWEEN'):
+            in_between = True
+        elif _is(item, 'kw', 'AND'):
+            if in_between:
+                in_between = False
+            else:
+                parts.append([])
+                continue
+        parts[-1].append(item)
+    return [part for part in parts if part]
+
+
+def _comparison(items: Sequence[Item], scope: _Scope, use_select_aliases: bool) -> str:
+    ops = [i for i, item in enumerate(items) if _is(item, 'op', *_FLIPPED)]
+    if len(ops) != 1:
+        return _render(items, scope, use_select_aliases)
+    i = ops[0]
+    op = items[i].text
+    left = _render(items[:i], scope, use_select_aliases)
+    right = _render(items[i + 1:], scope, use_select_aliases)
+    if op in ('=', '<>'):
+        left, right = sorted([left, right])
+    elif _is_literal(left) and not _is_literal(right):
+        left, right, op = right, left, _FLIPPED[op]
+    return f'{left} {op} {right}'
+
+
+def _predicates(items: Sequence[Item], scope: _Scope, use_select_aliases: bool = False) -> List[str]:
+    """
+    Sorted canonical conjuncts of a boolean expression.
+
+    AND binds tighter than OR, so the expression is split on top-level OR first and each
+    disjunct on AND: ``a OR b AND c`` is ``a OR (b AND c)``, not ``(a OR b) AND c``.
+    """
+    disjuncts = _split(items, 'kw', 'OR')
+    if len(disjuncts) > 1:
+        terms = []
+        for disjunct in disjuncts:
+            inner = _predicates(disjunct, scope, use_select_aliases)
+            terms.append(inner[0] if len(inner) == 1 else '(' + ' and '.join(inner) + ')')
+        return ['(' + ' or '.join(sorted(terms)) + ')']
+    result = []
+    for conjunct in _conjuncts(items):
+        if len(conjunct) == 1 and isinstance(conjunct[0], Group) and not _is_subquery(conjunct[0]):
+            result.extend(_predicates(conjunct[0].items, scope, use_select_aliases))
+        else:
+            result.append(_comparison(conjunct, scope, use_select_aliases))
+    return sorted(result)
+
+
+def _strip_alias(items: List[Item]) -> Tuple[List[Item], Optional[str]]:
+    """Split ``expr [AS] alias`` into the expression and the alias."""
+    for i, item in enumerate(items):
+        if _is(item, 'kw', 'AS') and i + 1 < len(items) and isinstance(items[i + 1], Tok):
+            return items[:i], items[i + 1].text.strip("'").lower()
+    if len(items) > 1 and _is(items[-1], 'name'):
+        previous = items[-2]
+        if isinstance(previous, Group) or previous.kind in ('name', 'str', 'num') or _is(previous, 'kw', 'END'):
+            return items[:-1], items[-1].text
+    return items, None
+
+
+def _table(items: List[Item], scope: _Scope) -> str:
+    expr, alias = _strip_alias(items)
+    if len(expr) == 1 and isinstance(expr[0], Group) and _is_subquery(expr[0]):
+        name = f'({canonical_string(_parse_query(expr[0].items, scope))})'
+    else:
+        name = ''.join(item.text if isinstance(item, Tok) else '' for item in expr)
+    scope.tables[name] = name
+    if alias:
+        scope.tables[alias] = name
+    return name
+
+
+def _clauses(items: Sequence[Item]) -> List[Tuple[str, List[Item]]]:
+    clauses: List[Tuple[str, List[Item]]] = [('', [])]
+    for item in items:
+        if isinstance(item, Tok) and item.kind == 'kw' and (item.text in _CLAUSES or _JOIN_PATTERN.match(item.text)):
+            clauses.append((item.text, []))
+        else:
+            clauses[-1][1].append(item)
+    return [(keyword, body) for keyword, body in clauses if keyword or body]
+
+
+def _parse_block(items: Sequence[Item], parent: Optional[_Scope]) -> Dict[str, Any]:
+    scope = _Scope(parent)
+    clauses = _clauses(items)
+
+    # First pass: tables and aliases, so every clause renders with the same resolution
+    from_tables, join_at = [], {}
+    for index, (keyword, body) in enumerate(clauses):
+        if keyword == 'FROM':
+            from_tables.extend(_table(part, scope) for part in _split(body, 'punct', ',') if part)
+        elif _JOIN_PATTERN.match(keyword):
+            join_at[index] = (keyword, _table(body, scope))
+    scope.single_table = len(set(scope.tables.values())) == 1
+
+    structure: Dict[str, Any] = {}
+    select_body = next((body for keyword, body in clauses if keyword == 'SELECT'), None)
+    if select_body is not None:
+        if select_body and _is(select_body[0], 'kw', 'DISTINCT'):
+            structure['distinct'] = True
+            select_body = select_body[1:]
+        for part in _split(select_body, 'punct', ','):
+            expr, alias = _strip_alias(part)
+            text = _render(expr, scope)
+            scope.select_items.append(text)
+            if alias:
+                scope.select_aliases[alias] = text
+        structure['select'] = list(scope.select_items)
+
+    tables, where, outer_joins, other = list(from_tables), [], [], []
+    for index, (keyword, body) in enumerate(clauses):
+        if keyword == 'WHERE':
+            where.extend(_predicates(body, scope))
+        elif keyword == 'GROUP BY':
+            structure['group_by'] = sorted(_render(part, scope, True) for part in _split(body, 'punct', ','))
+        elif keyword == 'HAVING':
+            structure['having'] = _predicates(body, scope, True)
+        elif keyword == 'ORDER BY':
+            order = []
+            for part in _split(body, 'punct', ','):
+                direction = 'asc'
+                if part and _is(part[-1], 'kw') and part[-1].text.split()[0] in ('ASC', 'DESC'):
+                    direction = part[-1].text.lower()
+                    part = part[:-1]
+                order.append(f'{_render(part, scope, True)} {direction}')
+            structure['order_by'] = order
+        elif keyword == 'LIMIT':
+            parts = _split(body, 'punct', ',')
+            if len(parts) == 2:
+                structure['offset'] = _render(parts[0], scope)
+            structure['limit'] = _render(parts[-1], scope)
+        elif keyword == 'OFFSET':
+            structure['offset'] = _render(body, scope)
+        elif keyword in ('ON', 'USING') and index - 1 in join_at:
+            join_keyword, table = join_at.pop(index - 1)
+            side = _JOIN_PATTERN.match(join_keyword).group('side')
+            condition = _predicates(body, scope) if keyword == 'ON' else [f'using {_render(body, scope)}']
+            if side:
+                outer_joins.append(f"{side.lower()} join {table} on {' and '.join(condition)}")
+            else:
+                tables.append(table)
+                where.extend(condition)
+        elif keyword == '' and body:
+            other.append(_render(body, scope))
+    for keyword, table in join_at.values():
+        side = _JOIN_PATTERN.match(keyword).group('side')
+        if side:
+            outer_joins.append(f'{side.lower()} join {table}')
+        else:
+            tables.append(table)
+
+    for key, values in (('from', tables), ('join', outer_joins), ('where', where), ('other', other)):
+        if values:
+            structure[key] = sorted(values)
+    return structure
+
+
+def _parse_query(items: Sequence[Item], parent: Optional[_Scope] = None) -> Dict[str, Any]:
+    items = list(items)
+    ctes = []
+    if items and _is(items[0], 'kw', 'WITH'):
+        start = next((i for i, item in enumerate(items) if _is(item, 'kw', 'SELECT')), len(items))
+        for part in _split(items[1:start], 'punct', ','):
+            if not part:
+                continue
+            name = part[0].text if isinstance(part[0], Tok) else ''
+            body = next((item for item in part if isinstance(item, Group)), None)
+            ctes.append(f'{name} as ({canonical_string(_parse_query(body.items))})' if body else name)
+        items = items[start:]
+
+    blocks: List[Tuple[str, List[Item]]] = [('', [])]
+    for item in items:
+        if _is(item, 'kw', *_SET_OPERATORS):
+            blocks.append((item.text.lower(), []))
+        else:
+            blocks[-1][1].append(item)
+    structure = _parse_block(blocks[0][1], parent)
+    if len(blocks) > 1:
+        structure['set_ops'] = sorted(
+            f'{operator} {canonical_string(_parse_block(body, parent))}' for operator, body in blocks[1:]
+        )
+    if ctes:
+        structure['with'] = sorted(ctes)
+    return structure
+
+
+def canonical_string(structure: Dict[str, Any]) -> str:
+    return json.dumps(structure, sort_keys=True, ensure_ascii=False)
+
+
+@lru_cache(maxsize=65536)
+def _canonicalize(sql: str) -> str:
+    try:
+        return canonical_string(_parse_query(_nest(_lex(sql))))
+    except Exception:
+        # Unparseable output still gets a structure: its normalized tokens
+        return canonical_string({'other': sorted(tok.text for tok in _lex(sql))})
+
+
+def canonicalize(sql: str) -> Dict[str, Any]:
+    """
+    Canonical clause structure of a SQL query.
+
+    Returns:
+        ``{clause: value}`` with clauses among with, distinct, select, from, join, where, group_by,
+        having, order_by, limit, offset, set_ops and other; values are lists of canonical strings
+    """
+    return json.loads(_canonicalize(sql))
+
+
+def sql_hash(sql: str) -> str:
+    return hashlib.sha1(f'{CANONICAL_VERSION}\n{sql}'.encode('utf-8')).hexdigest()
+
+
+class CanonicalCache:
+    """
+    On-disk cache of canonical structures keyed by SQL hash (append-only JSONL).
+
+    Used for reference queries, which are shared by every model and every run.
+
+    Args:
+        path: cache file, None keeps the cache in memory only
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH):
+        self.path = path
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            entries = {}
+            if self.path and os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            item = json.loads(line)
+                            entries[item['key']] = item['structure']
+                        except (json.JSONDecodeError, KeyError):
+                            continue
+            self._entries = entries
+        return self._entries
+
+    def get(self, sql: str) -> Dict[str, Any]:
+        key = sql_hash(sql)
+        with self._lock:
+            entries = self._load()
+            if key in entries:
+                self.hits += 1
+                return entries[key]
+            self.misses += 1
+            structure = entries[key] = canonicalize(sql)
+            if self.path:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({'key': key, 'structure': structure}, ensure_ascii=False) + '\n')
+            return structure
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self._entries or {}), 'hits': self.hits, 'misses': self.misses}
+
+
+# Shared by every adapter instance in the process, including rescoring workers
+REFERENCE_CACHE = CanonicalCache()
+
+
+def _item_tokens(item: str) -> List[str]:
+    return _ITEM_TOKEN_PATTERN.findall(item)
+
+
+def _sequence_similarity(left: Sequence[str], right: Sequence[str]) -> float:
+    table = [[0] * (len(right) + 1) for _ in range(len(left) + 1)]
+    for i, a in enumerate(left):
+        for j, b in enumerate(right):
+            table[i + 1][j + 1] = table[i][j] + 1 if a == b else max(table[i][j + 1], table[i + 1][j])
+    return 2 * table[-1][-1] / (len(left) + len(right)) if left or right else 1.0
+
+
+def _soft_f1(left: Sequence[str], right: Sequence[str]) -> float:
+    """
+    F1 of a greedy one-to-one matching of items, each match scored by the longest common token
+    subsequence, so ``b - a`` and ``a - b`` share tokens but are not scored as the same item.
+    """
+    if not left or not right:
+        return float(not left and not right)
+    left_tokens = [_item_tokens(item) for item in left]
+    right_tokens = [_item_tokens(item) for item in right]
+    pairs = []
+    for i, a in enumerate(left_tokens):
+        for j, b in enumerate(right_tokens):
+            pairs.append((1.0 if a == b else _sequence_similarity(a, b), i, j))
+    pairs.sort(reverse=True)
+    used_left, used_right, total = set(), set(), 0.0
+    for similarity, i, j in pairs:
+        if i not in used_left and j not in used_right:
+            used_left.add(i)
+            used_right.add(j)
+            total += similarity
+    return 2 * total / (len(left) + len(right))
+
+
+def structural_similarity(left: Dict[str, Any], right: Dict[str, Any]) -> float:
+    """
+    Mean per-clause similarity of two canonical structures; 1.0 when they are identical.
+
+    A clause present on one side only scores 0; DISTINCT / LIMIT / OFFSET score by equality,
+    ORDER BY by longest common subsequence and the other clauses by soft item F1.
+    """
+    if left == right:
+        return 1.0
+    scores = []
+    for key in sorted(set(left) | set(right)):
+        a, b = left.get(key), right.get(key)
+        if a is None or b is None:
+            scores.append(0.0)
+        elif key in _SCALAR_KEYS:
+            scores.append(float(a == b))
+        elif key in _ORDERED_KEYS:
+            scores.append(_sequence_similarity(a, b))
+        else:
+            scores.append(_soft_f1(a, b))
+    return sum(scores) / len(scores) if scores else 0.0
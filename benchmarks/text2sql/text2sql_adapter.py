@@ -11,6 +11,8 @@ from evalscope.api.registry import register_benchmark
 from evalscope.constants import Tags
 from evalscope.utils import get_logger
 
+from .schema_catalog import SchemaCatalog, prune_schema
+
 logger = get_logger()
 
 
@@ -29,21 +31,62 @@ def extract_sql(text):
         metric_list=['sql_ast_sim'],
         aggregation='mean',
         prompt_template='Convert the following question into a SQL query based on the provided schema.\nSchema: {schema}\nQuestion: {question}\nSQL:',
+        extra_params={
+            'schema_top_k': {
+                'type': 'int | null',
+                'description': 'Keep only the k tables most relevant to the question in the prompt; null keeps the whole schema.',  # noqa: E501
+                'value': None
+            },
+        },
     )
 )
 class Text2SQLAdapter(DefaultDataAdapter):
     """Adapter for Text2SQL benchmark with AST similarity evaluation."""
 
+    # Bump when the scoring logic changes so incremental runs re-evaluate every sample
+    ADAPTER_VERSION = '4'
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.schema_top_k = self.extra_params.get('schema_top_k')
+        self.schema_catalog = SchemaCatalog()
+
     def load_from_disk(self, **kwargs):
         return super().load_from_disk(use_local_loader=True)
 
+    def load_dataset(self):
+        dataset = super().load_dataset()
+        pruning = [
+            sample.metadata['schema_pruning'] for subset in dataset.datasets.values() for sample in subset
+            if sample.metadata and 'schema_pruning' in sample.metadata
+        ]
+        if pruning:
+            chars_before = sum(item['chars_before'] for item in pruning)
+            chars_after = sum(item['chars_after'] for item in pruning)
+            logger.info(
+                f'Schema pruning (top {self.schema_top_k} tables): {len(self.schema_catalog)} distinct schema entries, '
+                f'mean table recall {sum(item["recall"] for item in pruning) / len(pruning):.3f}, '
+                f'schema chars {chars_before} -> {chars_after}'
+            )
+        return dataset
+
     def record_to_sample(self, record: Dict[str, Any]) -> Sample:
         """Convert a data record to a Sample object."""
         question = record['question']
         schema = record.get('schema', '')
 
+        metadata = {}
+        if isinstance(schema, str) and self.schema_top_k is not None:
+            schema = [schema]
         if isinstance(schema, list):
-            schema = "\n".join(schema)
+            if self.schema_top_k is not None:
+                result = prune_schema(
+                    question, self.schema_catalog.resolve(schema), self.schema_top_k, record.get('ground_truth')
+                )
+                schema = result.schema
+                metadata['schema_pruning'] = result.to_metadata()
+            else:
+                schema = "\n".join(schema)
             
         full_prompt = self.prompt_template.format(schema=schema, question=question)
         
@@ -51,7 +94,8 @@ class Text2SQLAdapter(DefaultDataAdapter):
         # openai request: {'messages': [{'role': 'user', 'content': 'Convert the following question into a SQL query based on the provided schema.\nSchema: CREATE TABLE employees (id INT, name TEXT, department TEXT, salary INT, hire_date DATE);\nQuestion: 查询所有工资超过 5000 的员工姓名和入职日期。\nSQL:'}], 'tools': NOT_GIVEN, 'tool_choice': NOT_GIVEN, 'model': 'Qwen/Qwen3-Next-80B-A3B-Instruct-FP8', 'temperature': 0.0}
         return Sample(
             input=[{'role': 'user', 'content': full_prompt}],
-            target=record['ground_truth']
+            target=record['ground_truth'],
+            metadata=metadata,
         )
 
     def extract_answer(self, prediction: str, task_state: TaskState) -> str:
@@ -65,20 +109,27 @@ class Text2SQLAdapter(DefaultDataAdapter):
         return prediction.strip().strip(';').replace('\n', ' ')
 
     def match_score(self, original_prediction: str, filtered_prediction: str, reference: str, task_state: TaskState) -> Score:
-        """Calculate the SQL AST similarity score."""
+        """Calculate the SQL structural similarity and canonical exact-match scores."""
         # Modified to import from local sql_metrics
+        from benchmarks.text2sql.sql_canonical import REFERENCE_CACHE, canonicalize
         from benchmarks.text2sql.sql_metrics import SQLASTSimilarity
         
         # Initialize and apply the custom SQL metric
         metric = SQLASTSimilarity()
         sim_scores = metric.apply([filtered_prediction], [reference])
         sim_score = sim_scores[0] if sim_scores else 0.0
+        # Identical canonical structures, not a similarity of 1.0: item similarity is partial credit
+        canonical_match = bool(filtered_prediction) and bool(reference) and \
+            canonicalize(filtered_prediction) == REFERENCE_CACHE.get(reference)
         
         # Construct the Score object
         score = Score(
             extracted_prediction=filtered_prediction,
             prediction=original_prediction,
-            value={'sql_ast_sim': sim_score},
+            value={'sql_ast_sim': sim_score, 'sql_canonical_match': float(canonical_match)},
             main_score_name='sql_ast_sim'
         )
+        pruning = task_state.metadata.get('schema_pruning')
+        if pruning:
+            score.value['schema_recall'] = pruning['recall']
         return score
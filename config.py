@@ -9,6 +9,7 @@ load_dotenv()
 PROJECT_ROOT = "."
 DATASETS_DIR = os.path.join(PROJECT_ROOT, "datasets")
 REPORTS_DIR = os.path.join(PROJECT_ROOT, "reports")
+CACHE_DIR = os.path.join(PROJECT_ROOT, ".cache")
 
 
 # 数据集配置
@@ -25,6 +26,10 @@ LLM_DATASET_CONFIG = {
             "example1",
             "example2",
         ],
+        # 按问题相关性只保留前 k 张表（None 表示保留完整 schema）
+        "extra_params": {
+            "schema_top_k": None,
+        },
     },
     "halu_eval": {  # halueval benchmark
         "dataset_id": os.path.join(DATASETS_DIR, "llm", "halueval"),  # 使用 dataset_id 覆盖 adapter 中的默认值
@@ -39,8 +44,14 @@ LLM_DATASET_CONFIG = {
         "subset_list": [
             "frames_dataset",
         ],
+        # 上下文打包：context_budget 为 None 时按模型上下文窗口减去 max_tokens 计算，未知模型不打包
+        "extra_params": {
+            "context_budget": None,
+            "max_article_tokens": None,
+            "packing_strategy": "relevance",  # relevance | original
+        },
     },
-    'general_fc': {
+    'function_call': {
         "local_path": os.path.join(DATASETS_DIR, "llm", "function_call"),  # 自定义数据集根目录
         "subset_list": [
             "example"
@@ -71,3 +82,30 @@ LLM_SERVER_CONFIG = {
 }
 
 
+
+
+# 请求超时、重试和对冲策略，default 为所有模型的默认值，按模型名称覆盖其中的字段
+# timeout: 单次请求超时（秒）；retries: 失败后的重试次数；backoff_base / backoff_max: 指数退避的初始和最大间隔（秒）；
+# jitter: 退避间隔的随机抖动比例；hedge: 是否对 temperature 为 0 的请求发送对冲请求；
+# hedge_quantile: 请求耗时超过该分位数后发送对冲请求；hedge_min_samples: 统计分位数所需的最少请求数；
+# hedge_budget: 对冲请求数占请求总数的上限
+LLM_REQUEST_POLICY = {
+    'default': {
+        'timeout': 600,
+        'retries': 4,
+        'backoff_base': 2.0,
+        'backoff_max': 60.0,
+        'jitter': 0.5,
+        'hedge': False,
+        'hedge_quantile': 0.95,
+        'hedge_min_samples': 20,
+        'hedge_budget': 0.1,
+    },
+    'deepseek-chat': {
+        'timeout': 300,
+    },
+    'deepseek-reasoner': {
+        'timeout': 1200,
+        'retries': 2,
+    },
+}
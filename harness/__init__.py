@@ -0,0 +1 @@
+"""评测运行框架，在 EvalScope 原生评测流程之上提供请求去重等扩展能力。"""
@@ -0,0 +1,442 @@
+"""紧凑评测产物模块，评审结果写入按块压缩的 zstd JSONL 并附带块索引，渲染后的输入按内容哈希只存储一份，同一 benchmark 的所有模型共用。"""
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import zstandard
+
+try:
+    import fcntl
+except ImportError:  # Windows 不支持跨进程文件锁，多个进程不能同时写入同一个输入存储
+    fcntl = None
+
+from evalscope.api.evaluator import TaskState
+from evalscope.api.evaluator.cache import CacheManager, ReviewResult
+from evalscope.api.metric import SampleScore
+from evalscope.utils.io_utils import OutputsStructure, dump_jsonl_data
+from evalscope.utils.logger import get_logger
+
+logger = get_logger()
+
+INPUTS_DIR = 'inputs'
+BLOCK_SUFFIX = '.jsonl.zst'
+INDEX_SUFFIX = '.idx.json'
+
+
+def input_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def input_store_path(outputs_dir: str, file_name: str) -> str:
+    """
+    输入存储的路径
+
+    outputs_dir 为 {work_dir}/{benchmark}/{model}_{params}，输入存储位于上一级的 inputs/ 下，
+    同一 benchmark 的所有模型共用；旧版本写在 outputs_dir/inputs/ 下的存储仍可读取
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(outputs_dir)), INPUTS_DIR, file_name)
+    legacy_path = os.path.join(outputs_dir, INPUTS_DIR, file_name)
+    if not os.path.exists(path) and os.path.exists(legacy_path):
+        return legacy_path
+    return path
+
+
+def write_report_side_file(output_dir: str, dir_name: str, name: str, data: Any) -> str:
+    """
+    将 benchmark 报告之外的统计表写入 JSON 文件
+
+    output_dir 为 generate_report 收到的 {work_dir}/reports/{model}，文件写入
+    {work_dir}/{dir_name}/{model}/{name}.json，避免额外文件混入 reports 目录
+
+    Returns:
+        写入的文件路径
+    """
+    work_dir = os.path.dirname(os.path.dirname(output_dir))
+    path = os.path.join(work_dir, dir_name, os.path.basename(output_dir), f'{name}.json')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return path
+
+
+class BlockStore:
+    """
+    按块压缩的 JSONL 存储
+
+    记录按写入顺序每 block_size 条压缩为一个独立的 zstd frame 追加到数据文件，整个文件可以直接用 `zstd -d`
+    解压为普通 JSONL。索引文件记录每个块的偏移、长度和记录数，以及每个 key 所在的块和行号，
+    读取单条记录只需解压一个块。同一 key 再次写入时，索引指向最新的记录。
+
+    shared 为 True 时允许多个进程同时写入（如分别评测不同模型的进程共用的输入存储）：追加数据块和写入索引
+    都持有同名 .lock 文件上的排他锁，写索引前合并其他进程已写入的索引；数据文件中未被索引的部分
+    可能是其他进程刚写入、尚未写索引的块，不会被截断。
+    """
+
+    def __init__(self, path: str, block_size: int = 256, level: int = 3, shared: bool = False):
+        """
+        Args:
+            path: 数据文件路径（.jsonl.zst），索引文件为同名的 .idx.json
+            block_size: 每个块的记录数
+            level: zstd 压缩级别
+            shared: 是否允许多个进程同时写入
+        """
+        self.path = path
+        self.index_path = path[:-len(BLOCK_SUFFIX)] + INDEX_SUFFIX if path.endswith(BLOCK_SUFFIX) else path + '.idx'
+        self.block_size = block_size
+        self.level = level
+        # blocks: [[offset, length, count], ...]；keys: {key: [block, line]}
+        self.blocks: List[List[int]] = []
+        self.keys: Dict[str, List[int]] = {}
+        # 随索引保存的附加信息，如评审结果对应的输入存储文件名
+        self.meta: Dict[str, Any] = {}
+        self.shared = shared
+        self._buffer: List[str] = []
+        self._cache: 'OrderedDict[int, List[str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        with self._file_lock():
+            self._load_index()
+
+    @contextmanager
+    def _file_lock(self):
+        """shared 模式下持有跨进程的排他锁"""
+        if not self.shared or fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path + '.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_index(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.index_path):
+            return None
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _load_index(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        index = self._read_index()
+        if self.shared:
+            if index is not None:
+                self.blocks, self.keys, self.meta = index['blocks'], index['keys'], index.get('meta', {})
+            return
+        if index is None:
+            # 第一次写入索引前中断，数据文件中没有可用的块
+            os.remove(self.path)
+            return
+        # 数据文件比索引长时说明上次写入中断，截掉未索引的部分
+        end = sum(length for _, length, _ in index['blocks'])
+        if os.path.getsize(self.path) != end:
+            with open(self.path, 'r+b') as f:
+                f.truncate(end)
+        self.blocks, self.keys, self.meta = index['blocks'], index['keys'], index.get('meta', {})
+
+    def _merge_index(self, index: Dict[str, Any]) -> None:
+        """合并其他进程写入的索引：块按偏移取并集，同一 key 以本进程的记录为准"""
+        blocks = {offset: [offset, length, count] for offset, length, count in index['blocks'] + self.blocks}
+        merged = [blocks[offset] for offset in sorted(blocks)]
+        position = {offset: i for i, (offset, _, _) in enumerate(merged)}
+        keys = {}
+        for source_blocks, source_keys in ((index['blocks'], index['keys']), (self.blocks, self.keys)):
+            for key, (block, line) in source_keys.items():
+                keys[key] = [position[source_blocks[block][0]], line]
+        self.blocks, self.keys = merged, keys
+        self.meta = dict(index.get('meta', {}), **self.meta)
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys
+
+    def put(self, key: str, record: Dict[str, Any], overwrite: bool = True) -> bool:
+        """
+        写入一条记录
+
+        Args:
+            key: 记录的 key
+            record: 可 JSON 序列化的记录
+            overwrite: key 已存在时是否写入新记录
+
+        Returns:
+            是否写入
+        """
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            if key in self.keys and not overwrite:
+                return False
+            self.keys[key] = [len(self.blocks), len(self._buffer)]
+            self._buffer.append(line)
+            if len(self._buffer) >= self.block_size:
+                self._write_block()
+        return True
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取单条记录，key 不存在时返回 None"""
+        with self._lock:
+            position = self.keys.get(key)
+            if position is None:
+                return None
+            block, line = position
+            lines = self._buffer if block == len(self.blocks) else self._read_block(block)
+            return json.loads(lines[line])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """按写入顺序遍历当前有效的记录（被覆盖的旧记录跳过）"""
+        with self._lock:
+            live = {tuple(position) for position in self.keys.values()}
+            blocks = [self._read_block(block) for block in range(len(self.blocks))] + [list(self._buffer)]
+        for block, lines in enumerate(blocks):
+            for line_no, line in enumerate(lines):
+                if (block, line_no) in live:
+                    yield json.loads(line)
+
+    def _read_block(self, block: int) -> List[str]:
+        lines = self._cache.get(block)
+        if lines is not None:
+            self._cache.move_to_end(block)
+            return lines
+        offset, length, _ = self.blocks[block]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            data = zstandard.ZstdDecompressor().decompress(f.read(length))
+        lines = data.decode('utf-8').split('\n')[:-1]
+        self._cache[block] = lines
+        if len(self._cache) > 4:
+            self._cache.popitem(last=False)
+        return lines
+
+    def _write_block(self) -> None:
+        if not self._buffer:
+            return
+        data = zstandard.ZstdCompressor(level=self.level).compress(('\n'.join(self._buffer) + '\n').encode('utf-8'))
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._file_lock(), open(self.path, 'ab') as f:
+            # 追加写入时从文件末尾开始，shared 模式下文件末尾可能是其他进程写入的块
+            offset = f.seek(0, os.SEEK_END)
+            f.write(data)
+        self.blocks.append([offset, len(data), len(self._buffer)])
+        self._buffer = []
+
+    def flush(self) -> None:
+        """压缩缓冲区中的记录并写入索引"""
+        with self._lock:
+            self._write_block()
+            if not self.blocks:
+                return
+            with self._file_lock():
+                index = self._read_index() if self.shared else None
+                if index is not None:
+                    self._merge_index(index)
+                tmp_path = f'{self.index_path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'codec': 'zstd', 'blocks': self.blocks, 'keys': self.keys, 'meta': self.meta},
+                              f, separators=(',', ':'))
+                os.replace(tmp_path, self.index_path)
+
+    def delete(self) -> None:
+        with self._lock:
+            for path in (self.path, self.index_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.blocks, self.keys, self._buffer = [], {}, []
+            self._cache.clear()
+
+    def disk_size(self) -> int:
+        return sum(os.path.getsize(path) for path in (self.path, self.index_path) if os.path.exists(path))
+
+
+# 进程内共享的输入存储，多个模型的评测器（如序贯评测、analyzer 的评测矩阵）写入同一个文件时共用同一个实例；
+# 不同进程之间通过 BlockStore 的 shared 模式加锁
+_INPUT_STORES: Dict[str, BlockStore] = {}
+_INPUT_STORES_LOCK = threading.Lock()
+
+
+def get_input_store(path: str, block_size: int = 256) -> BlockStore:
+    with _INPUT_STORES_LOCK:
+        if path not in _INPUT_STORES:
+            _INPUT_STORES[path] = BlockStore(path, block_size, shared=True)
+        return _INPUT_STORES[path]
+
+
+class CompactCacheManager(CacheManager):
+    """
+    使用紧凑格式保存评审结果的缓存管理器
+
+    评审结果写入 reviews/{model}/{benchmark}_{subset}.jsonl.zst，记录中的 input 替换为 input_ref（内容哈希），
+    输入正文写入各模型工作目录上一级的 inputs/{benchmark}_{subset}_{dataset_version}.jsonl.zst，同一 benchmark、
+    同一数据集版本的所有模型共用，评审结果的索引中记录对应的输入存储文件名。
+    预测结果仍使用 EvalScope 的 JSONL 格式，缓存复用和离线重新评分不受影响。
+    """
+
+    def __init__(
+        self,
+        outputs: OutputsStructure,
+        model_name: str,
+        benchmark_name: str,
+        block_size: int = 256,
+        dataset_version: Optional[str] = None,
+    ):
+        """
+        Args:
+            dataset_version: 数据集版本（数据集文件和 benchmark 配置的哈希），数据集变更后使用新的输入存储
+        """
+        super().__init__(outputs, model_name, benchmark_name)
+        self.block_size = block_size
+        self.dataset_version = dataset_version
+        self._reviews: Dict[str, BlockStore] = {}
+        self._inputs: Dict[str, BlockStore] = {}
+
+    def get_review_cache_path(self, subset: str) -> str:
+        return super().get_review_cache_path(subset)[:-len('.jsonl')] + BLOCK_SUFFIX
+
+    def get_input_store_name(self, subset: str) -> str:
+        version = f'_{self.dataset_version}' if self.dataset_version else ''
+        return f'{self.benchmark_name}_{subset}{version}{BLOCK_SUFFIX}'
+
+    def get_input_store_path(self, subset: str) -> str:
+        return input_store_path(self.outputs.outputs_dir, self.get_input_store_name(subset))
+
+    def review_store(self, subset: str) -> BlockStore:
+        if subset not in self._reviews:
+            store = BlockStore(self.get_review_cache_path(subset), self.block_size)
+            store.meta['inputs'] = self.get_input_store_name(subset)
+            self._reviews[subset] = store
+        return self._reviews[subset]
+
+    def input_store(self, subset: str) -> BlockStore:
+        if subset not in self._inputs:
+            self._inputs[subset] = get_input_store(self.get_input_store_path(subset), self.block_size)
+        return self._inputs[subset]
+
+    def save_review_result(self, subset: str, review_result: ReviewResult) -> None:
+        """写入一条评审结果，输入正文按内容哈希写入输入存储"""
+        record = review_result.model_dump()
+        text = record.pop('input', '') or ''
+        ref = input_hash(text)
+        self.input_store(subset).put(ref, {'hash': ref, 'input': text}, overwrite=False)
+        record['input_ref'] = ref
+        self.review_store(subset).put(str(review_result.index), record)
+
+    def save_review_cache(
+        self,
+        subset: str,
+        task_state: TaskState,
+        sample_score: SampleScore,
+        save_metadata: bool = True
+    ) -> ReviewResult:
+        review_result = ReviewResult.from_score_state(sample_score, task_state, save_metadata)
+        self.save_review_result(subset, review_result)
+        return review_result
+
+    def load_reviews(self, subset: str, with_input: bool = False) -> List[Dict[str, Any]]:
+        """读取 subset 的全部评审结果，with_input 为 True 时还原 input 字段"""
+        records = list(self.review_store(subset))
+        if with_input:
+            for record in records:
+                resolve_input(record, self.input_store(subset))
+        return records
+
+    def filter_review_cache(self, subset: str,
+                            task_states: List[TaskState]) -> Tuple[List[SampleScore], List[TaskState]]:
+        store = self.review_store(subset)
+        if not len(store):
+            return [], task_states
+        cached_sample_scores = [SampleScore.model_validate(record['sample_score']) for record in store]
+        cached_sample_ids = {sample_score.sample_id for sample_score in cached_sample_scores}
+        filtered_task_states = [state for state in task_states if state.sample_id not in cached_sample_ids]
+        logger.info(f'Reusing reviews from {store.path}, got {len(cached_sample_scores)} reviews')
+        return cached_sample_scores, filtered_task_states
+
+    def delete_review_cache(self, subset: str):
+        store = self.review_store(subset)
+        if len(store):
+            logger.info(f'Deleting review cache file: {store.path}')
+        store.delete()
+
+    def flush(self, subset: str) -> Dict[str, int]:
+        """
+        写出 subset 的评审结果和输入存储
+
+        Returns:
+            {"reviews": 评审条数, "inputs": 不同输入数, "review_bytes": 评审文件大小, "input_bytes": 输入存储大小}
+        """
+        reviews, inputs = self.review_store(subset), self.input_store(subset)
+        reviews.flush()
+        inputs.flush()
+        return {
+            'reviews': len(reviews),
+            'inputs': len(inputs),
+            'review_bytes': reviews.disk_size(),
+            'input_bytes': inputs.disk_size(),
+        }
+
+
+def resolve_input(record: Dict[str, Any], inputs: BlockStore) -> Dict[str, Any]:
+    """将记录中的 input_ref 还原为 input 字段"""
+    ref = record.pop('input_ref', None)
+    if ref is not None:
+        entry = inputs.get(ref)
+        record['input'] = entry['input'] if entry else ''
+    return record
+
+
+def open_input_store(review_path: str, reviews: BlockStore) -> BlockStore:
+    """打开评审结果对应的输入存储；旧版本的索引中没有记录文件名时与评审结果同名"""
+    outputs_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(review_path))))
+    name = reviews.meta.get('inputs', os.path.basename(review_path))
+    return BlockStore(input_store_path(outputs_dir, name), shared=True)
+
+
+def export_jsonl(review_path: str, output_path: str) -> int:
+    """
+    将紧凑格式的评审结果导出为 EvalScope 的 JSONL 格式（还原 input 字段），供可视化等工具读取
+
+    Args:
+        review_path: reviews/{model}/{benchmark}_{subset}.jsonl.zst
+        output_path: 导出的 jsonl 文件路径
+
+    Returns:
+        导出的记录数
+    """
+    reviews = BlockStore(review_path)
+    inputs = open_input_store(review_path, reviews)
+    records = [resolve_input(record, inputs) for record in reviews]
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    dump_jsonl_data(data_list=records, jsonl_file=output_path)
+    return len(records)
+
+
+def main():
+    """命令行入口：读取单条评审结果，或导出为 JSONL"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="读取紧凑格式的评审结果")
+    parser.add_argument("review_path", type=str, help="reviews 目录下的 .jsonl.zst 文件")
+    parser.add_argument("--index", type=str, default=None, help="只读取指定样本 id 的评审结果")
+    parser.add_argument("--export", type=str, default=None, help="导出为 JSONL 文件")
+    args = parser.parse_args()
+
+    if args.export:
+        print(f'{export_jsonl(args.review_path, args.export)} reviews exported to {args.export}')
+        return
+    reviews = BlockStore(args.review_path)
+    inputs = open_input_store(args.review_path, reviews)
+    records = [reviews.get(args.index)] if args.index is not None else reviews
+    for record in records:
+        if record is not None:
+            print(json.dumps(resolve_input(record, inputs), ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
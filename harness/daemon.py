@@ -0,0 +1,434 @@
+"""
+常驻评测服务，在一个长期运行的进程中接收评测任务，避免每次评测重新导入 EvalScope、重新连接端点和冷启动缓存。
+
+进程内保持的状态：已注册的 benchmark adapter、按模型配置复用的模型客户端（EvalScope 在进程内缓存）、
+请求去重的响应存储、judge 客户端、text2sql 标准答案解析缓存等模块级缓存，以及按 benchmark 配置、
+模型和生成参数缓存的已加载数据集。
+
+启动：python -m harness.daemon [--port 8765] [--socket /tmp/atom_eval.sock]
+
+接口（JSON）：
+    POST   /jobs        提交任务，返回任务状态（202）
+    GET    /jobs        所有任务的状态
+    GET    /jobs/<id>   单个任务的状态、各 benchmark 的进度和结果
+    DELETE /jobs/<id>   取消排队中的任务
+    GET    /health      服务状态
+    GET    /metrics     Prometheus 文本格式的评测指标，见 harness.progress
+"""
+import os
+import sys
+import copy
+import json
+import time
+import uuid
+import queue
+import argparse
+import threading
+import traceback
+import socketserver
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import benchmarks  # noqa: F401  注册自定义 benchmark
+from evalscope.utils.logger import get_logger
+
+from harness.progress import BOARD
+from harness.runner import run_task
+from utils import build_parser, get_task_config
+
+logger = get_logger()
+
+DEFAULT_PORT = 8765
+DATASET_CACHE_SIZE = 16
+MAX_FINISHED_JOBS = 500
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+
+# 任务请求中的字段及默认值，与 benchmark 命令行参数一致
+JOB_DEFAULTS = {
+    'batch_size': 1,
+    'max_tokens': 2048,
+    'limit': None,
+    'use_llm_judge': False,
+    'judge_model_name': None,
+    'work_dir': None,
+}
+# 任务请求 harness 字段中允许的扩展参数；实时进度由服务统一提供
+HARNESS_OPTIONS = {
+    'no_dedup', 'dedup_cache_dir', 'incremental', 'rescore_only', 'rescore_workers', 'rescore_with_judge', 'streaming',
+    'stream_queue_size', 'schedule', 'hedge', 'compact_artifacts', 'profile', 'track_memory', 'memory_budget',
+    'memory_budget_action', 'trace'
+}
+
+
+class DatasetCache(OrderedDict):
+    """按最近使用淘汰的数据集缓存，最多保留 capacity 个"""
+
+    def __init__(self, capacity: int = DATASET_CACHE_SIZE):
+        super().__init__()
+        self.capacity = capacity
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self:
+                return default
+            self.move_to_end(key)
+            return super().__getitem__(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        with self._lock:
+            super().__setitem__(key, value)
+            self.move_to_end(key)
+            while len(self) > self.capacity:
+                self.popitem(last=False)
+
+
+# 数值参数的下限（含），与命令行参数的含义一致
+MIN_VALUES = {
+    'batch_size': 1, 'max_tokens': 1, 'limit': 1, 'rescore_workers': 1, 'stream_queue_size': 1, 'memory_budget': 0,
+}
+
+
+def _validate_options(options: Dict[str, Any], label: str) -> Dict[str, Any]:
+    """按命令行参数的类型、可选值和 MIN_VALUES 中的下限校验参数，返回转换为命令行参数类型后的参数"""
+    actions = {action.dest: action for action in build_parser('daemon')._actions}
+    validated = {}
+    for key, value in options.items():
+        action = actions[key]
+        if action.nargs == 0:
+            # store_true 开关
+            if not isinstance(value, bool):
+                raise ValueError(f'{label} {key} 必须是布尔值: {value!r}')
+        elif value is not None:
+            expected = str if action.type is str else (int, float)
+            if isinstance(value, bool) or not isinstance(value, expected) or (
+                action.type is int and isinstance(value, float)
+            ):
+                raise ValueError(f'{label} {key} 的类型无效: {value!r}')
+            value = action.type(value)
+            if action.choices is not None and value not in action.choices:
+                raise ValueError(f'{label} {key} 的取值无效: {value!r}，可选值: {list(action.choices)}')
+            if key in MIN_VALUES and value < MIN_VALUES[key]:
+                raise ValueError(f'{label} {key} 不能小于 {MIN_VALUES[key]}: {value!r}')
+        validated[key] = value
+    return validated
+
+
+def validate_harness_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    按命令行参数的类型和可选值校验任务请求中的 harness 扩展参数
+
+    Returns:
+        转换为命令行参数类型后的参数
+
+    Raises:
+        ValueError: 参数不支持或取值无效
+    """
+    if not isinstance(options, dict):
+        raise ValueError('harness 字段必须是对象')
+    unsupported = set(options) - HARNESS_OPTIONS
+    if unsupported:
+        raise ValueError(f'不支持的 harness 参数: {sorted(unsupported)}')
+    return _validate_options(options, 'harness 参数')
+
+
+def build_task_configs(request: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    将任务请求转换为各 benchmark 的任务配置
+
+    Args:
+        request: 任务请求，包含 model、benchmarks（或 benchmark）、JOB_DEFAULTS 中的生成参数，
+            以及可选的 harness 扩展参数（字段名与命令行参数一致，如 {"streaming": true}）
+
+    Returns:
+        [(benchmark 名称, 任务配置)]
+
+    Raises:
+        ValueError: 请求字段缺失或取值无效
+    """
+    model = request.get('model')
+    if model not in config.LLM_SERVER_CONFIG:
+        raise ValueError(f'未知的模型: {model}，可选值: {list(config.LLM_SERVER_CONFIG)}')
+    names = request.get('benchmarks') or request.get('benchmark')
+    names = [names] if isinstance(names, str) else names
+    if not names:
+        raise ValueError('缺少 benchmarks 字段')
+    unknown = [name for name in names if name not in config.LLM_DATASET_CONFIG]
+    if unknown:
+        raise ValueError(f'未知的 benchmark: {unknown}，可选值: {list(config.LLM_DATASET_CONFIG)}')
+    job_options = dict(JOB_DEFAULTS, **_validate_options(
+        {key: request[key] for key in JOB_DEFAULTS if key in request}, '参数'
+    ))
+    judge = job_options['judge_model_name']
+    if job_options['use_llm_judge'] and judge not in config.LLM_SERVER_CONFIG:
+        raise ValueError(f'未知的 judge 模型: {judge}')
+    harness_options = validate_harness_options(request.get('harness') or {})
+
+    task_configs = []
+    for name in names:
+        args = argparse.Namespace(model=model, dataset=name, **harness_options, **job_options)
+        task_config = copy.deepcopy(get_task_config(args))
+        task_config['harness']['track_progress'] = True
+        task_configs.append((name, task_config))
+    return task_configs
+
+
+class Job:
+
+    def __init__(self, request: Dict[str, Any], task_configs: List[Tuple[str, Dict[str, Any]]]):
+        self.id = uuid.uuid4().hex[:12]
+        self.request = request
+        self.task_configs = task_configs
+        self.status = QUEUED
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.results: Dict[str, Dict[str, Any]] = {}
+        # 评测之外的错误（如进度面板出错）导致整个任务失败时的错误信息
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        model = self.request['model']
+        progress = {}
+        for name, _ in self.task_configs:
+            if name in self.results or self.status == RUNNING:
+                progress[name] = next(
+                    (item for item in BOARD.snapshots() if item['model'] == model and item['benchmark'] == name),
+                    None,
+                )
+        return {
+            'id': self.id,
+            'status': self.status,
+            'request': self.request,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+            'results': self.results,
+            'progress': progress,
+            'error': self.error,
+        }
+
+
+class JobQueue:
+    """
+    评测任务队列
+
+    任务按提交顺序由一个工作线程依次执行（EvalScope 的日志和工作目录按任务配置，不支持同一进程内并发），
+    同一任务的各 benchmark 依次执行，单个 benchmark 失败不影响其余 benchmark。
+    """
+
+    def __init__(self, dataset_cache_size: int = DATASET_CACHE_SIZE):
+        self.dataset_cache = DatasetCache(dataset_cache_size)
+        self.jobs: Dict[str, Job] = OrderedDict()
+        self.running: Optional[str] = None
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name='harness-daemon-worker', daemon=True)
+        self._worker.start()
+
+    def submit(self, request: Dict[str, Any]) -> Job:
+        job = Job(request, build_task_configs(request))
+        with self._lock:
+            self.jobs[job.id] = job
+            self._trim()
+        for name, _ in job.task_configs:
+            BOARD.cell(request['model'], name)
+        self._queue.put(job.id)
+        logger.info(f'任务 {job.id} 已提交: model={request["model"]}, benchmarks={[n for n, _ in job.task_configs]}')
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self.jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """取消排队中的任务；正在执行或已结束的任务不受影响"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is not None and job.status == QUEUED:
+                job.status = CANCELLED
+                job.finished = time.time()
+        return job
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(job.status == QUEUED for job in self.jobs.values())
+
+    def _trim(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in (DONE, FAILED, CANCELLED)]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def _run(self) -> None:
+        while True:
+            job = self.get(self._queue.get())
+            if job is None or job.status != QUEUED:
+                continue
+            job.status, job.started = RUNNING, time.time()
+            self.running = job.id
+            # 任何异常都只让当前任务失败，不能结束唯一的工作线程，否则之后的任务会一直排队
+            try:
+                self._run_job(job)
+                job.status = FAILED if any(item['status'] == FAILED for item in job.results.values()) else DONE
+            except Exception as e:
+                logger.error(f'任务 {job.id} 执行失败: {e}\n{traceback.format_exc()}')
+                job.status, job.error = FAILED, str(e)
+            job.finished = time.time()
+            self.running = None
+            logger.info(f'任务 {job.id} 结束: {job.status}，耗时 {job.finished - job.started:.2f}s')
+
+    def _run_job(self, job: Job) -> None:
+        for name, task_config in job.task_configs:
+            BOARD.reset(job.request['model'], name)
+            start = time.perf_counter()
+            try:
+                reports = run_task(task_config, self.dataset_cache)
+                job.results[name] = {
+                    'status': DONE,
+                    'work_dir': task_config['work_dir'],
+                    'reports': {
+                        benchmark: _report_summary(report)
+                        for benchmark, report in reports.items()
+                    },
+                }
+            except Exception as e:
+                logger.error(f'任务 {job.id} 的 {name} 评测失败: {e}\n{traceback.format_exc()}')
+                job.results[name] = {'status': FAILED, 'work_dir': task_config['work_dir'], 'error': str(e)}
+            job.results[name]['seconds'] = round(time.perf_counter() - start, 3)
+
+
+def _report_summary(report: Any) -> Dict[str, Any]:
+    data = report.to_dict()
+    return {
+        'score': data.get('score'),
+        'metrics': [{
+            'name': metric.get('name'),
+            'score': metric.get('score'),
+            'num': metric.get('num')
+        } for metric in data.get('metrics', [])],
+    }
+
+
+def make_handler(jobs: JobQueue, started: float):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def _send(self, status: int, body: Any, content_type: str = 'application/json') -> None:
+            if content_type == 'application/json':
+                data = json.dumps(body, ensure_ascii=False, default=str).encode('utf-8')
+            else:
+                data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _job_id(self) -> Optional[str]:
+            parts = self.path.split('?')[0].strip('/').split('/')
+            return parts[1] if len(parts) == 2 and parts[0] == 'jobs' else None
+
+        def do_GET(self):
+            path = self.path.split('?')[0].rstrip('/')
+            if path == '/health':
+                self._send(200, {
+                    'status': 'ok',
+                    'uptime': round(time.time() - started, 1),
+                    'queued': jobs.pending(),
+                    'running': jobs.running,
+                    'cached_datasets': len(jobs.dataset_cache),
+                })
+            elif path == '/metrics':
+                self._send(200, BOARD.render_prometheus(), 'text/plain; version=0.0.4')
+            elif path == '/jobs':
+                self._send(200, [job.to_dict() for job in jobs.list()])
+            elif self._job_id():
+                job = jobs.get(self._job_id())
+                if job is None:
+                    self._send(404, {'error': f'任务不存在: {self._job_id()}'})
+                else:
+                    self._send(200, job.to_dict())
+            else:
+                self._send(404, {'error': f'未知的接口: {path}'})
+
+        def do_POST(self):
+            if self.path.split('?')[0].rstrip('/') != '/jobs':
+                self._send(404, {'error': f'未知的接口: {self.path}'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                request = json.loads(self.rfile.read(length) or b'{}')
+                if not isinstance(request, dict):
+                    raise ValueError('请求体应为 JSON 对象')
+                job = jobs.submit(request)
+            except (ValueError, TypeError) as e:
+                self._send(400, {'error': str(e)})
+                return
+            self._send(202, job.to_dict())
+
+        def do_DELETE(self):
+            job = jobs.cancel(self._job_id()) if self._job_id() else None
+            if job is None:
+                self._send(404, {'error': f'任务不存在: {self.path}'})
+            elif job.status != CANCELLED:
+                self._send(409, {'error': f'任务状态为 {job.status}，只能取消排队中的任务'})
+            else:
+                self._send(200, job.to_dict())
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(host: str = '127.0.0.1', port: int = DEFAULT_PORT, socket_path: Optional[str] = None,
+          dataset_cache_size: int = DATASET_CACHE_SIZE) -> None:
+    """启动常驻服务，指定 socket_path 时监听 Unix socket，否则监听 host:port"""
+    jobs = JobQueue(dataset_cache_size)
+    handler = make_handler(jobs, time.time())
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, handler)
+        address = f'unix:{socket_path}'
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        server.daemon_threads = True
+        address = f'http://{host}:{server.server_address[1]}'
+    logger.info(f'常驻评测服务已启动: {address}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info('常驻评测服务已停止')
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='常驻评测服务')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='监听地址（默认只监听本机）')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'监听端口（默认：{DEFAULT_PORT}）')
+    parser.add_argument('--socket', type=str, default=None, help='改为监听 Unix socket 路径')
+    parser.add_argument('--dataset_cache_size', type=int, default=DATASET_CACHE_SIZE,
+                        help=f'保留的已加载数据集数量（默认：{DATASET_CACHE_SIZE}）')
+    args = parser.parse_args()
+    serve(args.host, args.port, args.socket, args.dataset_cache_size)
+
+
+if __name__ == '__main__':
+    main()
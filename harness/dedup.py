@@ -0,0 +1,166 @@
+"""请求去重模块，对渲染后的模型请求做哈希，相同请求只调用一次模型并将结果分发给所有共享该请求的样本。"""
+import os
+import json
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+from evalscope.api.dataset import Sample
+from evalscope.api.model import ModelOutput
+from evalscope.utils.logger import get_logger
+
+logger = get_logger()
+
+
+def _dump(obj: Any) -> Any:
+    """将 pydantic 对象转换为可哈希序列化的结构"""
+    if hasattr(obj, 'model_dump'):
+        return obj.model_dump(exclude_none=True)
+    return obj
+
+
+def request_fingerprint(sample: Sample, model_id: str, generation_config: Any) -> str:
+    """
+    计算一次模型请求的指纹
+
+    Args:
+        sample: 已完成 prompt 渲染的样本
+        model_id: 模型 ID
+        generation_config: 生成配置
+
+    Returns:
+        请求内容的 sha256 十六进制摘要
+    """
+    if isinstance(sample.input, str):
+        messages = sample.input
+    else:
+        # 消息 id 为随机生成，不属于请求内容
+        messages = [message.model_dump(exclude={'id'}, exclude_none=True) for message in sample.input]
+
+    payload = {
+        'model': model_id,
+        'input': messages,
+        'tools': [_dump(tool) for tool in (sample.tools or [])],
+        'generation_config': _dump(generation_config),
+    }
+    content = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class ResponseStore:
+    """请求指纹到模型输出的存储，可选持久化到 JSONL 文件，用于跨 subset、跨 benchmark 和跨运行复用"""
+
+    def __init__(self, cache_file: Optional[str] = None):
+        """
+        初始化响应存储
+
+        Args:
+            cache_file: 持久化文件路径，为 None 时仅在内存中保存
+        """
+        self.cache_file = cache_file
+        self._outputs: Dict[str, ModelOutput] = {}
+        self._lock = threading.Lock()
+
+        if cache_file and os.path.exists(cache_file):
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    item = json.loads(line)
+                    self._outputs[item['key']] = ModelOutput.model_validate(item['model_output'])
+            logger.info(f'从 {cache_file} 加载了 {len(self._outputs)} 条去重缓存')
+
+    def get(self, key: str) -> Optional[ModelOutput]:
+        """获取请求指纹对应的模型输出（返回副本）"""
+        output = self._outputs.get(key)
+        return output.model_copy(deep=True) if output is not None else None
+
+    def put(self, key: str, output: ModelOutput) -> None:
+        """保存模型输出，出错的输出不会被缓存"""
+        if output is None or output.error:
+            return
+        with self._lock:
+            if key in self._outputs:
+                return
+            self._outputs[key] = output.model_copy(deep=True)
+            if self.cache_file:
+                os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+                with open(self.cache_file, 'a', encoding='utf-8') as f:
+                    item = {'key': key, 'model_output': output.model_dump()}
+                    f.write(json.dumps(item, ensure_ascii=False) + '\n')
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._outputs
+
+    def __len__(self) -> int:
+        return len(self._outputs)
+
+
+# 进程内共享的响应存储，同一进程中连续执行的多个评测任务（如 analyzer 的评测矩阵）共享同一份存储
+_STORES: Dict[str, ResponseStore] = {}
+
+
+def get_response_store(model_id: str, cache_dir: Optional[str] = None) -> ResponseStore:
+    """
+    获取指定模型的响应存储
+
+    Args:
+        model_id: 模型 ID
+        cache_dir: 持久化目录，为 None 时仅在进程内共享
+
+    Returns:
+        响应存储对象
+    """
+    cache_file = None
+    if cache_dir:
+        cache_file = os.path.join(cache_dir, model_id.replace('/', '-') + '.jsonl')
+    store_key = cache_file or model_id
+    if store_key not in _STORES:
+        _STORES[store_key] = ResponseStore(cache_file)
+    return _STORES[store_key]
+
+
+class PromptCoalescer:
+    """请求合并器，按请求指纹对样本分组并统计节省的调用次数"""
+
+    def __init__(self, store: ResponseStore, model_id: str, generation_config: Any):
+        self.store = store
+        self.model_id = model_id
+        self.generation_config = generation_config
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def fingerprint(self, sample: Sample) -> str:
+        return request_fingerprint(sample, self.model_id, self.generation_config)
+
+    def group(self, samples: List[Sample]) -> Dict[str, List[Sample]]:
+        """按请求指纹对样本分组，保持首次出现的顺序"""
+        groups: Dict[str, List[Sample]] = {}
+        for sample in samples:
+            groups.setdefault(self.fingerprint(sample), []).append(sample)
+        return groups
+
+    def record(self, subset: str, total: int, unique: int, dispatched: int) -> None:
+        """记录某个 subset 的去重统计，同一 subset 分批评测时累加"""
+        stats = self.stats.setdefault(
+            subset, {'samples': 0, 'unique_requests': 0, 'dispatched': 0, 'calls_saved': 0}
+        )
+        stats['samples'] += total
+        stats['unique_requests'] += unique
+        stats['dispatched'] += dispatched
+        stats['calls_saved'] += total - dispatched
+        logger.info(
+            f'请求去重[{subset}]: 样本 {total} 个，唯一请求 {unique} 个，'
+            f'实际调用 {dispatched} 次，节省 {total - dispatched} 次调用'
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """汇总所有 subset 的去重统计"""
+        total = sum(s['samples'] for s in self.stats.values())
+        dispatched = sum(s['dispatched'] for s in self.stats.values())
+        return {
+            'samples': total,
+            'dispatched': dispatched,
+            'calls_saved': total - dispatched,
+            'subsets': self.stats,
+        }
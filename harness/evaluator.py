@@ -0,0 +1,771 @@
+"""评测器，在 EvalScope DefaultEvaluator 的基础上扩展请求去重和运行统计。"""
+import os
+import copy
+import json
+import hashlib
+import time
+import threading
+import traceback
+from contextlib import nullcontext
+from functools import partial
+from typing import Any, Dict, List, MutableMapping, Optional
+
+from evalscope.api.dataset import Dataset, MemoryDataset, Sample
+from evalscope.api.evaluator import TaskState
+from evalscope.api.evaluator.cache import ModelResult, ReviewResult
+from evalscope.constants import DumpMode
+from evalscope.api.metric import AggScore, SampleScore
+from evalscope.constants import HEARTBEAT_INTERVAL_SEC
+from evalscope.evaluator import DefaultEvaluator
+from evalscope.report import Report
+from evalscope.utils.function_utils import run_in_threads_with_progress
+from evalscope.utils.io_utils import dump_jsonl_data, jsonl_to_list
+from evalscope.utils.logger import get_logger
+
+from harness.artifacts import CompactCacheManager
+from harness.dedup import PromptCoalescer, get_response_store
+from harness.policy import PolicyModel, RequestExecutor
+from harness.progress import BOARD, FAILED, OK, CellProgress
+from harness.memory import MemoryTracker
+from harness.incremental import IncrementalStore, adapter_version, plan_subset, sample_fingerprint
+from harness.scheduling import TIMELINE_DIR, Timeline, estimate_cost, order_samples
+from harness.rescore import MIN_PARALLEL_SAMPLES, default_num_workers, load_prediction_states, rescore_task_states
+from harness.streaming import PARTIAL_DIR, PartialAggregate, run_streaming
+from harness.trace import TRACE_FILE_PATTERN, TracedModel, Tracer
+
+logger = get_logger()
+
+
+def dataset_files_signature(path: Optional[str]) -> Optional[List[List[Any]]]:
+    """
+    本地数据集文件的（相对路径, 修改时间, 大小）列表，用于判断数据集文件是否变更
+
+    Args:
+        path: 数据集文件或目录；不存在（如 ModelScope 数据集 id）时返回 None
+    """
+    if not path or not os.path.exists(path):
+        return None
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return [[os.path.basename(path), stat.st_mtime_ns, stat.st_size]]
+    signature = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            stat = os.stat(file_path)
+            signature.append([os.path.relpath(file_path, path), stat.st_mtime_ns, stat.st_size])
+    return signature
+
+
+class HarnessEvaluator(DefaultEvaluator):
+    """
+    扩展评测器
+
+    Args:
+        harness_config: 扩展功能配置，见 utils.get_harness_config
+        dataset_cache: 跨评测任务共享的已加载数据集，见 harness.daemon；为 None 时每次重新加载
+        其余参数同 DefaultEvaluator
+    """
+
+    def __init__(
+        self,
+        *args,
+        harness_config: Optional[Dict[str, Any]] = None,
+        dataset_cache: Optional[MutableMapping[str, Any]] = None,
+        **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.harness_config = harness_config or {}
+        if dataset_cache is not None:
+            self._init_dataset_cache(dataset_cache)
+        self.run_stats: Dict[str, Any] = {}
+        self.rescore_only = self.harness_config.get('rescore_only', False)
+        if self.harness_config.get('compact_artifacts', False):
+            self.cache_manager = CompactCacheManager(
+                self.outputs, self.model_name, self.benchmark_name, dataset_version=self._dataset_version()
+            )
+        self.request_executor = self._init_request_executor()
+        self.coalescer = self._init_coalescer()
+        self.schedule = self.harness_config.get('schedule')
+        self._timeline: Optional[Timeline] = None
+        self.incremental_store = None
+        if self.harness_config.get('incremental', False) and not self.rescore_only:
+            self.incremental_store = IncrementalStore(self.outputs.outputs_dir, self.model_name, self.benchmark_name)
+        self.tracer = self._init_tracer()
+        self.memory = self._init_memory_tracker()
+        self.progress: Optional[CellProgress] = None
+        if (self.harness_config.get('track_progress') or self.harness_config.get('progress_interval')
+                or self.harness_config.get('metrics_port') is not None):
+            self.progress = BOARD.cell(self.harness_config.get('model_name') or self.model_name, self.benchmark_name)
+
+    def _dataset_version(self) -> str:
+        """数据集版本：benchmark 配置和本地数据集文件（路径、修改时间、大小）的哈希"""
+        key_data = {
+            'benchmark': self.benchmark.to_dict(),
+            'dataset_files': dataset_files_signature(self.benchmark.dataset_id),
+        }
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:12]
+
+    def _init_dataset_cache(self, dataset_cache: MutableMapping[str, Any]) -> None:
+        """
+        复用之前任务已加载的数据集；样本构造（如上下文打包）依赖 benchmark 配置、模型和生成参数，
+        这些都相同且本地数据集文件的路径、修改时间和大小都未变化时才命中。返回副本，评测过程中对样本的修改不会影响缓存
+        """
+        key_data = {
+            'benchmark': self.benchmark.to_dict(),
+            'dataset_files': dataset_files_signature(self.benchmark.dataset_id),
+            'model': self.task_config.model,
+            'limit': self.task_config.limit,
+            'repeats': self.task_config.repeats,
+            'seed': self.task_config.seed,
+            'generation_config': self.task_config.generation_config.model_dump(),
+        }
+        key = hashlib.sha256(json.dumps(key_data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        load_dataset = self.benchmark.load_dataset
+
+        def load_dataset_cached():
+            dataset = dataset_cache.get(key)
+            if dataset is None:
+                dataset = load_dataset()
+                dataset_cache[key] = dataset
+            else:
+                logger.info(f'复用已加载的数据集: {self.benchmark_name}')
+            return copy.deepcopy(dataset)
+
+        self.benchmark.load_dataset = load_dataset_cached
+
+    def _init_request_executor(self) -> Optional[RequestExecutor]:
+        """按请求策略包装模型调用；只有 temperature 为 0 的幂等请求允许对冲"""
+        policy = self.harness_config.get('request_policy')
+        if not policy or self.rescore_only:
+            return None
+        temperature = getattr(self.task_config.generation_config, 'temperature', None)
+        idempotent = temperature == 0
+        if policy.get('hedge') and not idempotent:
+            logger.info('temperature 不为 0，跳过对冲请求')
+        executor = RequestExecutor(policy, hedge=idempotent, max_workers=4 * self.task_config.eval_batch_size + 4)
+        self.model = PolicyModel(self.model, executor)
+        return executor
+
+    def _init_coalescer(self) -> Optional[PromptCoalescer]:
+        """初始化请求合并器；重复采样或非确定性生成时不做去重"""
+        if not self.harness_config.get('dedup', False) or self.rescore_only:
+            return None
+        generation_config = self.task_config.generation_config
+        temperature = getattr(generation_config, 'temperature', None)
+        if self.task_config.repeats > 1 or (temperature is not None and temperature > 0):
+            logger.info('repeats > 1 或 temperature > 0，跳过请求去重')
+            return None
+        store = get_response_store(self.model_name, self.harness_config.get('dedup_cache_dir'))
+        return PromptCoalescer(store, self.model_name, generation_config)
+
+    def _init_tracer(self) -> Optional[Tracer]:
+        """
+        开启阶段追踪时，在 benchmark 实例和模型上挂载追踪：数据集加载、record_to_sample、
+        等待推理服务、match_score、judge 调用和报告生成分别记录为区间
+        """
+        if not self.harness_config.get('trace', False):
+            return None
+        tracer = Tracer(f'{self.model_name}@{self.benchmark_name}')
+        sample_args = lambda *args, **kwargs: {'sample_id': kwargs['task_state'].sample_id} \
+            if 'task_state' in kwargs else {}
+        tracer.instrument(self.benchmark, 'load_dataset', 'load_dataset', 'dataset')
+        tracer.instrument(self.benchmark, 'record_to_sample', 'record_to_sample', 'dataset')
+        tracer.instrument(self.benchmark, 'match_score', 'match_score', 'metric', sample_args)
+        tracer.instrument(self.benchmark, 'llm_match_score', 'llm_match_score', 'metric', sample_args)
+        tracer.instrument(self.benchmark, 'generate_report', 'generate_report', 'report')
+        init_llm_judge = self.benchmark.init_llm_judge
+
+        def init_traced_llm_judge():
+            judge = init_llm_judge()
+            if judge is not None:
+                tracer.instrument(judge, 'judge', 'judge', 'judge')
+            return judge
+
+        self.benchmark.init_llm_judge = init_traced_llm_judge
+        if not self.rescore_only:
+            self.model = TracedModel(self.model, tracer)
+        return tracer
+
+    def _init_memory_tracker(self) -> Optional[MemoryTracker]:
+        """开启内存监控或设置内存预算时，按数据集加载、推理、评分和报告生成分阶段记录内存"""
+        budget = self.harness_config.get('memory_budget')
+        if not self.harness_config.get('track_memory', False) and budget is None:
+            return None
+        action = self.harness_config.get('memory_budget_action') or 'stream'
+        memory = MemoryTracker(self.harness_config.get('track_memory', False), budget, action)
+        self.benchmark.load_dataset = memory.wrap(self.benchmark.load_dataset, 'load')
+        return memory
+
+    def _memory_stage(self, name: str, subset: Optional[str] = None):
+        return self.memory.stage(name, subset) if self.memory is not None else nullcontext()
+
+    def _span(self, name: str, cat: str, **args: Any):
+        return self.tracer.span(name, cat, **args) if self.tracer is not None else nullcontext()
+
+    def eval(self) -> Report:
+        """
+        执行评测；开启阶段追踪时，结束后（包括出错时）将追踪写入 logs/trace_{benchmark}.json；
+        开启内存监控时，评测期间在后台采样进程 RSS
+        """
+        if self.memory is not None:
+            self.memory.start()
+        if self.progress is not None:
+            self.progress.start()
+        status = FAILED
+        try:
+            with self._span('eval', 'benchmark'):
+                report = super().eval()
+            status = OK
+            return report
+        finally:
+            if self.progress is not None:
+                self.progress.finish(status)
+            if self.memory is not None:
+                self.memory.stop()
+            if self.tracer is not None:
+                self._write_trace()
+
+    def _write_trace(self) -> None:
+        trace_file = os.path.join(self.outputs.logs_dir, TRACE_FILE_PATTERN.format(benchmark=self.benchmark_name))
+        self.tracer.write(trace_file)
+        summary = ', '.join(
+            f"{cat} {item['spans']} 个 {item['seconds']:.2f}s" for cat, item in self.tracer.summary().items()
+        )
+        logger.info(f'阶段追踪已写入 {trace_file}（区间数和线程累计耗时：{summary}）')
+
+    def evaluate_subset(self, subset: str, dataset: Dataset) -> List[AggScore]:
+        """
+        评测单个 subset；开启增量评测时只评测新增或变更的样本，其余样本复用上次的结果；
+        使用紧凑产物格式时，subset 评测完成后写出压缩的评审结果和索引
+        """
+        if self.progress is not None:
+            self.progress.add_total(len(dataset))
+        with self._span(f'subset:{subset}', 'subset', subset=subset, samples=len(dataset)):
+            return self._evaluate_subset_with_artifacts(subset, dataset)
+
+    def _evaluate_subset_with_artifacts(self, subset: str, dataset: Dataset) -> List[AggScore]:
+        agg_scores = self._evaluate_subset(subset, dataset)
+        self.flush_artifacts(subset)
+        return agg_scores
+
+    def flush_artifacts(self, subset: str) -> None:
+        """使用紧凑产物格式时写出 subset 的压缩评审结果和索引；没有索引的数据文件在下次读取时会被丢弃"""
+        if isinstance(self.cache_manager, CompactCacheManager):
+            start = time.perf_counter()
+            stats = self.cache_manager.flush(subset)
+            stats['flush_seconds'] = round(time.perf_counter() - start, 3)
+            self.run_stats.setdefault('artifacts', {})[subset] = stats
+            logger.info(
+                f"紧凑产物[{subset}]: {stats['reviews']} 条评审结果 {stats['review_bytes']} 字节，"
+                f"{stats['inputs']} 个不同输入 {stats['input_bytes']} 字节"
+            )
+
+    def _evaluate_subset(self, subset: str, dataset: Dataset) -> List[AggScore]:
+        if self.incremental_store is None:
+            if self._use_streaming():
+                if not self.harness_config.get('streaming', False):
+                    logger.warning(f'内存超出预算，subset {subset} 改为流式评测')
+                    self.memory.streamed_subsets.append(subset)
+                with self._memory_stage('stream', subset):
+                    return self._evaluate_subset_streaming(subset, dataset)
+            return super().evaluate_subset(subset, dataset)
+
+        samples = list(dataset)
+        version = adapter_version(self.benchmark, self.task_config)
+        fingerprints = [sample_fingerprint(sample, version) for sample in samples]
+        reused, pending, removed = plan_subset(samples, fingerprints, self.incremental_store.load(subset))
+        logger.info(
+            f'增量评测[{subset}]: 共 {len(samples)} 个样本，复用 {len(reused)} 个，'
+            f'需要评测 {len(pending)} 个，已删除 {removed} 个'
+        )
+
+        # 重写本 subset 的预测和评审结果，使其与当前数据集一致
+        prediction_file = self.cache_manager.get_prediction_cache_path(subset)
+        if os.path.exists(prediction_file):
+            os.remove(prediction_file)
+        self.cache_manager.delete_review_cache(subset)
+        review_file = self.cache_manager.get_review_cache_path(subset)
+
+        entries: Dict[str, Dict[str, Any]] = {}
+        sample_scores: List[SampleScore] = []
+        for sample, entry in reused:
+            prediction = dict(entry['prediction'], index=sample.id)
+            review = ReviewResult.model_validate(entry['review'])
+            review.index = sample.id
+            review.sample_score.sample_id = sample.id
+            review.sample_score.group_id = sample.group_id
+            dump_jsonl_data(data_list=prediction, jsonl_file=prediction_file, dump_mode=DumpMode.APPEND)
+            if isinstance(self.cache_manager, CompactCacheManager):
+                self.cache_manager.save_review_result(subset, review)
+            else:
+                dump_jsonl_data(data_list=review.model_dump(), jsonl_file=review_file, dump_mode=DumpMode.APPEND)
+            sample_scores.append(review.to_sample_score())
+            entries[entry['fingerprint']] = entry
+        if self.progress is not None:
+            self.progress.add_reused(len(reused))
+
+        task_states = self.get_answers(subset, pending)
+        new_scores = self.review_samples(subset, task_states)
+        states_by_id = {state.sample_id: state for state in task_states}
+        fingerprint_by_id = {sample.id: fingerprint for sample, fingerprint in zip(samples, fingerprints)}
+        for sample_score in new_scores:
+            task_state = states_by_id[sample_score.sample_id]
+            entries[fingerprint_by_id[sample_score.sample_id]] = {
+                'fingerprint': fingerprint_by_id[sample_score.sample_id],
+                'prediction': ModelResult.from_task_state(task_state, self.benchmark.save_metadata).model_dump(),
+                'review': ReviewResult.from_score_state(sample_score, task_state,
+                                                        self.benchmark.save_metadata).model_dump(),
+            }
+        sample_scores.extend(new_scores)
+        self.incremental_store.save(subset, entries)
+
+        self.run_stats.setdefault('incremental', {})[subset] = {
+            'samples': len(samples),
+            'reused': len(reused),
+            'evaluated': len(new_scores),
+            'removed': removed,
+        }
+        return self.benchmark.aggregate_scores(sample_scores=sample_scores)
+
+    def _use_streaming(self) -> bool:
+        """
+        是否使用流式评测；离线重新评分和批量评分的 benchmark 仍按阶段执行；
+        内存超出预算且处理方式为 stream 时，之后的 subset 改为流式评测
+        """
+        over_budget = self.memory is not None and self.memory.should_stream
+        if not (self.harness_config.get('streaming', False) or over_budget) or self.rescore_only:
+            return False
+        if self.benchmark.use_batch_scoring:
+            logger.info(f'{self.benchmark_name} 使用批量评分，不支持流式评测，按阶段执行')
+            return False
+        return True
+
+    def _evaluate_subset_streaming(self, subset: str, dataset: Dataset) -> List[AggScore]:
+        """
+        流式评测单个 subset：每条预测结果产生后立即评分，推理和评分并行执行，
+        部分聚合指标持续写入 work_dir/partial/ 下
+        """
+        if self.use_cache:
+            cached_task_state_list, dataset = self.cache_manager.filter_prediction_cache(subset, dataset)
+        else:
+            cached_task_state_list = []
+        self.cache_manager.delete_review_cache(subset)
+
+        model_prediction_dir = os.path.dirname(self.cache_manager.get_prediction_cache_path(subset))
+        samples = list(dataset)
+        cache_lock = threading.Lock()
+
+        def save_prediction(task_state: TaskState) -> TaskState:
+            with cache_lock:
+                self.cache_manager.save_prediction_cache(subset, task_state, self.benchmark.save_metadata)
+            return task_state
+
+        def generate_sample(sample: Sample) -> List[TaskState]:
+            return [save_prediction(self._predict_sample(sample, model_prediction_dir))]
+
+        def generate_group(key: str, group: List[Sample]) -> List[TaskState]:
+            output = self.coalescer.store.get(key)
+            if output is None:
+                output = self._predict_sample(group[0], model_prediction_dir).output
+                with cache_lock:
+                    self.coalescer.store.put(key, output)
+            return [
+                save_prediction(
+                    self.benchmark._on_inference_end(self.model, sample, output.model_copy(deep=True), model_prediction_dir)
+                ) for sample in group
+            ]
+
+        units = [partial(lambda task_state: [task_state], task_state) for task_state in cached_task_state_list]
+        if self.coalescer is not None:
+            groups = self.coalescer.group(samples)
+            dispatched = sum(1 for key in groups if key not in self.coalescer.store)
+            units += [partial(generate_group, key, group) for key, group in self._order_groups(groups)]
+        else:
+            units += [partial(generate_sample, sample) for sample in self._order_samples(samples)]
+
+        partial_path = os.path.join(
+            self.outputs.outputs_dir, PARTIAL_DIR, self.model_name, f'{self.benchmark_name}_{subset}.json'
+        )
+        aggregate = PartialAggregate(self.benchmark, partial_path, total=len(cached_task_state_list) + len(samples))
+        sample_scores: List[SampleScore] = []
+
+        def on_score(task_state: TaskState, sample_score: SampleScore) -> None:
+            self.cache_manager.save_review_cache(
+                subset=subset,
+                task_state=task_state,
+                sample_score=sample_score,
+                save_metadata=self.benchmark.save_metadata
+            )
+            sample_scores.append(sample_score)
+            aggregate.add(sample_score)
+
+        generation_workers = self.task_config.eval_batch_size
+        self._start_timeline()
+        logger.info(f'Streaming {aggregate.total} samples of subset {subset}, if data is large, it may take a while.')
+        stats = run_streaming(
+            units,
+            generate=lambda unit: unit(),
+            score=self._review_task_state,
+            on_score=on_score,
+            generation_workers=generation_workers,
+            scoring_workers=self.task_config.judge_worker_num,
+            queue_size=self.harness_config.get('stream_queue_size') or 4 * generation_workers,
+            ignore_errors=self.task_config.ignore_errors,
+        )
+        aggregate.write(final=True)
+        self._finish_timeline(subset)
+        if self.schedule == 'longest_first':
+            self._sort_prediction_cache(subset, samples)
+
+        if self.coalescer is not None:
+            self.coalescer.record(subset, total=len(samples), unique=len(groups), dispatched=dispatched)
+            self.run_stats['dedup'] = self.coalescer.summary()
+        self.run_stats.setdefault('streaming', {})[subset] = stats
+        logger.info(
+            f"流式评测[{subset}]: 推理 {stats['generated']} 条，评分 {stats['scored']} 条，"
+            f"推理耗时 {stats['generation_busy']:.2f}s，评分耗时 {stats['scoring_busy']:.2f}s（线程累计），"
+            f"总耗时 {stats['wall_time']:.2f}s"
+        )
+
+        sample_scores.sort(key=lambda sample_score: sample_score.sample_id)
+        return self.benchmark.aggregate_scores(sample_scores=sample_scores)
+
+    def get_answers(self, subset: str, dataset: Dataset) -> List[TaskState]:
+        """
+        获取模型预测结果；开启去重时相同请求只调用一次模型，结果分发给所有共享该请求的样本；
+        指定调度策略时按策略决定发送顺序并记录推理时间线；离线重新评分时只从预测文件读取，不调用模型
+        """
+        with self._span('get_answers', 'stage', subset=subset), self._memory_stage('generate', subset):
+            if self.rescore_only:
+                return self._load_predictions(subset, dataset)
+            self._start_timeline()
+            try:
+                if self.coalescer is None:
+                    task_states = self._get_answers_scheduled(subset, dataset)
+                else:
+                    task_states = self._get_answers_coalesced(subset, dataset)
+            finally:
+                self._finish_timeline(subset)
+            return task_states
+
+    def _get_answers_scheduled(self, subset: str, dataset: Dataset) -> List[TaskState]:
+        """按调度策略的顺序发送请求，返回和写入的预测结果仍保持数据集的原始顺序"""
+        if self.schedule != 'longest_first':
+            return super().get_answers(subset, dataset)
+        samples = list(dataset)
+        ordered = self._order_samples(samples)
+        task_states = super().get_answers(subset, MemoryDataset(ordered, name=getattr(dataset, 'name', None)))
+        positions = {sample.id: position for position, sample in enumerate(samples)}
+        task_states.sort(key=lambda state: positions.get(state.sample_id, len(positions)))
+        self._sort_prediction_cache(subset, samples)
+        return task_states
+
+    def _get_answers_coalesced(self, subset: str, dataset: Dataset) -> List[TaskState]:
+        """相同请求只调用一次模型，结果分发给所有共享该请求的样本"""
+
+        if self.use_cache:
+            cached_task_state_list, dataset = self.cache_manager.filter_prediction_cache(subset, dataset)
+        else:
+            cached_task_state_list = []
+
+        model_prediction_dir = os.path.dirname(self.cache_manager.get_prediction_cache_path(subset))
+        dataset_list = list(dataset)
+        if not dataset_list:
+            return cached_task_state_list
+
+        groups = self.coalescer.group(dataset_list)
+        to_dispatch = [samples[0] for key, samples in self._order_groups(groups) if key not in self.coalescer.store]
+        dispatch_keys = {id(sample): key for key, samples in groups.items() for sample in samples[:1]}
+
+        logger.info(
+            f'Processing {len(dataset_list)} samples ({len(groups)} unique requests, '
+            f'{len(to_dispatch)} to dispatch), if data is large, it may take a while.'
+        )
+
+        # 本 subset 内新调用得到的输出（包括出错的输出，出错的输出不会进入共享存储）
+        outputs: Dict[str, Any] = {}
+
+        def worker(sample: Sample) -> TaskState:
+            return self._predict_sample(sample, model_prediction_dir)
+
+        def on_result(sample: Sample, task_state: TaskState) -> None:
+            key = dispatch_keys[id(sample)]
+            outputs[key] = task_state.output
+            self.coalescer.store.put(key, task_state.output)
+
+        def on_error(sample: Sample, exc: Exception) -> None:
+            tb_str = traceback.format_exc()
+            logger.error(f'{sample.model_dump_json(indent=2)} prediction failed: due to {exc}\nTraceback:\n{tb_str}')
+            if self.task_config.ignore_errors:
+                logger.warning('Error ignored, continuing with next sample.')
+                return
+            raise exc
+
+        run_in_threads_with_progress(
+            to_dispatch,
+            worker,
+            desc=f'Predicting[{self.benchmark_name}@{subset}]: ',
+            max_workers=self.task_config.eval_batch_size,
+            log_interval=HEARTBEAT_INTERVAL_SEC,
+            on_result=on_result,
+            on_error=on_error,
+            filter_none_results=True,
+        )
+
+        task_states: List[TaskState] = []
+        for key, samples in groups.items():
+            output = outputs.get(key) or self.coalescer.store.get(key)
+            if output is None:
+                # 调用失败且错误被忽略
+                continue
+            for sample in samples:
+                task_state = self.benchmark._on_inference_end(
+                    self.model, sample, output.model_copy(deep=True), model_prediction_dir
+                )
+                self.cache_manager.save_prediction_cache(subset, task_state, self.benchmark.save_metadata)
+                task_states.append(task_state)
+
+        self.coalescer.record(subset, total=len(dataset_list), unique=len(groups), dispatched=len(to_dispatch))
+        self.run_stats['dedup'] = self.coalescer.summary()
+
+        task_states.sort(key=lambda state: state.sample_id)
+        logger.info(f'Finished getting predictions for subset: {subset}.')
+        return cached_task_state_list + task_states
+
+    def _predict_sample(self, sample: Sample, model_prediction_dir: str) -> TaskState:
+        start = time.perf_counter()
+        with self._span('inference', 'sample', sample_id=sample.id):
+            try:
+                task_state = super()._predict_sample(sample, model_prediction_dir)
+            except Exception:
+                if self.progress is not None:
+                    self.progress.record_request(failed=True)
+                raise
+        if self.progress is not None:
+            self.progress.record_request(task_state.output)
+        if self._timeline is not None:
+            self._timeline.record(sample, start, time.perf_counter())
+        return task_state
+
+    def _order_samples(self, samples: List[Sample]) -> List[Sample]:
+        return order_samples(samples, self.schedule, self.task_config.generation_config.max_tokens)
+
+    def _order_groups(self, groups: Dict[str, List[Sample]]) -> List[Any]:
+        """按调度策略排列去重后的请求组，每组以第一个样本代表其请求"""
+        items = list(groups.items())
+        if self.schedule != 'longest_first':
+            return items
+        max_tokens = self.task_config.generation_config.max_tokens
+        costs = [estimate_cost(group[0], max_tokens) for _, group in items]
+        return [items[i] for i in sorted(range(len(items)), key=lambda i: (-costs[i], i))]
+
+    def _start_timeline(self) -> None:
+        if self.schedule:
+            self._timeline = Timeline(
+                self.schedule, self.task_config.eval_batch_size, self.task_config.generation_config.max_tokens
+            )
+
+    def _finish_timeline(self, subset: str) -> None:
+        """写出推理时间线，统计记录在报告的 harness.schedule 字段中"""
+        timeline, self._timeline = self._timeline, None
+        if timeline is None or not timeline.events:
+            return
+        timeline.write(
+            os.path.join(self.outputs.outputs_dir, TIMELINE_DIR, self.model_name, f'{self.benchmark_name}_{subset}.json')
+        )
+        summary = timeline.summary()
+        self.run_stats.setdefault('schedule', {})[subset] = summary
+        logger.info(
+            f"推理时间线[{subset}]: {summary['schedule']}，总耗时 {summary['makespan']:.2f}s，"
+            f"长尾 {summary['tail_seconds']:.2f}s；按实测耗时模拟 fifo {summary['fifo_makespan']:.2f}s，"
+            f"longest_first {summary['longest_first_makespan']:.2f}s"
+        )
+
+    def _sort_prediction_cache(self, subset: str, samples: List[Sample]) -> None:
+        """按数据集的原始顺序重写预测文件（预测结果按完成顺序追加写入）"""
+        prediction_file = self.cache_manager.get_prediction_cache_path(subset)
+        if not os.path.exists(prediction_file):
+            return
+        positions = {sample.id: position for position, sample in enumerate(samples)}
+        items = jsonl_to_list(prediction_file)
+        items.sort(key=lambda item: (positions.get(item.get('index'), len(positions)), item.get('index')))
+        tmp_file = prediction_file + '.tmp'
+        dump_jsonl_data(data_list=items, jsonl_file=tmp_file)
+        os.replace(tmp_file, prediction_file)
+
+    def _load_predictions(self, subset: str, dataset: Dataset) -> List[TaskState]:
+        """从预测文件恢复任务状态，没有预测结果的样本直接跳过"""
+        prediction_file = self.cache_manager.get_prediction_cache_path(subset)
+        task_states, missing = load_prediction_states(prediction_file, dataset)
+        if missing:
+            logger.warning(f'重新评分[{subset}]: {missing} 个样本没有预测结果，已跳过')
+        self.run_stats.setdefault('rescore', {})[subset] = {'predictions': len(task_states), 'missing': missing}
+        return task_states
+
+    def get_reviews(self, subset: str, task_states: List[TaskState]) -> List[SampleScore]:
+        """
+        计算评分；离线重新评分时忽略已有的评审缓存，使用进程池重新评分
+        """
+        with self._span('get_reviews', 'stage', subset=subset), self._memory_stage('score', subset):
+            return self._get_reviews(subset, task_states)
+
+    def _get_reviews(self, subset: str, task_states: List[TaskState]) -> List[SampleScore]:
+        if not self.rescore_only:
+            self._prepare_reviews(task_states)
+            return super().get_reviews(subset, task_states)
+
+        self.cache_manager.delete_review_cache(subset)
+        if not task_states:
+            return []
+
+        start = time.perf_counter()
+        if self.benchmark.use_llm_judge:
+            # 显式允许调用 judge 时（--rescore_with_judge）在当前进程中评分，judge 并发数与正常评测相同
+            num_workers = 1
+            reviewed_scores = self._review_samples(subset, task_states)
+            self._record_rescore(subset, reviewed_scores, num_workers, start)
+            return reviewed_scores
+
+        num_workers = self.harness_config.get('rescore_workers') or default_num_workers()
+        if len(task_states) < MIN_PARALLEL_SAMPLES:
+            num_workers = 1
+        if num_workers <= 1:
+            self._prepare_reviews(task_states)
+        reviewed_scores = rescore_task_states(
+            self.benchmark,
+            task_states,
+            num_workers,
+            ignore_errors=self.task_config.ignore_errors,
+            task_config=self.task_config,
+        )
+
+        def on_result(task_state: TaskState, sample_score: SampleScore) -> None:
+            self.cache_manager.save_review_cache(
+                subset=subset,
+                task_state=task_state,
+                sample_score=sample_score,
+                save_metadata=self.benchmark.save_metadata
+            )
+
+        if self.benchmark.use_batch_scoring:
+            reviewed_scores = self._batch_review_task_states(
+                task_states=task_states, reviewed_scores=reviewed_scores, on_result=on_result
+            )
+        else:
+            for task_state, sample_score in zip(task_states, reviewed_scores):
+                if sample_score is not None:
+                    on_result(task_state, sample_score)
+
+        reviewed_scores = [score for score in reviewed_scores if score is not None]
+        self._record_rescore(subset, reviewed_scores, num_workers, start)
+        return reviewed_scores
+
+    def _record_rescore(self, subset: str, reviewed_scores: List[SampleScore], num_workers: int, start: float) -> None:
+        elapsed = time.perf_counter() - start
+        self.run_stats['rescore'][subset].update({
+            'reviewed': len(reviewed_scores),
+            'workers': num_workers,
+            'seconds': round(elapsed, 3),
+        })
+        logger.info(
+            f'重新评分[{subset}]: {len(reviewed_scores)} 个样本，{num_workers} 个进程，耗时 {elapsed:.2f} 秒'
+        )
+
+    def review_samples(self, subset: str, task_states: List[TaskState]) -> List[SampleScore]:
+        """
+        对一批预测结果评分并追加写入评审结果
+
+        与 get_reviews 不同，该方法不会清理已有的评审缓存，用于同一 subset 分批评测的场景
+
+        Args:
+            subset: subset 名称
+            task_states: 本批次的预测结果
+
+        Returns:
+            本批次的样本评分
+        """
+        if not task_states:
+            return []
+        with self._span('review_samples', 'stage', subset=subset), self._memory_stage('score', subset):
+            return self._review_samples(subset, task_states)
+
+    def _review_samples(self, subset: str, task_states: List[TaskState]) -> List[SampleScore]:
+        self._prepare_reviews(task_states)
+
+        def on_result(task_state: TaskState, sample_score: SampleScore) -> None:
+            self.cache_manager.save_review_cache(
+                subset=subset,
+                task_state=task_state,
+                sample_score=sample_score,
+                save_metadata=self.benchmark.save_metadata
+            )
+
+        def on_error(task_state: TaskState, exc: Exception) -> None:
+            tb_str = traceback.format_exc()
+            logger.error(f'Error when review sample {task_state.sample_id}: due to {exc}\nTraceback:\n{tb_str}')
+            if self.task_config.ignore_errors:
+                logger.warning('Error ignored, continuing with next sample.')
+                return
+            raise exc
+
+        reviewed_scores = run_in_threads_with_progress(
+            task_states,
+            self._review_task_state,
+            desc=f'Reviewing[{self.benchmark_name}@{subset}]: ',
+            max_workers=self.task_config.judge_worker_num,
+            log_interval=HEARTBEAT_INTERVAL_SEC,
+            on_error=on_error,
+            on_result=None if self.benchmark.use_batch_scoring else on_result,
+            filter_none_results=False,
+        )
+        if self.benchmark.use_batch_scoring:
+            reviewed_scores = self._batch_review_task_states(
+                task_states=task_states, reviewed_scores=reviewed_scores, on_result=on_result
+            )
+        return [score for score in reviewed_scores if score is not None]
+
+    def _prepare_reviews(self, task_states: List[TaskState]) -> None:
+        """
+        评分前让 benchmark 批量预计算整批样本的指标（benchmark 实现 prepare_reviews 时），
+        如语义相似度的向量编码；逐条评分时读取预计算的结果
+        """
+        prepare_reviews = getattr(self.benchmark, 'prepare_reviews', None)
+        if prepare_reviews is not None and task_states:
+            with self._span('prepare_reviews', 'stage', samples=len(task_states)):
+                prepare_reviews(task_states)
+
+    def _review_task_state(self, task_state: TaskState) -> SampleScore:
+        with self._span('review', 'sample', sample_id=task_state.sample_id):
+            sample_score = super()._review_task_state(task_state)
+        if self.progress is not None:
+            self.progress.record_score(sample_score)
+        return sample_score
+
+    def get_report(self, agg_score_dict: Dict[str, List[AggScore]]) -> Report:
+        """生成报告，并将运行统计写入报告文件的 harness 字段"""
+        with self._span('get_report', 'report'):
+            return self._get_report(agg_score_dict)
+
+    def _get_report(self, agg_score_dict: Dict[str, List[AggScore]]) -> Report:
+        if self.request_executor is not None and self.request_executor.stats['requests']:
+            self.run_stats['requests'] = self.request_executor.summary()
+        with self._memory_stage('report'):
+            report = super().get_report(agg_score_dict)
+        if self.memory is not None:
+            self.run_stats['memory'] = self.memory.summary()
+            logger.info(
+                f"内存[{self.benchmark_name}]: 进程 RSS 峰值 {self.run_stats['memory']['peak_rss_mb']}MB，各阶段峰值 "
+                + '，'.join(
+                    f"{stage['stage']}{'@' + stage['subset'] if 'subset' in stage else ''} {stage['rss_peak_mb']}MB"
+                    for stage in self.run_stats['memory']['stages']
+                )
+            )
+        if self.run_stats:
+            report_file = self.cache_manager.get_report_file()
+            report_data = report.to_dict()
+            report_data['harness'] = self.run_stats
+            with open(report_file, 'w', encoding='utf-8') as f:
+                json.dump(report_data, f, indent=4, ensure_ascii=False)
+        return report
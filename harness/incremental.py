@@ -0,0 +1,128 @@
+"""增量评测模块，为每个样本计算指纹，只评测新增或变更的样本，未变更的样本复用上次的预测和评审结果。"""
+import os
+import json
+import hashlib
+from typing import Any, Dict, List, Tuple
+
+from evalscope.api.dataset import Sample
+from evalscope.utils.logger import get_logger
+from evalscope.version import __version__ as evalscope_version
+
+logger = get_logger()
+
+INCREMENTAL_DIR = 'incremental'
+# 只影响展示、不影响样本和评分的 benchmark 字段，不计入版本
+_DESCRIPTIVE_FIELDS = ('pretty_name', 'description', 'tags')
+
+
+def adapter_version(benchmark: Any, task_config: Any) -> str:
+    """
+    获取 adapter 版本标识
+
+    自定义 adapter 通过类属性 ADAPTER_VERSION 声明版本，修改评分逻辑时递增；
+    EvalScope 内置 adapter 使用 EvalScope 版本号。benchmark 配置（评测指标、聚合方式和 extra_params，
+    如 answer_cascade）、judge 设置和生成参数（如 max_tokens）也计入版本，修改后所有样本重新评测。
+    """
+    adapter_cls = type(benchmark)
+    version = getattr(benchmark, 'ADAPTER_VERSION', None) or evalscope_version
+    config = {
+        'benchmark': {key: value for key, value in benchmark.to_dict().items() if key not in _DESCRIPTIVE_FIELDS},
+        'use_llm_judge': getattr(benchmark, 'use_llm_judge', None),
+        'judge_strategy': task_config.judge_strategy,
+        'judge_model_args': {key: value for key, value in (task_config.judge_model_args or {}).items() if key != 'api_key'},
+        'generation_config': task_config.generation_config.model_dump(exclude_none=True),
+    }
+    content = json.dumps(config, ensure_ascii=False, sort_keys=True, default=str)
+    config_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+    return f'{adapter_cls.__module__}.{adapter_cls.__qualname__}:{version}:{config_hash}'
+
+
+def sample_fingerprint(sample: Sample, version: str) -> str:
+    """
+    计算样本指纹，包括渲染后的输入、参考答案、工具定义、元数据和 adapter 版本
+
+    Args:
+        sample: 已完成 prompt 渲染的样本
+        version: adapter 版本标识
+
+    Returns:
+        sha256 十六进制摘要
+    """
+    if isinstance(sample.input, str):
+        messages = sample.input
+    else:
+        messages = [message.model_dump(exclude={'id'}, exclude_none=True) for message in sample.input]
+    payload = {
+        'version': version,
+        'input': messages,
+        'target': sample.target,
+        'choices': sample.choices,
+        'tools': [tool.model_dump(exclude_none=True) for tool in (sample.tools or [])],
+        'metadata': sample.metadata,
+    }
+    content = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class IncrementalStore:
+    """
+    样本指纹到评测结果的存储
+
+    每个 subset 一个 JSONL 文件，每行包含 fingerprint、prediction（ModelResult）和 review（ReviewResult），
+    位于 work_dir/incremental/{model}/{benchmark}_{subset}.jsonl
+    """
+
+    def __init__(self, outputs_dir: str, model_name: str, benchmark_name: str):
+        self.root_dir = os.path.join(outputs_dir, INCREMENTAL_DIR, model_name)
+        self.benchmark_name = benchmark_name
+
+    def path(self, subset: str) -> str:
+        return os.path.join(self.root_dir, f'{self.benchmark_name}_{subset}.jsonl')
+
+    def load(self, subset: str) -> Dict[str, Dict[str, Any]]:
+        """加载某个 subset 的指纹索引"""
+        entries = {}
+        path = self.path(subset)
+        if not os.path.exists(path):
+            return entries
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    entries[entry['fingerprint']] = entry
+        return entries
+
+    def save(self, subset: str, entries: Dict[str, Dict[str, Any]]) -> None:
+        """覆盖写入某个 subset 的指纹索引，已删除的样本不再保留"""
+        os.makedirs(self.root_dir, exist_ok=True)
+        tmp_path = self.path(subset) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self.path(subset))
+
+
+def plan_subset(
+    samples: List[Sample], fingerprints: List[str], previous: Dict[str, Dict[str, Any]]
+) -> Tuple[List[Tuple[Sample, Dict[str, Any]]], List[Sample], int]:
+    """
+    根据指纹划分需要复用和需要重新评测的样本
+
+    Args:
+        samples: 当前数据集的样本
+        fingerprints: 与 samples 一一对应的指纹
+        previous: 上次运行保存的指纹索引
+
+    Returns:
+        (可复用的 (样本, 历史结果) 列表, 需要评测的样本列表, 已删除的样本数)
+    """
+    reused, pending = [], []
+    for sample, fingerprint in zip(samples, fingerprints):
+        entry = previous.get(fingerprint)
+        if entry is not None:
+            reused.append((sample, entry))
+        else:
+            pending.append(sample)
+    removed = len(set(previous) - set(fingerprints))
+    return reused, pending, removed
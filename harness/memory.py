@@ -0,0 +1,180 @@
+"""内存监控模块，按评测阶段记录进程 RSS 峰值和 tracemalloc 统计的主要分配位置，并在超出内存预算时告警或切换为流式评测。"""
+import os
+import sys
+import time
+import resource
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from evalscope.utils.logger import get_logger
+
+from harness.profiling import short_path
+
+logger = get_logger()
+
+BUDGET_ACTIONS = ('warn', 'stream')
+RSS_INTERVAL = 0.1
+TOP_ALLOCATIONS = 10
+MB = 1024 * 1024
+
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def read_rss() -> int:
+    """
+    当前进程的常驻内存（字节）
+
+    Linux 读取 /proc/self/statm；其他平台没有当前值，使用 getrusage 的历史峰值代替
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS 的单位为字节，Linux 为 KB
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _mb(value: int) -> float:
+    return round(value / MB, 1)
+
+
+class MemoryTracker:
+    """
+    按阶段的内存监控
+
+    后台线程每隔 RSS_INTERVAL 秒采样 RSS，记录每个阶段的峰值；开启 tracemalloc 时额外记录
+    阶段内 Python 对象分配的峰值，以及阶段结束时相对阶段开始新增占用最多的分配位置。
+    RSS 超出预算时记录告警（只告警一次），action 为 stream 时由评测器将后续 subset 切换为流式评测。
+
+    Args:
+        trace_allocations: 是否开启 tracemalloc；会使 Python 对象分配变慢，只在排查内存问题时开启
+        budget_mb: RSS 预算（MB），None 表示不检查
+        action: 超出预算后的处理方式，warn 只告警，stream 同时切换为流式评测
+    """
+
+    def __init__(self, trace_allocations: bool, budget_mb: Optional[float] = None, action: str = 'stream'):
+        if action not in BUDGET_ACTIONS:
+            raise ValueError(f'未知的内存预算处理方式: {action}，可选值: {BUDGET_ACTIONS}')
+        self.trace_allocations = trace_allocations
+        self.budget_mb = budget_mb
+        self.action = action
+        self.stages: List[Dict[str, Any]] = []
+        self.peak_rss = 0
+        self.budget_exceeded = False
+        self.streamed_subsets: List[str] = []
+        self._stage_peak = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_tracemalloc = False
+
+    def start(self) -> None:
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._sample()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='harness-memory', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self._sample()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _run(self) -> None:
+        while not self._stop.wait(RSS_INTERVAL):
+            self._sample()
+
+    def _sample(self) -> int:
+        rss = read_rss()
+        with self._lock:
+            self.peak_rss = max(self.peak_rss, rss)
+            self._stage_peak = max(self._stage_peak, rss)
+            exceeded = self.budget_mb is not None and rss > self.budget_mb * MB and not self.budget_exceeded
+            if exceeded:
+                self.budget_exceeded = True
+        if exceeded:
+            logger.warning(
+                f'进程内存 {_mb(rss)}MB 超出预算 {self.budget_mb}MB'
+                + ('，后续 subset 将切换为流式评测' if self.action == 'stream' else '')
+            )
+        return rss
+
+    @property
+    def should_stream(self) -> bool:
+        return self.budget_exceeded and self.action == 'stream'
+
+    @contextmanager
+    def stage(self, name: str, subset: Optional[str] = None) -> Iterator[None]:
+        """记录一个阶段的 RSS 起止值和峰值；开启 tracemalloc 时记录分配峰值和主要分配位置"""
+        tracing = tracemalloc.is_tracing() and self.trace_allocations
+        before = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS) if tracing else None
+        if tracing:
+            tracemalloc.reset_peak()
+        rss_start = self._sample()
+        with self._lock:
+            self._stage_peak = rss_start
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            rss_end = self._sample()
+            with self._lock:
+                stage_peak = self._stage_peak
+            record: Dict[str, Any] = {'stage': name}
+            if subset is not None:
+                record['subset'] = subset
+            record.update({
+                'seconds': round(time.perf_counter() - start, 3),
+                'rss_start_mb': _mb(rss_start),
+                'rss_end_mb': _mb(rss_end),
+                'rss_peak_mb': _mb(stage_peak),
+            })
+            if tracing:
+                record['traced_peak_mb'] = _mb(tracemalloc.get_traced_memory()[1])
+                after = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+                record['top_allocations'] = [{
+                    'site': f'{short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}',
+                    'size_diff_kb': round(stat.size_diff / 1024, 1),
+                    'count_diff': stat.count_diff,
+                } for stat in after.compare_to(before, 'lineno')[:TOP_ALLOCATIONS] if stat.size_diff > 0]
+            with self._lock:
+                self.stages.append(record)
+
+    def wrap(self, fn: Callable, name: str) -> Callable:
+        def tracked(*args, **kwargs):
+            with self.stage(name):
+                return fn(*args, **kwargs)
+
+        return tracked
+
+    def summary(self) -> Dict[str, Any]:
+        """内存统计：进程 RSS 峰值、预算检查结果和各阶段记录"""
+        with self._lock:
+            summary = {
+                'peak_rss_mb': _mb(self.peak_rss),
+                'trace_allocations': self.trace_allocations,
+                'stages': list(self.stages),
+            }
+        if self.budget_mb is not None:
+            summary.update({
+                'budget_mb': self.budget_mb,
+                'budget_exceeded': self.budget_exceeded,
+                'action': self.action,
+                'streamed_subsets': list(self.streamed_subsets),
+            })
+        return summary
@@ -0,0 +1,152 @@
+"""请求策略模块，为模型调用提供指数退避重试和对冲请求，并统计重试、对冲次数和请求耗时。"""
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+from evalscope.utils.logger import get_logger
+
+logger = get_logger()
+
+DEFAULT_POLICY: Dict[str, Any] = {
+    'timeout': 600,
+    'retries': 4,
+    'backoff_base': 2.0,
+    'backoff_max': 60.0,
+    'jitter': 0.5,
+    'hedge': False,
+    'hedge_quantile': 0.95,
+    'hedge_min_samples': 20,
+    'hedge_budget': 0.1,
+}
+
+
+def _quantile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class RequestExecutor:
+    """
+    按请求策略执行模型调用
+
+    失败的调用按指数退避加随机抖动重试；开启对冲时，调用耗时超过历史耗时的 hedge_quantile 分位数后
+    再发送一个相同的请求，取先返回的结果。对冲只应用于幂等请求（temperature 为 0），
+    对冲请求数不超过请求总数的 hedge_budget。
+
+    Args:
+        policy: 请求策略，字段见 DEFAULT_POLICY
+        hedge: 是否允许对冲（调用方根据请求是否幂等决定）
+        max_workers: 执行调用的线程数，对冲时落后的请求在后台继续运行，需要预留额外的线程
+    """
+
+    def __init__(self, policy: Dict[str, Any], hedge: bool = False, max_workers: int = 8):
+        self.policy = dict(DEFAULT_POLICY, **(policy or {}))
+        self.hedge = hedge and self.policy['hedge']
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedge') if self.hedge else None
+        self._latencies: Deque[float] = deque(maxlen=1000)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'attempts': 0, 'retries': 0, 'failures': 0, 'hedges': 0, 'hedge_wins': 0}
+
+    def _count(self, key: str, value: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += value
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次重试（从 0 开始）前的等待时间"""
+        delay = min(self.policy['backoff_max'], self.policy['backoff_base'] * (2 ** attempt))
+        return delay * (1 - self.policy['jitter'] * random.random())
+
+    def hedge_delay(self) -> Optional[float]:
+        """发送对冲请求前的等待时间；历史请求不足或超出对冲预算时返回 None"""
+        if not self.hedge:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.policy['hedge_min_samples']:
+                return None
+            if self.stats['hedges'] >= self.policy['hedge_budget'] * self.stats['requests']:
+                return None
+            return _quantile(self._latencies, self.policy['hedge_quantile'])
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """执行一次模型调用，失败时按策略重试，重试次数用完后抛出最后一次的错误"""
+        self._count('requests')
+        for attempt in range(self.policy['retries'] + 1):
+            self._count('attempts')
+            try:
+                return self._attempt(fn)
+            except Exception as exc:
+                if attempt >= self.policy['retries']:
+                    self._count('failures')
+                    raise
+                delay = self.backoff(attempt)
+                self._count('retries')
+                logger.warning(
+                    f"Attempt {attempt + 1} / {self.policy['retries'] + 1} failed: {exc}. Retrying in {delay:.1f}s..."
+                )
+                time.sleep(delay)
+
+    def _timed(self, fn: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        result = fn()
+        with self._lock:
+            self._latencies.append(time.perf_counter() - start)
+        return result
+
+    def _attempt(self, fn: Callable[[], Any]) -> Any:
+        delay = self.hedge_delay()
+        if delay is None:
+            return self._timed(fn)
+
+        primary = self._pool.submit(self._timed, fn)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        self._count('hedges')
+        hedged = self._pool.submit(self._timed, fn)
+        pending = {primary, hedged}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedged:
+                        self._count('hedge_wins')
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def summary(self) -> Dict[str, Any]:
+        """请求统计：请求数、尝试次数、重试次数、失败数、对冲次数、对冲请求先返回的次数和耗时分位数（秒）"""
+        with self._lock:
+            summary = dict(self.stats)
+            latencies = list(self._latencies)
+        if latencies:
+            summary['latency_p50'] = round(_quantile(latencies, 0.5), 3)
+            summary['latency_p95'] = round(_quantile(latencies, 0.95), 3)
+        summary['hedge_enabled'] = self.hedge
+        return summary
+
+
+class PolicyModel:
+    """
+    模型代理，generate 调用经过 RequestExecutor，其余属性直接访问被代理的模型
+    """
+
+    def __init__(self, model: Any, executor: RequestExecutor):
+        object.__setattr__(self, '_model', model)
+        object.__setattr__(self, '_executor', executor)
+
+    def generate(self, *args, **kwargs):
+        model = object.__getattribute__(self, '_model')
+        executor = object.__getattribute__(self, '_executor')
+        return executor.call(lambda: model.generate(*args, **kwargs))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(object.__getattribute__(self, '_model'), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(object.__getattribute__(self, '_model'), name, value)
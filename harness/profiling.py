@@ -0,0 +1,225 @@
+"""CPU 性能剖析模块，剖析评测进程的 harness 侧热点，等待推理服务返回的时间单独统计，结果写入 work_dir/profile/。"""
+import os
+import re
+import sys
+import time
+import pstats
+import cProfile
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+PROFILE_DIR = 'profile'
+PROFILE_MODES = ('sampling', 'deterministic')
+SAMPLE_INTERVAL = 0.005
+TOP_N = 30
+
+# 位于这些模块中的栈视为等待推理服务（网络 IO），其余线程空闲等待（锁、队列、线程池）单独统计
+_NETWORK_FILES = ('socket.py', 'ssl.py', 'selectors.py', os.path.join('http', 'client.py'))
+_NETWORK_PACKAGES = ('urllib3', 'httpcore', 'httpx', 'h11', 'requests', 'anyio')
+_NETWORK_BUILTINS = ('_socket.', '_ssl.', 'select.', 'getaddrinfo')
+_IDLE_FILES = ('threading.py', 'queue.py', os.path.join('concurrent', 'futures'))
+_IDLE_BUILTINS = ('_thread.lock', '_thread.RLock', 'time.sleep', '_queue.SimpleQueue')
+
+CPU, NETWORK, IDLE = 'cpu', 'network', 'idle'
+
+_LIBRARY_PATTERN = re.compile(r'(?:site-packages|lib[\\/]python\d+\.\d+)[\\/]')
+
+
+def classify(filename: str, name: str) -> Optional[str]:
+    """函数所属的等待类别：network、idle，或 None 表示计算"""
+    if filename == '~':
+        if any(marker in name for marker in _NETWORK_BUILTINS):
+            return NETWORK
+        if any(marker in name for marker in _IDLE_BUILTINS):
+            return IDLE
+        return None
+    parts = filename.split(os.sep)
+    if filename.endswith(_NETWORK_FILES) or any(package in parts for package in _NETWORK_PACKAGES):
+        return NETWORK
+    if any(marker in filename for marker in _IDLE_FILES):
+        return IDLE
+    return None
+
+
+def short_path(filename: str) -> str:
+    """第三方包和标准库的路径从包名开始，项目内的路径相对当前目录"""
+    match = None
+    for match in _LIBRARY_PATTERN.finditer(filename):
+        pass
+    if match is not None:
+        return filename[match.end():]
+    return os.path.relpath(filename) if os.path.isabs(filename) else filename
+
+
+def _frame_label(code: Any) -> str:
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f'{name} ({short_path(code.co_filename)}:{code.co_firstlineno})'.replace(';', ',')
+
+
+class SamplingProfiler:
+    """
+    采样剖析器
+
+    后台线程每隔 interval 秒采集进程内所有线程的调用栈；每个样本按栈中的函数归类为计算、
+    等待推理服务（栈中有网络 IO 模块）或空闲（最内层在锁、队列或线程池中等待），
+    热点表只统计计算样本。剖析开销与线程数成正比，与被调用的函数数量无关。
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start = 0.0
+        self.seconds = 0.0
+
+    def start(self) -> None:
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='harness-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.seconds = time.perf_counter() - self._start
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                codes.reverse()
+                self.stacks[tuple(codes)] += 1
+
+    def _category(self, codes: Tuple[Any, ...]) -> str:
+        if any(classify(code.co_filename, code.co_name) == NETWORK for code in codes):
+            return NETWORK
+        if classify(codes[-1].co_filename, codes[-1].co_name) == IDLE:
+            return IDLE
+        return CPU
+
+    def write(self, output_dir: str) -> List[str]:
+        """写出折叠栈文件（根节点为样本类别，可直接用于 flamegraph.pl 或 speedscope）和热点表"""
+        categories = Counter()
+        self_counts, total_counts = Counter(), Counter()
+        collapsed = []
+        for codes, count in self.stacks.items():
+            category = self._category(codes)
+            categories[category] += count
+            labels = [_frame_label(code) for code in codes]
+            collapsed.append(f"[{category}];{';'.join(labels)} {count}")
+            if category != CPU:
+                continue
+            self_counts[labels[-1]] += count
+            for label in set(labels):
+                total_counts[label] += count
+
+        total = sum(categories.values()) or 1
+        cpu = categories[CPU] or 1
+        lines = [
+            f'模式: sampling，采样间隔 {self.interval * 1000:.0f}ms，墙钟时间 {self.seconds:.2f}s，'
+            f'线程样本 {sum(categories.values())} 个',
+            '线程样本分布: ' + '，'.join(
+                f'{category} {categories[category]} ({categories[category] / total:.1%})'
+                for category in (CPU, NETWORK, IDLE)
+            ),
+            '',
+            f'计算样本热点（前 {TOP_N}，按自身样本数排序）:',
+            f"{'self':>8} {'self%':>7} {'total':>8} {'total%':>7}  function",
+        ]
+        for label, count in self_counts.most_common(TOP_N):
+            lines.append(
+                f'{count:>8} {count / cpu:>7.1%} {total_counts[label]:>8} {total_counts[label] / cpu:>7.1%}  {label}'
+            )
+
+        os.makedirs(output_dir, exist_ok=True)
+        stacks_file = os.path.join(output_dir, 'stacks.collapsed')
+        with open(stacks_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(sorted(collapsed)) + '\n')
+        hotspots_file = os.path.join(output_dir, 'hotspots.txt')
+        with open(hotspots_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        return [stacks_file, hotspots_file]
+
+
+class DeterministicProfiler:
+    """
+    确定性剖析器
+
+    主线程和剖析期间新建的线程各使用一个 cProfile 剖析器，结束后合并；阻塞在网络 IO
+    或锁上的函数计为等待时间，不进入热点表。每次函数调用都有固定开销，适合定位调用次数多的小函数。
+    """
+
+    def __init__(self):
+        self.seconds = 0.0
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._start = 0.0
+
+    def start(self) -> None:
+        self._start = time.perf_counter()
+        threading.setprofile(self._enable_in_thread)
+        self._enable_in_thread()
+
+    def _enable_in_thread(self, *args) -> None:
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def stop(self) -> None:
+        threading.setprofile(None)
+        self._profiles[0].disable()
+        self.seconds = time.perf_counter() - self._start
+
+    def write(self, output_dir: str) -> List[str]:
+        """写出合并后的 pstats 文件（可用 snakeviz、gprof2dot 等工具查看）和热点表"""
+        with self._lock:
+            profiles = list(self._profiles)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+
+        waits: Dict[str, float] = {NETWORK: 0.0, IDLE: 0.0}
+        rows = []
+        for (filename, line, name), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+            category = classify(filename, name)
+            if category is not None:
+                waits[category] += tottime
+                continue
+            label = name if filename == '~' else f'{name} ({short_path(filename)}:{line})'
+            rows.append((tottime, ncalls, cumtime, label))
+        rows.sort(key=lambda row: -row[0])
+
+        lines = [
+            f'模式: deterministic，墙钟时间 {self.seconds:.2f}s，剖析线程 {len(profiles)} 个',
+            f'等待时间（线程累计）: network {waits[NETWORK]:.2f}s，idle {waits[IDLE]:.2f}s',
+            '',
+            f'计算热点（前 {TOP_N}，按自身耗时排序，不含等待）:',
+            f"{'tottime':>9} {'ncalls':>9} {'cumtime':>9}  function",
+        ]
+        for tottime, ncalls, cumtime, label in rows[:TOP_N]:
+            lines.append(f'{tottime:>9.3f} {ncalls:>9} {cumtime:>9.3f}  {label}')
+
+        os.makedirs(output_dir, exist_ok=True)
+        stats_file = os.path.join(output_dir, 'profile.pstats')
+        stats.dump_stats(stats_file)
+        hotspots_file = os.path.join(output_dir, 'hotspots.txt')
+        with open(hotspots_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        return [stats_file, hotspots_file]
+
+
+def create_profiler(mode: Optional[str]) -> Optional[Any]:
+    """按模式创建剖析器，mode 为空时返回 None"""
+    if not mode:
+        return None
+    if mode not in PROFILE_MODES:
+        raise ValueError(f'未知的剖析模式: {mode}，可选值: {PROFILE_MODES}')
+    return SamplingProfiler() if mode == 'sampling' else DeterministicProfiler()
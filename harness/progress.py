@@ -0,0 +1,324 @@
+"""实时进度模块，汇总每个评测单元（模型 × benchmark）的进度、吞吐、错误率、当前得分和预计剩余时间，定期输出到终端，并以 Prometheus 文本格式在本机提供抓取接口。"""
+import sys
+import time
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from evalscope.utils.logger import get_logger
+
+logger = get_logger()
+
+RATE_WINDOW = 60.0
+PROGRESS_INTERVAL = 10.0
+METRICS_PREFIX = 'atom_eval'
+
+PENDING, RUNNING, OK, FAILED, SKIPPED = 'pending', 'running', 'ok', 'failed', 'skipped'
+
+
+class CellProgress:
+    """
+    单个评测单元的进度
+
+    吞吐（req/s、tokens/s）在运行中按最近 RATE_WINDOW 秒的请求计算，能及时反映端点限流；
+    结束后按整个运行时间平均。预计剩余时间按已完成样本的平均速度估算。
+    """
+
+    def __init__(self, model: str, benchmark: str):
+        self.model = model
+        self.benchmark = benchmark
+        self.status = PENDING
+        self.total = 0
+        self.scored = 0
+        self.reused = 0
+        self.requests = 0
+        self.errors = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.score_sum = 0.0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._recent: deque = deque()
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            self.status = RUNNING
+            self.started = self.started or time.time()
+            self.finished = None
+
+    def finish(self, status: str) -> None:
+        with self._lock:
+            self.status = status
+            if self.started is not None:
+                self.finished = time.time()
+
+    def add_total(self, count: int) -> None:
+        with self._lock:
+            self.total += count
+
+    def add_reused(self, count: int) -> None:
+        """增量评测中复用上次结果的样本，计入已完成但不参与速度估算"""
+        with self._lock:
+            self.reused += count
+
+    def record_request(self, output: Any = None, failed: bool = False) -> None:
+        """记录一次模型调用；output 为 ModelOutput，调用抛出异常或输出带有 error 时计为错误"""
+        usage = getattr(output, 'usage', None)
+        input_tokens = getattr(usage, 'input_tokens', 0) or 0
+        output_tokens = getattr(usage, 'output_tokens', 0) or 0
+        now = time.time()
+        with self._lock:
+            self.requests += 1
+            if failed or getattr(output, 'error', None):
+                self.errors += 1
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            self._recent.append((now, output_tokens))
+            self._trim(now)
+
+    def record_score(self, sample_score: Any) -> None:
+        value = sample_score.score.main_value if sample_score is not None else None
+        with self._lock:
+            self.scored += 1
+            if isinstance(value, (int, float)):
+                self.score_sum += float(value)
+
+    def _trim(self, now: float) -> None:
+        while self._recent and self._recent[0][0] < now - RATE_WINDOW:
+            self._recent.popleft()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前进度和派生指标；无法计算的指标为 None"""
+        now = time.time()
+        with self._lock:
+            self._trim(now)
+            elapsed = ((self.finished or now) - self.started) if self.started else 0.0
+            if self.status == RUNNING and elapsed > 0:
+                window = min(RATE_WINDOW, elapsed)
+                requests_per_second = len(self._recent) / window
+                tokens_per_second = sum(tokens for _, tokens in self._recent) / window
+            else:
+                requests_per_second = self.requests / elapsed if elapsed > 0 else None
+                tokens_per_second = self.output_tokens / elapsed if elapsed > 0 else None
+            done = self.scored + self.reused
+            eta = None
+            if self.status == RUNNING and self.scored and self.total >= done:
+                eta = (self.total - done) * elapsed / self.scored
+            return {
+                'model': self.model,
+                'benchmark': self.benchmark,
+                'status': self.status,
+                'total': self.total,
+                'done': done,
+                'requests': self.requests,
+                'errors': self.errors,
+                'input_tokens': self.input_tokens,
+                'output_tokens': self.output_tokens,
+                'elapsed': elapsed,
+                'requests_per_second': requests_per_second,
+                'tokens_per_second': tokens_per_second,
+                'error_rate': self.errors / self.requests if self.requests else None,
+                'score': self.score_sum / self.scored if self.scored else None,
+                'eta': eta,
+            }
+
+
+class ProgressBoard:
+    """进程内所有评测单元的进度，按（模型，benchmark）登记，保持登记顺序"""
+
+    def __init__(self):
+        self._cells: Dict[Tuple[str, str], CellProgress] = {}
+        self._lock = threading.Lock()
+
+    def cell(self, model: str, benchmark: str) -> CellProgress:
+        with self._lock:
+            key = (model, benchmark)
+            if key not in self._cells:
+                self._cells[key] = CellProgress(model, benchmark)
+            return self._cells[key]
+
+    def reset(self, model: str, benchmark: str) -> CellProgress:
+        """重新开始统计某个单元（常驻服务中同一组合再次评测时使用）"""
+        with self._lock:
+            self._cells[(model, benchmark)] = CellProgress(model, benchmark)
+            return self._cells[(model, benchmark)]
+
+    def snapshots(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            cells = list(self._cells.values())
+        return [cell.snapshot() for cell in cells]
+
+    def render_table(self) -> str:
+        """终端状态表"""
+        rows = [('模型', 'benchmark', '状态', '进度', 'req/s', 'tok/s', '错误率', '得分', 'ETA')]
+        for item in self.snapshots():
+            progress = f"{item['done']}/{item['total']}"
+            if item['total']:
+                progress += f" ({item['done'] / item['total']:.0%})"
+            rows.append((
+                item['model'],
+                item['benchmark'],
+                item['status'],
+                progress,
+                _format(item['requests_per_second'], '.2f'),
+                _format(item['tokens_per_second'], '.1f'),
+                _format(item['error_rate'], '.1%'),
+                _format(item['score'], '.4f'),
+                _format_duration(item['eta']),
+            ))
+        widths = [max(_display_width(row[i]) for row in rows) for i in range(len(rows[0]))]
+        lines = ['  '.join(_pad(value, widths[i]) for i, value in enumerate(row)).rstrip() for row in rows]
+        lines.insert(1, '  '.join('-' * width for width in widths))
+        return '\n'.join(lines)
+
+    def render_prometheus(self) -> str:
+        """Prometheus 文本格式（0.0.4）的指标"""
+        snapshots = self.snapshots()
+        metrics = [
+            ('samples_total', 'gauge', 'Samples to evaluate in the cell', 'total'),
+            ('samples_done', 'gauge', 'Samples scored or reused in the cell', 'done'),
+            ('requests_total', 'counter', 'Model requests sent', 'requests'),
+            ('request_errors_total', 'counter', 'Model requests that failed', 'errors'),
+            ('input_tokens_total', 'counter', 'Prompt tokens reported by the endpoint', 'input_tokens'),
+            ('output_tokens_total', 'counter', 'Completion tokens reported by the endpoint', 'output_tokens'),
+            ('requests_per_second', 'gauge', f'Requests per second over the last {RATE_WINDOW:.0f}s',
+             'requests_per_second'),
+            ('output_tokens_per_second', 'gauge', f'Completion tokens per second over the last {RATE_WINDOW:.0f}s',
+             'tokens_per_second'),
+            ('error_rate', 'gauge', 'Fraction of failed requests', 'error_rate'),
+            ('running_score', 'gauge', 'Mean main metric of the samples scored so far', 'score'),
+            ('eta_seconds', 'gauge', 'Estimated seconds until the cell finishes', 'eta'),
+            ('elapsed_seconds', 'gauge', 'Seconds since the cell started', 'elapsed'),
+        ]
+        lines = []
+        for name, kind, description, field in metrics:
+            lines += [f'# HELP {METRICS_PREFIX}_{name} {description}', f'# TYPE {METRICS_PREFIX}_{name} {kind}']
+            for item in snapshots:
+                if item[field] is not None:
+                    lines.append(f'{METRICS_PREFIX}_{name}{{{_labels(item)}}} {item[field]:g}')
+        lines += [
+            f'# HELP {METRICS_PREFIX}_cell_info Cell status (pending, running, ok, failed, skipped)',
+            f'# TYPE {METRICS_PREFIX}_cell_info gauge',
+        ]
+        for item in snapshots:
+            lines.append(f'{METRICS_PREFIX}_cell_info{{{_labels(item)},status="{item["status"]}"}} 1')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(item: Dict[str, Any]) -> str:
+    return f'model="{_escape(item["model"])}",benchmark="{_escape(item["benchmark"])}"'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format(value: Optional[float], spec: str) -> str:
+    return '-' if value is None else format(value, spec)
+
+
+def _format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return '-'
+    seconds = int(seconds)
+    return f'{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}'
+
+
+def _display_width(text: str) -> int:
+    return sum(2 if ord(char) > 0x2e80 else 1 for char in text)
+
+
+def _pad(text: str, width: int) -> str:
+    return text + ' ' * (width - _display_width(text))
+
+
+# 进程内共享的进度表，评测器和 Analyzer 的评测矩阵都向其中登记
+BOARD = ProgressBoard()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = BOARD.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LiveProgress:
+    """
+    实时进度输出
+
+    interval 大于 0 时后台线程每隔 interval 秒将状态表输出到终端（标准错误），结束时再输出一次；
+    指定 metrics_port 时在 127.0.0.1 上提供 /metrics 接口（端口为 0 时自动选择）。
+    嵌套使用时只有最外层生效，Analyzer 为整个评测矩阵开启后，各评测单元内不会重复开启。
+
+    Args:
+        interval: 终端输出间隔（秒），0 或 None 表示不输出到终端
+        metrics_port: Prometheus 接口端口，None 表示不提供接口
+    """
+
+    _active = 0
+    _active_lock = threading.Lock()
+
+    def __init__(self, interval: Optional[float] = PROGRESS_INTERVAL, metrics_port: Optional[int] = None):
+        self.interval = interval
+        self.metrics_port = metrics_port
+        self._owner = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def __enter__(self) -> 'LiveProgress':
+        with LiveProgress._active_lock:
+            self._owner = LiveProgress._active == 0
+            LiveProgress._active += 1
+        if not self._owner:
+            return self
+        if self.metrics_port is not None:
+            try:
+                self._server = ThreadingHTTPServer(('127.0.0.1', self.metrics_port), _MetricsHandler)
+            except Exception:
+                # 端口被占用等启动失败时回退计数，否则之后的 LiveProgress 都会被当作嵌套使用而不生效
+                with LiveProgress._active_lock:
+                    LiveProgress._active -= 1
+                self._owner = False
+                raise
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, name='harness-metrics', daemon=True).start()
+            logger.info(f'评测指标接口: http://127.0.0.1:{self._server.server_address[1]}/metrics')
+        if self.interval:
+            self._thread = threading.Thread(target=self._run, name='harness-progress', daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        with LiveProgress._active_lock:
+            LiveProgress._active -= 1
+        if not self._owner:
+            return
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._render()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._render()
+
+    def _render(self) -> None:
+        sys.stderr.write(f"\n[评测进度 {time.strftime('%H:%M:%S')}]\n{BOARD.render_table()}\n\n")
+        sys.stderr.flush()
@@ -0,0 +1,130 @@
+"""
+离线重新评分模块，从已有的预测结果重新执行答案提取、评分和聚合，不调用模型。
+
+进程池使用 forkserver（不支持时为 spawn）启动子进程，不 fork 评测进程，避免复制剖析、内存监控、
+进度和对冲等后台线程持有的锁。子进程按 benchmark 名称和任务配置重新构造 adapter，只有样本评分
+返回主进程：子进程中 adapter 的缓存和状态（如 prepare_reviews 的批量结果、参考答案解析缓存）
+不会带回，也不会记录阶段追踪、实时进度和内存统计。
+"""
+import os
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from evalscope.api.dataset import Dataset
+from evalscope.api.evaluator import TaskState
+from evalscope.api.evaluator.cache import ModelResult
+from evalscope.api.model import ModelOutput
+from evalscope.api.metric import SampleScore
+from evalscope.api.registry import get_benchmark
+from evalscope.utils.io_utils import jsonl_to_list
+from evalscope.utils.logger import get_logger
+
+logger = get_logger()
+
+# 样本数少于该值时在当前进程中评分，子进程启动（重新导入 EvalScope）的耗时超过并行节省的时间
+MIN_PARALLEL_SAMPLES = 5000
+
+# 评分使用的 adapter：当前进程评分时为评测器的 adapter，子进程中为重新构造的 adapter
+_BENCHMARK = None
+_IGNORE_ERRORS = False
+
+
+def default_num_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def load_prediction_states(prediction_file: str, dataset: Dataset) -> Tuple[List[TaskState], int]:
+    """
+    从预测文件恢复任务状态
+
+    按样本 id 而不是位置匹配数据集中的样本；预测文件可能包含多次运行追加的结果，
+    同一样本只保留最后一条。
+
+    Args:
+        prediction_file: predictions 目录下的 jsonl 文件
+        dataset: 当前 subset 的数据集
+
+    Returns:
+        (按样本 id 排序的任务状态, 没有预测结果的样本数)
+    """
+    samples = {sample.id: sample for sample in dataset}
+    states: Dict[Any, TaskState] = {}
+    if os.path.exists(prediction_file):
+        for item in jsonl_to_list(prediction_file):
+            result = ModelResult.model_validate(item)
+            sample = samples.get(result.index)
+            if sample is None:
+                continue
+            if result.metadata:
+                sample.metadata.update(result.metadata)
+            states[sample.id] = TaskState(
+                model=result.model,
+                sample=sample,
+                messages=result.messages,
+                output=ModelOutput.model_validate(result.model_output),
+                completed=True,
+            )
+    missing = len(samples) - len(states)
+    return [states[sample_id] for sample_id in sorted(states)], missing
+
+
+def _start_method() -> str:
+    methods = multiprocessing.get_all_start_methods()
+    return 'forkserver' if 'forkserver' in methods else 'spawn'
+
+
+def _init_worker(benchmark_name: str, task_config: Any, ignore_errors: bool) -> None:
+    """子进程初始化：注册自定义 benchmark 并重新构造 adapter"""
+    global _BENCHMARK, _IGNORE_ERRORS
+
+    import benchmarks  # noqa: F401  注册自定义 benchmark
+
+    _BENCHMARK, _IGNORE_ERRORS = get_benchmark(benchmark_name, task_config), ignore_errors
+
+
+def _calculate_metrics(task_state: TaskState) -> Optional[SampleScore]:
+    try:
+        return _BENCHMARK.calculate_metrics(task_state=task_state)
+    except Exception as exc:
+        if not _IGNORE_ERRORS:
+            raise
+        tb_str = traceback.format_exc()
+        logger.error(f'Error when review sample {task_state.sample_id}: due to {exc}\nTraceback:\n{tb_str}')
+        return None
+
+
+def rescore_task_states(benchmark: Any, task_states: List[TaskState], num_workers: int,
+                        ignore_errors: bool = False, task_config: Any = None) -> List[Optional[SampleScore]]:
+    """
+    使用进程池对预测结果重新评分
+
+    Args:
+        benchmark: benchmark adapter
+        task_states: 从预测文件恢复的任务状态
+        num_workers: 进程数，为 1 或未提供 task_config 时在当前进程中顺序评分
+        ignore_errors: 评分出错时记录日志并返回 None，而不是中断
+        task_config: 任务配置，子进程用于重新构造 adapter
+
+    Returns:
+        与 task_states 一一对应的样本评分
+    """
+    global _BENCHMARK, _IGNORE_ERRORS
+
+    if num_workers <= 1 or len(task_states) <= 1 or task_config is None:
+        _BENCHMARK, _IGNORE_ERRORS = benchmark, ignore_errors
+        try:
+            return [_calculate_metrics(task_state) for task_state in task_states]
+        finally:
+            _BENCHMARK, _IGNORE_ERRORS = None, False
+
+    chunksize = max(1, len(task_states) // (num_workers * 4))
+    context = multiprocessing.get_context(_start_method())
+    with ProcessPoolExecutor(
+        max_workers=num_workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(benchmark.name, task_config, ignore_errors),
+    ) as executor:
+        return list(executor.map(_calculate_metrics, task_states, chunksize=chunksize))
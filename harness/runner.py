@@ -0,0 +1,120 @@
+"""评测任务入口，替代 evalscope.run.run_task，使用 HarnessEvaluator 执行评测。"""
+import os
+import gc
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Any, Dict, List, MutableMapping, Optional, Tuple
+
+from evalscope.api.model.lazy_model import LazyModel
+from evalscope.api.registry import get_benchmark
+from evalscope.config import TaskConfig, parse_task_config
+from evalscope.constants import DataCollection
+from evalscope.report import gen_table
+from evalscope.run import setup_work_directory
+from evalscope.utils.io_utils import OutputsStructure
+from evalscope.utils.logger import configure_logging, get_logger
+from evalscope.utils.model_utils import seed_everything
+
+from harness.evaluator import HarnessEvaluator
+from harness.profiling import PROFILE_DIR, create_profiler
+from harness.progress import LiveProgress
+
+logger = get_logger()
+
+
+def build_evaluators(
+    task_config: Dict[str, Any],
+    dataset_cache: Optional[MutableMapping[str, Any]] = None,
+) -> Tuple[TaskConfig, OutputsStructure, List[HarnessEvaluator]]:
+    """
+    解析任务配置并为每个 benchmark 创建评测器
+
+    Args:
+        task_config: utils.get_task_config 生成的配置字典，其中 harness 字段为扩展功能配置，
+            其余字段与 EvalScope 的 TaskConfig 一致
+        dataset_cache: 跨任务共享的已加载数据集（常驻服务使用），为 None 时每次重新加载
+
+    Returns:
+        (TaskConfig, 输出目录结构, 评测器列表)
+    """
+    task_config = dict(task_config)
+    harness_config = task_config.pop('harness', None) or {}
+    task_cfg = parse_task_config(task_config)
+
+    run_time = datetime.now().strftime('%Y%m%d_%H%M%S')
+    if task_cfg.seed is not None:
+        seed_everything(task_cfg.seed)
+    outputs = setup_work_directory(task_cfg, run_time)
+    configure_logging(task_cfg.debug, os.path.join(outputs.logs_dir, 'eval_log.log'))
+    logger.info('Running with harness evaluator')
+
+    model = LazyModel(task_config=task_cfg)
+    evaluators: List[HarnessEvaluator] = []
+    for dataset_name in task_cfg.datasets:
+        benchmark = get_benchmark(dataset_name, task_cfg)
+        evaluator = HarnessEvaluator(
+            task_config=task_cfg,
+            model=model,
+            benchmark=benchmark,
+            outputs=outputs,
+            harness_config=harness_config,
+            dataset_cache=dataset_cache,
+        )
+        evaluators.append(evaluator)
+        if dataset_name != DataCollection.NAME:
+            task_cfg.dataset_args[dataset_name] = benchmark.to_dict()
+
+    task_cfg.dump_yaml(outputs.configs_dir)
+    logger.info(task_cfg)
+    return task_cfg, outputs, evaluators
+
+
+def run_task(task_config: Dict[str, Any], dataset_cache: Optional[MutableMapping[str, Any]] = None) -> Dict[str, Any]:
+    """
+    执行评测任务
+
+    Args:
+        task_config: utils.get_task_config 生成的配置字典
+        dataset_cache: 跨任务共享的已加载数据集，见 build_evaluators
+
+    Returns:
+        各 benchmark 的评测报告，格式为 {benchmark_name: report}
+    """
+    harness_config = task_config.get('harness') or {}
+    profiler = create_profiler(harness_config.get('profile'))
+    if profiler is not None:
+        profiler.start()
+    outputs = None
+    try:
+        task_cfg, outputs, evaluators = build_evaluators(task_config, dataset_cache)
+        eval_results = {}
+        with _live_progress(harness_config):
+            for evaluator in evaluators:
+                eval_results[evaluator.benchmark.name] = evaluator.eval()
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            if outputs is not None:
+                paths = profiler.write(os.path.join(outputs.outputs_dir, PROFILE_DIR))
+                logger.info(f'性能剖析结果已写入: {", ".join(paths)}')
+
+    try:
+        report_table = gen_table(reports_path_list=[outputs.reports_dir], add_overall_metric=True)
+        logger.info(f'Overall report table: \n{report_table} \n')
+    except Exception:
+        logger.error('Failed to generate report table.')
+
+    logger.info(f'Finished evaluation for {task_cfg.model_id} on {task_cfg.datasets}')
+    logger.info(f'Output directory: {outputs.outputs_dir}')
+
+    del evaluators
+    gc.collect()
+    return eval_results
+
+
+def _live_progress(harness_config: Dict[str, Any]):
+    """按 harness 配置开启实时进度输出，未开启时返回空的上下文"""
+    interval, port = harness_config.get('progress_interval'), harness_config.get('metrics_port')
+    if not interval and port is None:
+        return nullcontext()
+    return LiveProgress(interval, port)
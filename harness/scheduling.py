@@ -0,0 +1,132 @@
+"""长度感知调度模块，按估算的 token 量决定样本的发送顺序，并记录推理时间线用于分析长尾耗时。"""
+import os
+import json
+import heapq
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from evalscope.api.dataset import Sample
+
+from harness.tokens import estimate_tokens
+
+SCHEDULES = ('fifo', 'longest_first')
+TIMELINE_DIR = 'timeline'
+
+def sample_text(sample: Sample) -> str:
+    """渲染后的输入文本（包括工具定义）"""
+    if isinstance(sample.input, str):
+        text = sample.input
+    else:
+        text = '\n'.join(message.text for message in sample.input)
+    if sample.tools:
+        text += json.dumps([tool.model_dump(exclude_none=True) for tool in sample.tools], ensure_ascii=False)
+    return text
+
+
+def estimate_cost(sample: Sample, max_tokens: Optional[int]) -> int:
+    """
+    估算单个样本的 token 量
+
+    输出长度在发送前未知，按生成上限 max_tokens 计入；同一 subset 内各样本的输出上限相同，
+    排序主要由输入长度决定。
+    """
+    return estimate_tokens(sample_text(sample)) + (max_tokens or 0)
+
+
+def order_samples(samples: Sequence[Sample], schedule: Optional[str], max_tokens: Optional[int]) -> List[Sample]:
+    """
+    按调度策略排列样本的发送顺序
+
+    Args:
+        samples: 原始顺序的样本
+        schedule: fifo 保持原始顺序；longest_first 按估算的 token 量从大到小发送，
+            线程池中每个空闲的并发槽位总是领取剩余样本中最大的一个（LPT 装箱），
+            避免长样本最后才发送、拖长整个 subset 的完成时间
+        max_tokens: 生成上限
+
+    Returns:
+        发送顺序的样本列表，token 量相同的样本保持原始顺序
+    """
+    samples = list(samples)
+    if schedule != 'longest_first':
+        return samples
+    costs = [estimate_cost(sample, max_tokens) for sample in samples]
+    order = sorted(range(len(samples)), key=lambda i: (-costs[i], i))
+    return [samples[i] for i in order]
+
+
+def simulate_makespan(durations: Sequence[float], workers: int) -> float:
+    """按给定的发送顺序模拟线程池执行，返回全部完成的时间"""
+    slots = [0.0] * max(1, min(workers, len(durations)))
+    for duration in durations:
+        heapq.heapreplace(slots, slots[0] + duration)
+    return max(slots) if durations else 0.0
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+class Timeline:
+    """
+    推理时间线
+
+    记录每个样本的估算 token 量、所在线程以及开始和结束时间（相对 subset 开始的秒数）
+    """
+
+    def __init__(self, schedule: str, workers: int, max_tokens: Optional[int]):
+        self.schedule = schedule
+        self.workers = workers
+        self.max_tokens = max_tokens
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._slots: Dict[int, int] = {}
+
+    def record(self, sample: Sample, start: float, end: float) -> None:
+        thread_id = threading.get_ident()
+        with self._lock:
+            slot = self._slots.setdefault(thread_id, len(self._slots))
+            self.events.append({
+                'sample_id': sample.id,
+                'tokens': estimate_cost(sample, self.max_tokens),
+                'slot': slot,
+                'start': round(start - self._start, 4),
+                'end': round(end - self._start, 4),
+            })
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        时间线统计
+
+        tail_seconds 为 90% 的样本完成后到最后一个样本完成的时间；fifo_makespan 和 longest_first_makespan
+        使用实测的单样本耗时分别按原始顺序和按 token 量从大到小的顺序模拟完成时间，用于比较两种调度的长尾
+        """
+        if not self.events:
+            return {'schedule': self.schedule, 'samples': 0}
+        events = sorted(self.events, key=lambda event: event['end'])
+        makespan = events[-1]['end'] - min(event['start'] for event in events)
+        latencies = [event['end'] - event['start'] for event in events]
+        by_id = sorted(self.events, key=lambda event: event['sample_id'])
+        fifo_durations = [event['end'] - event['start'] for event in by_id]
+        lpt_durations = [event['end'] - event['start'] for event in sorted(by_id, key=lambda event: -event['tokens'])]
+        return {
+            'schedule': self.schedule,
+            'samples': len(events),
+            'workers': self.workers,
+            'makespan': round(makespan, 3),
+            'tail_seconds': round(events[-1]['end'] - events[int(0.9 * (len(events) - 1))]['end'], 3),
+            'latency_p50': round(_percentile(latencies, 0.5), 3),
+            'latency_p95': round(_percentile(latencies, 0.95), 3),
+            'latency_max': round(max(latencies), 3),
+            'fifo_makespan': round(simulate_makespan(fifo_durations, self.workers), 3),
+            'longest_first_makespan': round(simulate_makespan(lpt_durations, self.workers), 3),
+        }
+
+    def write(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'summary': self.summary(), 'events': sorted(self.events, key=lambda e: e['start'])},
+                      f, ensure_ascii=False, indent=2)
@@ -0,0 +1,336 @@
+"""语义相似度模块，在本地 CPU 上计算答案与参考答案的向量余弦相似度，介于精确匹配和 LLM judge 之间；向量按文本哈希持久化缓存，参考答案在所有模型和所有运行之间只编码一次。"""
+import os
+import re
+import zlib
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from evalscope.api.evaluator import TaskState
+from evalscope.api.metric import Metric, Score
+from evalscope.api.registry import register_metric
+from evalscope.utils.logger import get_logger
+
+logger = get_logger()
+
+DEFAULT_EMBEDDER = 'hashing'
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'embeddings.sqlite')
+DEFAULT_BATCH_SIZE = 64
+
+_PUNCT_PATTERN = re.compile(r'[\s\W_]+', re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    """NFKC 归一化、转小写并去掉空白和标点"""
+    return _PUNCT_PATTERN.sub('', unicodedata.normalize('NFKC', text).lower())
+
+
+class HashingEmbedder:
+    """
+    不依赖模型的字符 n-gram 哈希向量
+
+    归一化后的文本按字符 1~3 gram 切分，使用 crc32 哈希到固定维度（带符号，减少冲突的影响），
+    按 1 + log(tf) 加权后做 L2 归一化；中文按字、英文按字母片段匹配，能识别词序变化和部分改写。
+
+    Args:
+        dim: 向量维度
+        ngram_range: 字符 n-gram 的最小和最大长度
+    """
+
+    def __init__(self, dim: int = 1024, ngram_range=(1, 3)):
+        self.dim = dim
+        self.ngram_range = tuple(ngram_range)
+        self.name = f'hashing-{dim}-{self.ngram_range[0]}-{self.ngram_range[1]}'
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            text = normalize_text(text)
+            counts: Dict[int, float] = {}
+            for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+                for i in range(len(text) - n + 1):
+                    bucket = zlib.crc32(text[i:i + n].encode('utf-8'))
+                    index = bucket % self.dim
+                    sign = 1.0 if (bucket >> 31) & 1 else -1.0
+                    counts[index] = counts.get(index, 0.0) + sign
+            for index, count in counts.items():
+                vectors[row, index] = np.sign(count) * (1 + np.log(abs(count))) if count else 0.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+class SentenceTransformerEmbedder:
+    """
+    sentence-transformers 模型（在 CPU 上批量编码）
+
+    Args:
+        model_name_or_path: 模型名称或本地路径
+        batch_size: 编码批大小
+    """
+
+    def __init__(self, model_name_or_path: str, batch_size: int = DEFAULT_BATCH_SIZE):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name_or_path, device='cpu')
+        self.batch_size = batch_size
+        self.name = f'st-{model_name_or_path}'
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self.model.encode(
+            list(texts), batch_size=self.batch_size, normalize_embeddings=True, show_progress_bar=False
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def build_embedder(spec: Optional[str] = None):
+    """
+    按名称创建向量模型
+
+    Args:
+        spec: hashing 使用字符 n-gram 哈希向量，其余值作为 sentence-transformers 模型名称或本地路径；
+            sentence-transformers 未安装或模型加载失败时回退到 hashing
+
+    Returns:
+        具有 name 属性和 embed(texts) 方法的向量模型
+    """
+    if not spec or spec == DEFAULT_EMBEDDER:
+        return HashingEmbedder()
+    try:
+        return SentenceTransformerEmbedder(spec)
+    except Exception as e:
+        logger.warning(f'无法加载向量模型 {spec}: {e}，回退到 {DEFAULT_EMBEDDER}')
+        return HashingEmbedder()
+
+
+class EmbeddingCache:
+    """
+    文本向量的持久化缓存（SQLite）
+
+    键为 sha1(向量模型名称 + 文本)，不同向量模型的结果互不干扰；多个线程可以共享同一个缓存。
+
+    Args:
+        path: 缓存文件路径，为 None 时只在内存中缓存
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH):
+        self.path = path
+        self._memory: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """SQLite 连接不能跨进程使用，fork 出的子进程（如重新评分的进程池）重新打开连接"""
+        if not self.path:
+            return None
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._conn.execute('CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)')
+            self._conn.commit()
+            self._pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def key(model_name: str, text: str) -> str:
+        return hashlib.sha1(f'{model_name}\n{text}'.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        found = {key: self._memory[key] for key in keys if key in self._memory}
+        missing = [key for key in keys if key not in found]
+        if missing and self.path:
+            with self._lock:
+                conn = self._connection()
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    rows = conn.execute(
+                        f'SELECT key, vector FROM embeddings WHERE key IN ({",".join("?" * len(chunk))})', chunk
+                    ).fetchall()
+                    for key, blob in rows:
+                        found[key] = self._memory[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        if not items:
+            return
+        with self._lock:
+            self._memory.update(items)
+            conn = self._connection()
+            if conn is not None:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)',
+                    [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()],
+                )
+                conn.commit()
+
+
+class SemanticScorer:
+    """
+    批量计算语义相似度
+
+    Args:
+        embedder: 向量模型
+        cache: 向量缓存
+        batch_size: 每次送入向量模型的文本数
+    """
+
+    def __init__(self, embedder, cache: EmbeddingCache, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.embedder = embedder
+        self.cache = cache
+        self.batch_size = batch_size
+        self.stats = {'texts': 0, 'cache_hits': 0, 'embedded': 0}
+        self._lock = threading.Lock()
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """返回文本的 L2 归一化向量，缓存中没有的文本去重后分批编码"""
+        keys = [EmbeddingCache.key(self.embedder.name, text) for text in texts]
+        vectors = self.cache.get_many(list(dict.fromkeys(keys)))
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                pending.setdefault(key, text)
+        pending_keys = list(pending)
+        for start in range(0, len(pending_keys), self.batch_size):
+            batch = pending_keys[start:start + self.batch_size]
+            embedded = self.embedder.embed([pending[key] for key in batch])
+            new_vectors = dict(zip(batch, embedded))
+            self.cache.put_many(new_vectors)
+            vectors.update(new_vectors)
+        with self._lock:
+            self.stats['texts'] += len(texts)
+            self.stats['embedded'] += len(pending)
+            self.stats['cache_hits'] += len(texts) - sum(1 for key in keys if key in pending)
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([vectors[key] for key in keys])
+
+    def similarities(self, predictions: Sequence[str], references: Sequence[str]) -> List[float]:
+        """逐对计算余弦相似度，负值截断为 0；任一侧为空文本时为 0"""
+        if not predictions:
+            return []
+        pred_vectors = self.embed(predictions)
+        ref_vectors = self.embed(references)
+        scores = np.clip(np.einsum('ij,ij->i', pred_vectors, ref_vectors), 0.0, 1.0)
+        return [
+            float(score) if prediction.strip() and reference.strip() else 0.0
+            for score, prediction, reference in zip(scores, predictions, references)
+        ]
+
+
+# 进程内共享的评分器，按向量模型名称和缓存路径区分，多个 benchmark 和评测任务共用已加载的模型
+_SCORERS: Dict[tuple, SemanticScorer] = {}
+_SCORERS_LOCK = threading.Lock()
+
+
+def get_semantic_scorer(embedder: Optional[str] = None, cache_path: Optional[str] = DEFAULT_CACHE_PATH) -> SemanticScorer:
+    """
+    获取语义相似度评分器
+
+    Args:
+        embedder: 向量模型，见 build_embedder
+        cache_path: 向量缓存路径，为 None 时只在内存中缓存
+
+    Returns:
+        进程内共享的评分器
+    """
+    key = (embedder or DEFAULT_EMBEDDER, cache_path)
+    with _SCORERS_LOCK:
+        if key not in _SCORERS:
+            _SCORERS[key] = SemanticScorer(build_embedder(embedder), EmbeddingCache(cache_path))
+        return _SCORERS[key]
+
+
+@register_metric(name='semantic_sim')
+class SemanticSimilarity(Metric):
+    """
+    语义相似度指标，可在 metric_list 中以 semantic_sim 引用
+
+    Args:
+        embedder: 向量模型，见 build_embedder
+        cache_path: 向量缓存路径
+    """
+
+    def __init__(self, embedder: Optional[str] = None, cache_path: Optional[str] = DEFAULT_CACHE_PATH):
+        self.scorer = get_semantic_scorer(embedder, cache_path)
+
+    def apply(self, predictions: List[str], references: List[str]) -> List[float]:
+        return self.scorer.similarities(predictions, references)
+
+
+def prefetch_references(scorer: SemanticScorer, datasets) -> None:
+    """数据集加载后一次性批量编码所有参考答案（已缓存的直接读取）"""
+    targets = [
+        sample.target for dataset in datasets.datasets.values() for sample in dataset
+        if isinstance(sample.target, str) and sample.target
+    ]
+    if targets:
+        scorer.embed(targets)
+        logger.info(f'已准备 {len(targets)} 条参考答案的向量，缓存统计: {scorer.stats}')
+
+
+# adapter 的 extra_params 中开启语义相似度的参数，与 SemanticSimilarityMixin 配合使用
+SEMANTIC_EXTRA_PARAMS: Dict[str, Dict[str, Any]] = {
+    'semantic_similarity': {
+        'type': 'bool',
+        'description': 'Also report semantic_sim, the embedding cosine similarity to the reference.',
+        'value': False
+    },
+    'semantic_embedder': {
+        'type': 'str',
+        'description': 'Embedder for semantic_sim: hashing, or a sentence-transformers model name / path.',
+        'value': 'hashing'
+    },
+}
+
+
+class SemanticSimilarityMixin:
+    """
+    为 adapter 增加 semantic_sim 指标，extra_params 中需包含 SEMANTIC_EXTRA_PARAMS
+
+    数据集加载后批量编码所有参考答案；评测器在评分前调用 prepare_reviews，批量编码整个 subset 的预测答案
+    并计算相似度，match_score 中通过 add_semantic_similarity 读取。没有预先计算的答案（如流式评测中
+    逐条评分的样本）单独计算。
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.semantic_scorer: Optional[SemanticScorer] = None
+        self._semantic_scores: Dict[Tuple[str, str], float] = {}
+        if self.extra_params.get('semantic_similarity'):
+            self.semantic_scorer = get_semantic_scorer(self.extra_params.get('semantic_embedder'))
+
+    def load_dataset(self):
+        dataset = super().load_dataset()
+        if self.semantic_scorer is not None:
+            prefetch_references(self.semantic_scorer, dataset)
+        return dataset
+
+    def review_pairs(self, task_states: List[TaskState]) -> List[Tuple[str, str]]:
+        """评分时使用的（提取后的预测答案，参考答案），去重后按首次出现的顺序排列；参考答案不是字符串的样本跳过"""
+        pairs = []
+        for task_state in task_states:
+            if isinstance(task_state.target, str):
+                prediction = task_state.output.completion if task_state.output is not None else ''
+                pairs.append((self.filter_prediction(prediction, task_state), task_state.target))
+        return list(dict.fromkeys(pairs))
+
+    def prepare_reviews(self, task_states: List[TaskState]) -> None:
+        """批量计算一个 subset 的语义相似度，由评测器在评分前调用"""
+        if self.semantic_scorer is None:
+            return
+        pairs = self.review_pairs(task_states)
+        if pairs:
+            predictions, references = zip(*pairs)
+            self._semantic_scores = dict(zip(pairs, self.semantic_scorer.similarities(predictions, references)))
+
+    def add_semantic_similarity(self, score: Score, prediction: str, reference: str) -> None:
+        if self.semantic_scorer is None:
+            return
+        similarity = self._semantic_scores.get((prediction, reference))
+        if similarity is None:
+            similarity = self.semantic_scorer.similarities([prediction], [reference])[0]
+        score.value['semantic_sim'] = similarity
@@ -0,0 +1,241 @@
+"""序贯评测模块，多模型对比时按随机批次评测样本，排名在给定置信度下确定后提前停止。"""
+import math
+import random
+import traceback
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Tuple
+
+from evalscope.api.dataset import Sample
+from evalscope.api.metric import SampleScore
+from evalscope.utils.logger import get_logger
+
+from harness.progress import FAILED, OK
+from harness.runner import build_evaluators
+
+logger = get_logger()
+
+
+def mean_ci(values: List[float], z: float) -> Tuple[float, float, float]:
+    """
+    计算均值及其正态近似置信区间
+
+    Args:
+        values: 样本得分
+        z: 正态分位数
+
+    Returns:
+        (均值, 区间下界, 区间上界)
+    """
+    n = len(values)
+    if n == 0:
+        return 0.0, 0.0, 0.0
+    mean = sum(values) / n
+    if n == 1:
+        return mean, -math.inf, math.inf
+    variance = sum((v - mean) ** 2 for v in values) / (n - 1)
+    half_width = z * math.sqrt(variance / n)
+    return mean, mean - half_width, mean + half_width
+
+
+class SequentialComparison:
+    """
+    单个 benchmark 上的多模型序贯对比
+
+    所有模型按同一随机顺序分批评测样本。每批结束后计算各模型主指标的置信区间，
+    并对排名相邻的模型做配对差值检验；相邻模型的差值区间都不包含 0（排名确定），
+    或所有模型的区间宽度都低于目标值时停止。多次检查和多组比较带来的误差
+    通过 Bonferroni 校正控制：实际使用的显著性水平为 alpha / (比较组数 × 最大检查次数)。
+    某个模型构建评测器、加载数据集、评测或生成报告时抛出异常，只将该模型移出对比（记录在 failures 中），
+    其余模型继续评测；所有模型都失败时抛出异常。
+    """
+
+    def __init__(
+        self,
+        benchmark_name: str,
+        model_configs: Dict[str, Dict[str, Any]],
+        batch_size: int = 50,
+        confidence: float = 0.95,
+        ci_width: Optional[float] = None,
+        min_samples: int = 100,
+        seed: int = 42,
+    ):
+        """
+        Args:
+            benchmark_name: benchmark 名称
+            model_configs: 模型名称到评测配置（utils.get_task_config 生成）的映射
+            batch_size: 每批评测的样本数
+            confidence: 排名确定所需的置信度
+            ci_width: 目标置信区间宽度，所有模型的区间宽度低于该值时停止
+            min_samples: 允许提前停止前至少评测的样本数
+            seed: 样本顺序的随机种子
+        """
+        self.benchmark_name = benchmark_name
+        self.batch_size = batch_size
+        self.confidence = confidence
+        self.ci_width = ci_width
+        self.min_samples = min_samples
+        self.seed = seed
+        self.model_names = list(model_configs)
+
+        self.evaluators = {}
+        # {model_name: {(subset, sample_id): score}}
+        self.scores: Dict[str, Dict[Tuple[str, int], float]] = {}
+        self.sample_scores: Dict[str, Dict[str, List[SampleScore]]] = {}
+        # {model_name: 错误信息}
+        self.failures: Dict[str, str] = {}
+        for model_name, task_config in model_configs.items():
+            try:
+                _, _, evaluators = build_evaluators(task_config)
+            except Exception as e:
+                self._drop(model_name, e)
+                continue
+            self.evaluators[model_name] = evaluators[0]
+            self.scores[model_name] = {}
+            self.sample_scores[model_name] = {}
+
+    def _drop(self, model_name: str, error: Exception) -> None:
+        """将失败的模型移出对比"""
+        logger.error(f'序贯评测[{self.benchmark_name}] 模型 {model_name} 失败，移出对比: {error}\n{traceback.format_exc()}')
+        self.failures[model_name] = f'{type(error).__name__}: {error}'
+        evaluator = self.evaluators.pop(model_name, None)
+        if evaluator is not None and evaluator.progress is not None:
+            evaluator.progress.finish(FAILED)
+        self.scores.pop(model_name, None)
+        self.sample_scores.pop(model_name, None)
+        if not self.evaluators and len(self.failures) == len(self.model_names):
+            raise RuntimeError(f'序贯评测[{self.benchmark_name}] 所有模型均失败: {self.failures}')
+
+    def _load_order(self) -> Tuple[Dict[str, Dict[str, Dict[int, Sample]]], List[Tuple[str, int]]]:
+        """加载各模型的数据集，并生成所有模型共用的随机样本顺序"""
+        datasets = {}
+        for model_name, evaluator in list(self.evaluators.items()):
+            try:
+                dataset_dict = evaluator.benchmark.load_dataset()
+            except Exception as e:
+                self._drop(model_name, e)
+                continue
+            datasets[model_name] = {
+                subset: {sample.id: sample for sample in dataset} for subset, dataset in dataset_dict.items()
+            }
+            if evaluator.progress is not None:
+                # 提前停止时实际评测的样本数少于总数
+                evaluator.progress.start()
+                evaluator.progress.add_total(sum(len(dataset) for dataset in dataset_dict.values()))
+        first = next(iter(datasets.values()))
+        order = [(subset, sample_id) for subset, samples in first.items() for sample_id in samples]
+        random.Random(self.seed).shuffle(order)
+        return datasets, order
+
+    def _evaluate_batch(self, model_name: str, samples: Dict[str, Dict[int, Sample]], batch: List[Tuple[str, int]]):
+        """评测单个模型的一批样本"""
+        evaluator = self.evaluators[model_name]
+        by_subset: Dict[str, List[Sample]] = {}
+        for subset, sample_id in batch:
+            by_subset.setdefault(subset, []).append(samples[subset][sample_id])
+
+        for subset, subset_samples in by_subset.items():
+            task_states = evaluator.get_answers(subset, subset_samples)
+            sample_scores = evaluator.review_samples(subset, task_states)
+            self.sample_scores[model_name].setdefault(subset, []).extend(sample_scores)
+            for sample_score in sample_scores:
+                self.scores[model_name][(subset, sample_score.sample_id)] = float(sample_score.score.main_value)
+
+    def _check(self, z: float) -> Tuple[Optional[str], Dict[str, Any]]:
+        """计算当前的置信区间和排名，返回 (停止原因, 当前状态)"""
+        intervals = {}
+        for model_name, scores in self.scores.items():
+            mean, low, high = mean_ci(list(scores.values()), z)
+            intervals[model_name] = {'mean': mean, 'ci_low': low, 'ci_high': high, 'num': len(scores)}
+        ranking = sorted(intervals, key=lambda name: intervals[name]['mean'], reverse=True)
+
+        pairs = []
+        for better, worse in zip(ranking, ranking[1:]):
+            common = self.scores[better].keys() & self.scores[worse].keys()
+            diffs = [self.scores[better][key] - self.scores[worse][key] for key in common]
+            mean, low, high = mean_ci(diffs, z)
+            pairs.append({'better': better, 'worse': worse, 'diff': mean, 'ci_low': low, 'ci_high': high})
+
+        state = {'ranking': ranking, 'models': intervals, 'pairs': pairs}
+        if pairs and all(pair['ci_low'] > 0 for pair in pairs):
+            return 'ranking_settled', state
+        if self.ci_width is not None and all(
+            item['ci_high'] - item['ci_low'] <= self.ci_width for item in intervals.values()
+        ):
+            return 'ci_width_reached', state
+        return None, state
+
+    def run(self) -> Dict[str, Any]:
+        """
+        执行序贯评测，并为每个模型生成基于已评测样本的报告
+
+        Returns:
+            停止点、置信区间和每轮检查历史
+        """
+        datasets, order = self._load_order()
+        total = len(order)
+        max_looks = max(1, math.ceil(total / self.batch_size))
+        num_comparisons = max(1, len(self.evaluators) - 1)
+        alpha = (1 - self.confidence) / (num_comparisons * max_looks)
+        z = NormalDist().inv_cdf(1 - alpha / 2)
+
+        for evaluator in self.evaluators.values():
+            for subset in datasets[next(iter(datasets))]:
+                evaluator.cache_manager.delete_review_cache(subset)
+
+        history = []
+        reason, state = 'exhausted', {}
+        evaluated = 0
+        while evaluated < total:
+            batch = order[evaluated:evaluated + self.batch_size]
+            for model_name in list(self.evaluators):
+                try:
+                    self._evaluate_batch(model_name, datasets[model_name], batch)
+                except Exception as e:
+                    self._drop(model_name, e)
+            evaluated += len(batch)
+
+            stop_reason, state = self._check(z)
+            history.append({'evaluated': evaluated, **state})
+            logger.info(
+                f'序贯评测[{self.benchmark_name}] 已评测 {evaluated}/{total} 个样本，当前排名: '
+                + ', '.join(f"{name}={state['models'][name]['mean']:.4f}" for name in state['ranking'])
+            )
+            if stop_reason and evaluated >= self.min_samples and evaluated < total:
+                reason = stop_reason
+                break
+
+        result = {
+            'benchmark': self.benchmark_name,
+            'stop_reason': reason,
+            'evaluated': evaluated,
+            'total': total,
+            'confidence': self.confidence,
+            'adjusted_alpha': alpha,
+            'ci_width_target': self.ci_width,
+            'ranking': state.get('ranking', []),
+            'models': state.get('models', {}),
+            'pairs': state.get('pairs', []),
+            'failures': dict(self.failures),
+            'history': history,
+        }
+        logger.info(f'序贯评测[{self.benchmark_name}] 停止: {reason}，共评测 {evaluated}/{total} 个样本')
+
+        for model_name, evaluator in list(self.evaluators.items()):
+            try:
+                for subset in self.sample_scores[model_name]:
+                    evaluator.flush_artifacts(subset)
+                agg_score_dict = {
+                    subset: evaluator.benchmark.aggregate_scores(sample_scores=sample_scores)
+                    for subset, sample_scores in self.sample_scores[model_name].items() if sample_scores
+                }
+                evaluator.run_stats['sequential'] = {
+                    key: value for key, value in result.items() if key != 'history'
+                }
+                evaluator.get_report(agg_score_dict)
+                evaluator.finalize()
+                if evaluator.progress is not None:
+                    evaluator.progress.finish(OK)
+            except Exception as e:
+                self._drop(model_name, e)
+        result['failures'] = dict(self.failures)
+        return result
@@ -0,0 +1,195 @@
+"""流式评测模块，模型推理和评分通过有界队列连接，每条预测结果产生后立即进入评分阶段，并随时提供部分聚合指标。"""
+import os
+import json
+import time
+import queue
+import threading
+import traceback
+from typing import Any, Callable, Dict, Iterable, List, Optional, TypeVar
+
+from evalscope.api.evaluator import TaskState
+from evalscope.api.metric import SampleScore
+from evalscope.utils.logger import get_logger
+
+logger = get_logger()
+
+T = TypeVar('T')
+
+PARTIAL_DIR = 'partial'
+
+# 通知评分线程退出
+_DONE = object()
+
+
+class PartialAggregate:
+    """
+    部分聚合指标
+
+    随评分结果累积样本评分，按时间间隔调用 benchmark 的 aggregate_scores 计算当前的聚合指标，
+    并写入 work_dir/partial/{model}/{benchmark}_{subset}.json
+    """
+
+    def __init__(self, benchmark: Any, path: Optional[str], total: int, interval: float = 5.0):
+        """
+        Args:
+            benchmark: benchmark adapter
+            path: 部分聚合结果文件路径，为 None 时不写文件
+            total: 样本总数
+            interval: 写文件的最小时间间隔（秒）
+        """
+        self.benchmark = benchmark
+        self.path = path
+        self.total = total
+        self.interval = interval
+        self.sample_scores: List[SampleScore] = []
+        self._lock = threading.Lock()
+        self._last_write = 0.0
+
+    def add(self, sample_score: SampleScore) -> None:
+        with self._lock:
+            self.sample_scores.append(sample_score)
+        if time.monotonic() - self._last_write >= self.interval:
+            self.write()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """计算当前已评分样本的聚合指标"""
+        with self._lock:
+            sample_scores = list(self.sample_scores)
+        metrics = []
+        if sample_scores:
+            metrics = [{
+                'metric': agg_score.metric_name,
+                'aggregation': agg_score.aggregation_name,
+                'score': agg_score.score,
+                'num': agg_score.num,
+            } for agg_score in self.benchmark.aggregate_scores(sample_scores=sample_scores)]
+        return {'completed': len(sample_scores), 'total': self.total, 'metrics': metrics}
+
+    def write(self, final: bool = False) -> Dict[str, Any]:
+        """写入当前的部分聚合结果"""
+        self._last_write = time.monotonic()
+        snapshot = dict(self.snapshot(), final=final)
+        if self.path:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        return snapshot
+
+
+def run_streaming(
+    units: Iterable[T],
+    generate: Callable[[T], List[TaskState]],
+    score: Callable[[TaskState], SampleScore],
+    on_score: Callable[[TaskState, SampleScore], None],
+    generation_workers: int,
+    scoring_workers: int,
+    queue_size: int,
+    ignore_errors: bool = False,
+) -> Dict[str, Any]:
+    """
+    运行 推理 → 评分 流水线
+
+    推理线程从任务列表中取出任务调用 generate，得到的预测结果放入有界队列；评分线程从队列中取出预测结果调用 score，
+    再在锁内调用 on_score。队列满时推理线程阻塞，避免预测结果在内存中无限堆积。
+
+    Args:
+        units: 推理任务（样本，或去重时共享同一请求的样本组）
+        generate: 执行一个推理任务，返回得到的预测结果
+        score: 对一条预测结果评分
+        on_score: 评分完成后的回调，串行调用
+        generation_workers: 推理线程数
+        scoring_workers: 评分线程数
+        queue_size: 推理与评分之间的队列容量
+        ignore_errors: 出错时记录日志并跳过，否则停止流水线并抛出第一个错误
+
+    Returns:
+        流水线统计：推理和评分的数量、失败数、各阶段忙碌时间和总耗时（秒）
+    """
+    work_queue: queue.Queue = queue.Queue()
+    for unit in units:
+        work_queue.put(unit)
+    score_queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    errors: List[BaseException] = []
+    stats = {'generated': 0, 'scored': 0, 'failed': 0, 'generation_busy': 0.0, 'scoring_busy': 0.0}
+
+    def fail(stage: str, exc: BaseException) -> None:
+        logger.error(f'Streaming {stage} failed: {exc}\nTraceback:\n{traceback.format_exc()}')
+        with lock:
+            stats['failed'] += 1
+            if not ignore_errors:
+                errors.append(exc)
+                stop.set()
+
+    def put(task_state: TaskState) -> None:
+        while not stop.is_set():
+            try:
+                score_queue.put(task_state, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def generation_worker() -> None:
+        while not stop.is_set():
+            try:
+                unit = work_queue.get_nowait()
+            except queue.Empty:
+                return
+            start = time.perf_counter()
+            try:
+                task_states = generate(unit)
+            except Exception as exc:
+                fail('generation', exc)
+                continue
+            finally:
+                elapsed = time.perf_counter() - start
+                with lock:
+                    stats['generation_busy'] += elapsed
+            with lock:
+                stats['generated'] += len(task_states)
+            for task_state in task_states:
+                put(task_state)
+
+    def scoring_worker() -> None:
+        while True:
+            task_state = score_queue.get()
+            if task_state is _DONE:
+                return
+            if stop.is_set():
+                continue
+            start = time.perf_counter()
+            try:
+                sample_score = score(task_state)
+            except Exception as exc:
+                fail('scoring', exc)
+                continue
+            finally:
+                elapsed = time.perf_counter() - start
+                with lock:
+                    stats['scoring_busy'] += elapsed
+            with lock:
+                stats['scored'] += 1
+                on_score(task_state, sample_score)
+
+    wall_start = time.perf_counter()
+    scorers = [threading.Thread(target=scoring_worker, daemon=True) for _ in range(max(1, scoring_workers))]
+    generators = [threading.Thread(target=generation_worker, daemon=True) for _ in range(max(1, generation_workers))]
+    for thread in scorers + generators:
+        thread.start()
+    for thread in generators:
+        thread.join()
+    for _ in scorers:
+        score_queue.put(_DONE)
+    for thread in scorers:
+        thread.join()
+
+    stats['wall_time'] = time.perf_counter() - wall_start
+    for key in ('generation_busy', 'scoring_busy', 'wall_time'):
+        stats[key] = round(stats[key], 3)
+    if errors:
+        raise errors[0]
+    return stats
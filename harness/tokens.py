@@ -0,0 +1,22 @@
+"""本地 token 数估算，不依赖具体模型的分词器，供调度、上下文打包和评分矩阵等共用。"""
+import math
+import re
+
+# 中日韩字符（含假名、谚文和全角字符）逐字计数，其余字符按字符数折算
+CJK_PATTERN = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]')
+
+
+def estimate_tokens(text: str, cjk_tokens: float = 1.0, chars_per_token: float = 4.0) -> int:
+    """
+    估算文本的 token 数
+
+    Args:
+        text: 文本
+        cjk_tokens: 每个中日韩字符的 token 数
+        chars_per_token: 其余字符每个 token 对应的字符数
+
+    Returns:
+        向上取整的 token 数；默认参数下中日韩字符每字 1 个 token，其余字符每 4 个字符 1 个 token
+    """
+    cjk = len(CJK_PATTERN.findall(text))
+    return math.ceil(cjk * cjk_tokens + (len(text) - cjk) / chars_per_token)
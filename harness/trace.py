@@ -0,0 +1,132 @@
+"""阶段追踪模块，记录评测各阶段在每个样本和每个 subset 上的耗时区间，导出为 Chrome Trace / Perfetto 可读取的 JSON。"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+TRACE_FILE_PATTERN = 'trace_{benchmark}.json'
+
+
+class Tracer:
+    """
+    线程安全的阶段追踪器
+
+    每个区间记录为一个 Chrome Trace 的完整事件（ph 为 X），时间戳为相对追踪开始的微秒数，
+    tid 为执行该阶段的线程，同一线程内的嵌套区间在查看器中显示为调用层级，不同线程显示为并发的轨道。
+    生成的文件可直接在 chrome://tracing 或 https://ui.perfetto.dev 中打开。
+
+    Args:
+        process_name: 查看器中显示的进程名称
+    """
+
+    def __init__(self, process_name: str):
+        self.process_name = process_name
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._origin = time.perf_counter()
+        self._threads: Dict[int, str] = {}
+
+    def _now(self) -> float:
+        return (time.perf_counter() - self._origin) * 1e6
+
+    @contextmanager
+    def span(self, name: str, cat: str, **args: Any) -> Iterator[None]:
+        """记录一个区间；区间内抛出的异常同样记录，异常类型写入事件的 args.error"""
+        thread = threading.current_thread()
+        start = self._now()
+        try:
+            yield
+        except BaseException as exc:
+            args['error'] = type(exc).__name__
+            raise
+        finally:
+            event = {
+                'name': name,
+                'cat': cat,
+                'ph': 'X',
+                'ts': round(start, 1),
+                'dur': round(self._now() - start, 1),
+                'pid': self._pid,
+                'tid': thread.ident,
+            }
+            if args:
+                event['args'] = args
+            with self._lock:
+                self._threads.setdefault(thread.ident, thread.name)
+                self.events.append(event)
+
+    def wrap(self, fn: Callable, name: str, cat: str,
+             get_args: Optional[Callable[..., Dict[str, Any]]] = None) -> Callable:
+        """包装函数，每次调用记录一个区间；get_args 接收与原函数相同的参数，返回写入事件的 args"""
+
+        @wraps(fn)
+        def traced(*args, **kwargs):
+            with self.span(name, cat, **(get_args(*args, **kwargs) if get_args else {})):
+                return fn(*args, **kwargs)
+
+        return traced
+
+    def instrument(self, obj: Any, method: str, name: str, cat: str,
+                   get_args: Optional[Callable[..., Dict[str, Any]]] = None) -> None:
+        """在实例上替换方法为带追踪的版本，不影响同类的其他实例"""
+        setattr(obj, method, self.wrap(getattr(obj, method), name, cat, get_args))
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """按类别统计区间数量和累计耗时（秒）；并发执行的区间耗时累加，可能超过墙钟时间"""
+        summary: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            events = list(self.events)
+        for event in events:
+            item = summary.setdefault(event['cat'], {'spans': 0, 'seconds': 0.0})
+            item['spans'] += 1
+            item['seconds'] += event['dur'] / 1e6
+        for item in summary.values():
+            item['seconds'] = round(item['seconds'], 3)
+        return summary
+
+    def write(self, path: str) -> None:
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event['ts'])
+            threads = dict(self._threads)
+        metadata = [{
+            'name': 'process_name',
+            'ph': 'M',
+            'pid': self._pid,
+            'tid': 0,
+            'args': {'name': self.process_name}
+        }]
+        metadata += [{
+            'name': 'thread_name',
+            'ph': 'M',
+            'pid': self._pid,
+            'tid': tid,
+            'args': {'name': thread_name}
+        } for tid, thread_name in threads.items()]
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+
+
+class TracedModel:
+    """
+    模型代理，generate 调用记录为 endpoint 区间（等待推理服务返回的时间），其余属性直接访问被代理的模型
+    """
+
+    def __init__(self, model: Any, tracer: Tracer):
+        object.__setattr__(self, '_model', model)
+        object.__setattr__(self, '_tracer', tracer)
+
+    def generate(self, *args, **kwargs):
+        model = object.__getattribute__(self, '_model')
+        with object.__getattribute__(self, '_tracer').span('endpoint', 'endpoint'):
+            return model.generate(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(object.__getattribute__(self, '_model'), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(object.__getattribute__(self, '_model'), name, value)
@@ -0,0 +1,21 @@
+import pytest
+
+from analyzer.matcher import BenchmarkMatcher, infer_capabilities
+
+
+@pytest.mark.parametrize('text, capabilities', [
+    ('We need to improve average coverage of our storage layer and decode rapid responses', []),
+    ('evaluate SQL generation and tool use with APIs', ['Coding', 'FunctionCalling']),
+    ('RAG retrieval over long context documents', ['LongContext', 'Retrieval']),
+    ('测试模型的代码能力和工具调用', ['Coding', 'FunctionCalling']),
+])
+def test_infer_capabilities_matches_whole_words(text, capabilities):
+    assert infer_capabilities(text) == capabilities
+
+
+def test_match_requirement_ignores_keywords_inside_words():
+    matches = BenchmarkMatcher(cache_path=None).match_requirement(
+        'We need to improve average coverage of our storage layer and decode rapid responses'
+    )
+    names = {match['benchmark_name'] for match in matches}
+    assert not names & {'text2sql', 'function_call'}
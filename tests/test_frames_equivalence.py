@@ -0,0 +1,63 @@
+import pytest
+
+from benchmarks.frames.equivalence import (
+    CONTAINMENT, LLM_JUDGE, NUMERIC, Number, check_equivalence, compare_quantities
+)
+
+
+@pytest.mark.parametrize('prediction, reference', [
+    ('1995', '1990s'),
+    ('1990', '1990s'),
+    ('0.5', '50%'),
+    ('0.12', '12%'),
+    ('35 people', '35'),
+    ('not 5', '5'),
+    ('more than 35', '35'),
+    ('less than 10 years', '10 years'),
+    ('before 1990', '1990'),
+    ('at least 35', '35'),
+    ('超过35人', '35人'),
+    ('George Washington Carver', 'George Washington'),
+    ('Paul Washington', 'Washington'),
+])
+def test_ambiguous_quantities_defer_to_judge(prediction, reference):
+    verdict = check_equivalence(prediction, reference)
+    assert verdict.tier == LLM_JUDGE
+    assert verdict.correct is None
+
+
+@pytest.mark.parametrize('prediction, reference, correct', [
+    ('12', '13', False),
+    ('2 s', '3 s', False),
+    ('5 km', '5000 m', True),
+    ('3 h', '180 minutes', True),
+    ('$5', '5 dollars', True),
+])
+def test_same_dimension_is_settled(prediction, reference, correct):
+    verdict = check_equivalence(prediction, reference)
+    assert verdict.tier == NUMERIC
+    assert verdict.correct is correct
+
+
+def test_different_dimensions_are_not_compared():
+    assert compare_quantities(Number(50, 'percent'), Number(0.5)) is None
+    assert compare_quantities(Number(0.5), Number(50, 'percent')) is None
+    assert compare_quantities(Number(5, 'usd'), Number(5, 'eur')) is None
+    assert compare_quantities(Number(5), Number(6)) is False
+
+
+@pytest.mark.parametrize('prediction, reference', [
+    ('It was George Washington.', 'George Washington'),
+    ('In Paris', 'Paris'),
+    ('答案是北京', '北京'),
+])
+def test_reference_in_short_answer(prediction, reference):
+    verdict = check_equivalence(prediction, reference)
+    assert verdict.tier == CONTAINMENT
+    assert verdict.correct is True
+
+
+def test_plain_quantity_in_short_answer():
+    verdict = check_equivalence('It was 35 years', '35 years')
+    assert verdict.tier == NUMERIC
+    assert verdict.correct is True
@@ -2,7 +2,7 @@ import argparse
 import os
 import config
 
-def parse_args(benchmark_name):
+def build_parser(benchmark_name):
     parser = argparse.ArgumentParser(description=f"Parse arguments for {benchmark_name}")
     parser.add_argument("--model", type=str, default=os.getenv('USE_LLM_NAME', None), choices=config.LLM_SERVER_CONFIG.keys(), help="模型名称")
     parser.add_argument("--dataset", type=str, default=benchmark_name, help="数据集名称")
@@ -12,7 +12,29 @@ def parse_args(benchmark_name):
     parser.add_argument("--use_llm_judge", action="store_true", help="是否使用LLM judge进行评估")
     parser.add_argument("--judge_model_name", type=str, default=os.getenv('USE_JUDGE_LLM_NAME', None), choices=config.LLM_SERVER_CONFIG.keys(), help="LLM judge模型名称")
     parser.add_argument("--work_dir", type=str, default=None, help="工作目录")
-    args = parser.parse_args()
+    parser.add_argument("--no_dedup", action="store_true", help="关闭相同请求去重")
+    parser.add_argument("--dedup_cache_dir", type=str, default=None, help="去重响应缓存目录，指定后可跨运行复用模型输出")
+    parser.add_argument("--incremental", action="store_true", help="增量评测，只评测新增或变更的样本")
+    parser.add_argument("--rescore_only", "--rescore-only", action="store_true", help="离线重新评分，读取工作目录中已有的预测结果，不调用模型")
+    parser.add_argument("--rescore_with_judge", action="store_true", help="离线重新评分时允许调用 judge 模型（默认与 --use_llm_judge 同时使用时报错）")
+    parser.add_argument("--rescore_workers", type=int, default=None, help="重新评分的进程数，默认为 CPU 核数")
+    parser.add_argument("--streaming", action="store_true", help="流式评测，每条预测结果产生后立即评分，推理和评分并行执行")
+    parser.add_argument("--stream_queue_size", type=int, default=None, help="流式评测中推理与评分之间的队列容量，默认为 batch_size 的 4 倍")
+    parser.add_argument("--schedule", type=str, default=None, choices=["fifo", "longest_first"], help="请求调度策略，longest_first 按估算的 token 量从大到小发送；指定后记录推理时间线")
+    parser.add_argument("--hedge", action="store_true", help="对 temperature 为 0 的请求开启对冲，耗时超过 p95 后发送重复请求，取先返回的结果")
+    parser.add_argument("--compact_artifacts", action="store_true", help="评审结果使用按块压缩的 zstd JSONL 格式保存，输入按内容哈希只存储一份")
+    parser.add_argument("--profile", type=str, nargs="?", const="sampling", default=None, choices=["sampling", "deterministic"], help="剖析评测进程的 CPU 热点，等待推理服务的时间单独统计，结果写入 work_dir/profile/；不带值时使用 sampling")
+    parser.add_argument("--track_memory", action="store_true", help="按数据集加载、推理、评分和报告生成分阶段记录进程 RSS 峰值和 tracemalloc 统计的主要分配位置，写入报告的 harness.memory 字段")
+    parser.add_argument("--memory_budget", "--memory-budget", type=float, default=None, help="进程内存预算（MB），RSS 超出时告警，并按 --memory_budget_action 处理")
+    parser.add_argument("--memory_budget_action", type=str, default="stream", choices=["warn", "stream"], help="内存超出预算后的处理方式：warn 只告警，stream 同时将之后的 subset 切换为流式评测（默认）")
+    parser.add_argument("--progress_interval", type=float, default=None, help="每隔指定秒数在终端输出进度、req/s、tokens/s、错误率、当前得分和预计剩余时间")
+    parser.add_argument("--metrics_port", type=int, default=None, help="在 127.0.0.1 的指定端口上以 Prometheus 文本格式提供 /metrics 评测指标接口，0 表示自动选择端口")
+    parser.add_argument("--trace", action="store_true", help="记录各阶段在每个样本和每个 subset 上的耗时，导出为 Chrome Trace / Perfetto 格式的 logs/trace_{benchmark}.json")
+    return parser
+
+
+def parse_args(benchmark_name):
+    args = build_parser(benchmark_name).parse_args()
     return args
 
 
@@ -24,6 +46,10 @@ def get_task_config(args: argparse.Namespace):
 
     dataset_config = config.LLM_DATASET_CONFIG[args.dataset]
 
+    request_policy = get_request_policy(model_name)
+    if getattr(args, 'hedge', False):
+        request_policy['hedge'] = True
+
     cleaned_model_name = model_name.replace('/', '-')
     if args.work_dir:
         work_dir = os.path.join(args.work_dir, args.dataset, cleaned_model_name + "_" + params)
@@ -44,15 +70,23 @@ def get_task_config(args: argparse.Namespace):
             "batch_size": args.batch_size,
             "temperature": 0.0,
             "max_tokens": args.max_tokens,
+            # 重试由 harness 按请求策略执行，EvalScope 只发送一次。EvalScope 的 retry_call 中 retries 是
+            # 总尝试次数而不是额外重试次数，retries=1 即只尝试一次、失败直接抛出；请求策略的重试、超时和
+            # 对冲统计都依赖这里恰好只有一次尝试，不要改成 0（不发送请求）或更大的值（与 harness 重试叠加）
+            "retries": 1,
+            "retry_interval": 0,
         },
         "work_dir": work_dir,
         "no_timestamp": True,
-        "timeout": 600,
+        "timeout": request_policy['timeout'],
+        "harness": dict(get_harness_config(args), request_policy=request_policy, model_name=model_name),
     }
     
     # 如果指定了使用LLM judge，添加到dataset_args中
     if args.use_llm_judge:
         assert args.judge_model_name is not None, "LLM judge模型名称不能为空"
+        if getattr(args, 'rescore_only', False) and not getattr(args, 'rescore_with_judge', False):
+            raise ValueError("离线重新评分不调用任何模型，使用 LLM judge 时需同时指定 --rescore_with_judge")
         judge_llm_config = config.LLM_SERVER_CONFIG[args.judge_model_name]
         task_config["judge_strategy"] = "auto"
         task_config["judge_model_args"] = {
@@ -61,4 +95,32 @@ def get_task_config(args: argparse.Namespace):
             "model_id": judge_llm_config['model'],
         }
     
-    return task_config
\ No newline at end of file
+    return task_config
+
+
+def get_request_policy(model_name: str):
+    """获取模型的请求策略，模型未单独配置的字段使用 default 中的值"""
+    return dict(config.LLM_REQUEST_POLICY['default'], **config.LLM_REQUEST_POLICY.get(model_name, {}))
+
+
+def get_harness_config(args: argparse.Namespace):
+    """生成 harness 扩展功能配置，args 可以是 ConfigGenerator 构造的简化参数对象"""
+    return {
+        "dedup": not getattr(args, 'no_dedup', False),
+        "dedup_cache_dir": getattr(args, 'dedup_cache_dir', None),
+        "incremental": getattr(args, 'incremental', False),
+        "rescore_only": getattr(args, 'rescore_only', False),
+        "rescore_workers": getattr(args, 'rescore_workers', None),
+        "rescore_with_judge": getattr(args, 'rescore_with_judge', False),
+        "streaming": getattr(args, 'streaming', False),
+        "stream_queue_size": getattr(args, 'stream_queue_size', None),
+        "compact_artifacts": getattr(args, 'compact_artifacts', False),
+        "schedule": getattr(args, 'schedule', None),
+        "trace": getattr(args, 'trace', False),
+        "profile": getattr(args, 'profile', None),
+        "track_memory": getattr(args, 'track_memory', False),
+        "memory_budget": getattr(args, 'memory_budget', None),
+        "memory_budget_action": getattr(args, 'memory_budget_action', 'stream'),
+        "progress_interval": getattr(args, 'progress_interval', None),
+        "metrics_port": getattr(args, 'metrics_port', None),
+    }